@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections.abc import Sequence
+
+from .logging.analysis import (
+    analyze,
+    format_report,
+    load_records,
+    load_spans,
+    split_runs,
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mas", description="MAS command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze_parser = commands.add_parser(
+        "analyze", help="Report performance figures from exported tracker data"
+    )
+    analyze_parser.add_argument(
+        "trace", help="Tracker export (export_json array or JSONL sink/export_jsonl file)"
+    )
+    analyze_parser.add_argument(
+        "--spans", help="OTLP JSON span export, used for compression overhead"
+    )
+    analyze_parser.add_argument("--session", help="Only analyze this session ID")
+    analyze_parser.add_argument(
+        "--run", type=int, help="Only analyze this workflow run (numbered from 1 per session)"
+    )
+    analyze_parser.add_argument(
+        "--json", action="store_true", help="Print the report as JSON instead of text"
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "analyze":
+        return _analyze(args)
+    return 2
+
+
+def _analyze(args: argparse.Namespace) -> int:
+    try:
+        runs = split_runs(load_records(args.trace))
+        spans = load_spans(args.spans) if args.spans else None
+    except (OSError, ValueError, KeyError) as error:
+        print(f"mas analyze: cannot read trace: {error}", file=sys.stderr)
+        return 1
+
+    runs = {
+        (session_id, run): records
+        for (session_id, run), records in runs.items()
+        if (args.session is None or session_id == args.session)
+        and (args.run is None or run == args.run)
+    }
+    if not runs:
+        print("mas analyze: no records found", file=sys.stderr)
+        return 1
+
+    reports = [analyze(records, spans, run) for (_, run), records in runs.items()]
+    if args.json:
+        print(json.dumps(reports if len(reports) > 1 else reports[0], indent=2))
+    else:
+        print("\n\n".join(format_report(report) for report in reports))
+    return 0
@@ -3,20 +3,46 @@
 提供多层次的上下文管理功能，包括：
 - 分层存储 (System/Workflow/Task/Agent)
 - 重要性评分
-- Token 窗口管理
-- LLM 摘要压缩
+- Token 窗口管理（离线分词器注册表）
+- 抽取式 / LLM 摘要压缩
+- TTL 过期与容量淘汰
+- 可插拔存储后端（内存 / SQLite）
+- 本地 BM25 相似度检索
+- SimHash 近重复去重
+- 写时复制分支与基于 DAG 引用计数的回收
 """
 
 from __future__ import annotations
 
+from .backend import (
+    ContextBackend,
+    ForkedBackend,
+    InMemoryBackend,
+    SQLiteBackend,
+    StaleEntryError,
+)
+from .cache import SummaryCache
 from .compression import ContextCompressor
+from .eviction import (
+    EvictionPolicy,
+    LayerLimits,
+    LRUEvictionPolicy,
+    ScoreEvictionPolicy,
+)
+from .extractive import ExtractiveSummarizer
+from .gc import ConsumerTracker, DemotionPolicy
 from .manager import ContextManager
+from .retrieval import BM25Index
 from .scorer import ContextScorer
 from .store import ContextStore
+from .tokenizer import EstimatingTokenizer, Tokenizer, TokenizerRegistry
 from .types import ContextEntry, ContextLayer, ContextType
 from .window import ContextWindow
 
 __all__ = [
+    "BM25Index",
+    "ConsumerTracker",
+    "ContextBackend",
     "ContextCompressor",
     "ContextEntry",
     "ContextLayer",
@@ -25,4 +51,18 @@ __all__ = [
     "ContextStore",
     "ContextType",
     "ContextWindow",
+    "DemotionPolicy",
+    "EstimatingTokenizer",
+    "EvictionPolicy",
+    "ExtractiveSummarizer",
+    "ForkedBackend",
+    "InMemoryBackend",
+    "LayerLimits",
+    "LRUEvictionPolicy",
+    "ScoreEvictionPolicy",
+    "SQLiteBackend",
+    "StaleEntryError",
+    "SummaryCache",
+    "Tokenizer",
+    "TokenizerRegistry",
 ]
@@ -0,0 +1,665 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import replace
+from pathlib import Path
+
+from .eviction import estimate_entry_bytes
+from .types import ContextEntry, ContextLayer, ContextType
+
+ResolvedEntry = tuple[ContextEntry, ContextLayer, str]
+
+
+class StaleEntryError(RuntimeError):
+    """写入所基于的条目版本已被其他进程更新或删除。"""
+
+    def __init__(self, entry_id: str) -> None:
+        super().__init__(f"条目 {entry_id} 已被其他写入者修改")
+        self.entry_id = entry_id
+
+
+class ContextBackend(ABC):
+    """上下文存储后端接口。
+
+    后端只负责条目的持久化与二级索引查询（按层、来源、父任务、关联任务、类型），
+    过期、淘汰等策略由 ``ContextStore`` 统一处理。
+    """
+
+    @abstractmethod
+    def put(self, layer: ContextLayer, key: str, entry: ContextEntry, size: int) -> None:
+        """写入（或覆盖）条目。
+
+        Args:
+            layer: 目标层级。
+            key: 层内键。
+            entry: 上下文条目。
+            size: 条目估算字节数，用于容量统计。
+        """
+
+    @abstractmethod
+    def resolve(self, entry_id: str) -> ResolvedEntry | None:
+        """按 ID 定位条目及其层与键。"""
+
+    def resolve_for_update(self, entry_id: str) -> ResolvedEntry | None:
+        """定位即将被原地修改的条目（写时复制后端在此复制共享条目）。"""
+
+        return self.resolve(entry_id)
+
+    @abstractmethod
+    def get_by_key(self, layer: ContextLayer, key: str) -> ContextEntry | None:
+        """按层与键获取条目。"""
+
+    @abstractmethod
+    def delete(self, entry_id: str) -> bool:
+        """删除条目，返回是否存在。"""
+
+    @abstractmethod
+    def layer_items(self, layer: ContextLayer) -> list[tuple[str, ContextEntry]]:
+        """返回层内所有 (键, 条目)。"""
+
+    @abstractmethod
+    def layer_count(self, layer: ContextLayer) -> int:
+        """返回层内条目数。"""
+
+    @abstractmethod
+    def layer_bytes(self, layer: ContextLayer) -> int:
+        """返回层内条目估算字节数之和。"""
+
+    @abstractmethod
+    def find_for_task(self, task_id: str) -> list[ContextEntry]:
+        """返回 TASK 层中 parent_id/source/related_ids 命中任务的条目。"""
+
+    @abstractmethod
+    def find_by_type(self, context_type: ContextType) -> list[ContextEntry]:
+        """返回所有层中指定类型的条目。"""
+
+    @abstractmethod
+    def expired_ids(self, layer: ContextLayer, now: float) -> list[str]:
+        """返回层内在 ``now`` 时刻已过期的条目 ID。"""
+
+    @abstractmethod
+    def clear_layer(self, layer: ContextLayer) -> list[str]:
+        """清空层并返回被移除的条目 ID。"""
+
+    def flush(self) -> None:  # noqa: B027 - 可选钩子，内存后端无需写回
+        """将缓存中的修改写回持久层（内存后端无需处理）。"""
+
+    def close(self) -> None:  # noqa: B027 - 可选钩子，无外部资源的后端无需释放
+        """释放后端资源。"""
+
+
+class InMemoryBackend(ContextBackend):
+    """基于字典的内存后端（默认）。"""
+
+    def __init__(self) -> None:
+        self._layers: dict[ContextLayer, dict[str, ContextEntry]] = {
+            layer: {} for layer in ContextLayer
+        }
+        self._index: dict[str, tuple[ContextLayer, str]] = {}  # id -> (layer, key)
+        self._entry_bytes: dict[str, int] = {}
+        self._layer_bytes: dict[ContextLayer, int] = dict.fromkeys(ContextLayer, 0)
+
+    def put(self, layer: ContextLayer, key: str, entry: ContextEntry, size: int) -> None:
+        self.delete(entry.id)
+        self._layers[layer][key] = entry
+        self._index[entry.id] = (layer, key)
+        self._entry_bytes[entry.id] = size
+        self._layer_bytes[layer] += size
+
+    def resolve(self, entry_id: str) -> ResolvedEntry | None:
+        mapping = self._index.get(entry_id)
+        if mapping is None:
+            return None
+
+        layer, key = mapping
+        entry = self._layers[layer].get(key)
+        if entry is None:
+            self._index.pop(entry_id, None)
+            return None
+
+        return entry, layer, key
+
+    def get_by_key(self, layer: ContextLayer, key: str) -> ContextEntry | None:
+        return self._layers[layer].get(key)
+
+    def delete(self, entry_id: str) -> bool:
+        resolved = self.resolve(entry_id)
+        if resolved is None:
+            return False
+
+        _, layer, key = resolved
+        del self._layers[layer][key]
+        del self._index[entry_id]
+        self._layer_bytes[layer] -= self._entry_bytes.pop(entry_id, 0)
+        return True
+
+    def layer_items(self, layer: ContextLayer) -> list[tuple[str, ContextEntry]]:
+        return list(self._layers[layer].items())
+
+    def layer_count(self, layer: ContextLayer) -> int:
+        return len(self._layers[layer])
+
+    def layer_bytes(self, layer: ContextLayer) -> int:
+        return self._layer_bytes[layer]
+
+    def find_for_task(self, task_id: str) -> list[ContextEntry]:
+        return [
+            entry
+            for entry in self._layers[ContextLayer.TASK].values()
+            if entry.parent_id == task_id
+            or entry.source == task_id
+            or task_id in entry.related_ids
+        ]
+
+    def find_by_type(self, context_type: ContextType) -> list[ContextEntry]:
+        results: list[ContextEntry] = []
+        for layer_entries in self._layers.values():
+            results.extend(
+                entry for entry in layer_entries.values() if entry.type == context_type
+            )
+        return results
+
+    def expired_ids(self, layer: ContextLayer, now: float) -> list[str]:
+        return [
+            entry.id for entry in self._layers[layer].values() if entry.is_expired(now)
+        ]
+
+    def clear_layer(self, layer: ContextLayer) -> list[str]:
+        entries = self._layers[layer]
+        removed_ids = [entry.id for entry in entries.values()]
+        for entry_id in removed_ids:
+            self._index.pop(entry_id, None)
+            self._entry_bytes.pop(entry_id, None)
+
+        entries.clear()
+        self._layer_bytes[layer] = 0
+        return removed_ids
+
+
+class SQLiteBackend(ContextBackend):
+    """SQLite（WAL 模式）持久化后端，带内存 LRU 热缓存。
+
+    条目完整数据以 JSON 存于磁盘，层/来源/父任务/类型/关联任务等二级索引由 SQL
+    索引维护，因此会话规模不受单进程内存限制，可在进程重启后恢复，并可由多个
+    工作进程共享同一数据库文件。热缓存只在本进程内有效：缓存对象上的原地修改
+    （如访问计数）在被挤出缓存或调用 ``flush`` 时写回，且只写回内容确有变化的
+    条目。每行带有 ``version``：读取时若数据库版本比缓存新，以数据库内容为准；
+    写回时比较版本，若其他进程已更新或删除该条目，则放弃本进程的过期副本；
+    对读自本后端的条目调用 ``put`` 时同样比较版本，冲突时抛出 ``StaleEntryError``，
+    而不是覆盖对方的修改。
+    """
+
+    DEFAULT_CACHE_SIZE = 1024
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS context_entries (
+        session_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        layer INTEGER NOT NULL,
+        key TEXT NOT NULL,
+        type TEXT NOT NULL,
+        source TEXT NOT NULL,
+        parent_id TEXT,
+        timestamp REAL NOT NULL,
+        ttl INTEGER,
+        size INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (session_id, id),
+        UNIQUE (session_id, layer, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_context_layer ON context_entries (session_id, layer);
+    CREATE INDEX IF NOT EXISTS idx_context_source ON context_entries (session_id, source);
+    CREATE INDEX IF NOT EXISTS idx_context_parent ON context_entries (session_id, parent_id);
+    CREATE INDEX IF NOT EXISTS idx_context_type ON context_entries (session_id, type);
+    CREATE TABLE IF NOT EXISTS context_related (
+        session_id TEXT NOT NULL,
+        entry_id TEXT NOT NULL,
+        related_id TEXT NOT NULL,
+        PRIMARY KEY (session_id, entry_id, related_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_context_related
+        ON context_related (session_id, related_id);
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        session_id: str,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.path = Path(path)
+        self.session_id = session_id
+        self.cache_size = max(1, cache_size)
+        self._cache: OrderedDict[str, ResolvedEntry] = OrderedDict()
+        # id -> (读入时的版本, 读入时负载的哈希)，用于判断缓存条目是否被修改
+        self._clean: dict[str, tuple[int, int]] = {}
+        self._lock = threading.RLock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(context_entries)")}
+        if "version" not in columns:
+            self._conn.execute(
+                "ALTER TABLE context_entries ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            )
+        self._conn.commit()
+
+    def put(self, layer: ContextLayer, key: str, entry: ContextEntry, size: int) -> None:
+        """写入条目；若 ``entry`` 是读自本后端的缓存对象，则要求其版本仍是最新。
+
+        Raises:
+            StaleEntryError: 条目在读取后已被其他写入者更新或删除（缓存副本随之丢弃）。
+        """
+
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, version FROM context_entries "
+                "WHERE session_id = ? AND (id = ? OR (layer = ? AND key = ?))",
+                (self.session_id, entry.id, int(layer), key),
+            ).fetchall()
+            read_version = self._read_version(entry)
+            if read_version is not None:
+                current = next((row[1] for row in rows if row[0] == entry.id), None)
+                if current != read_version:
+                    self._forget(entry.id)
+                    raise StaleEntryError(entry.id)
+            version = max((row[1] for row in rows), default=0) + 1
+            for occupant_id, _ in rows:
+                if occupant_id != entry.id:
+                    self._forget(occupant_id)
+                    self._delete_rows(occupant_id)
+            self._delete_rows(entry.id)
+            payload = self._encode(entry)
+            self._conn.execute(
+                "INSERT INTO context_entries "
+                "(session_id, id, layer, key, type, source, parent_id, timestamp, ttl, size, "
+                "payload, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.session_id,
+                    entry.id,
+                    int(layer),
+                    key,
+                    entry.type.value,
+                    entry.source,
+                    entry.parent_id,
+                    entry.timestamp,
+                    entry.ttl,
+                    size,
+                    payload,
+                    version,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO context_related (session_id, entry_id, related_id) "
+                "VALUES (?, ?, ?)",
+                [(self.session_id, entry.id, related) for related in entry.related_ids],
+            )
+            self._cache_put(entry, layer, key, version, payload)
+
+    def resolve(self, entry_id: str) -> ResolvedEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT layer, key, version FROM context_entries "
+                "WHERE session_id = ? AND id = ?",
+                (self.session_id, entry_id),
+            ).fetchone()
+            if row is None:
+                self._forget(entry_id)
+                return None
+
+            layer, key, version = ContextLayer(row[0]), row[1], row[2]
+            cached = self._cache.get(entry_id)
+            if cached is not None and cached[1:] == (layer, key) and (
+                self._clean[entry_id][0] == version
+            ):
+                self._cache.move_to_end(entry_id)
+                return cached
+
+            # 未缓存，或其他进程已写入更新的版本：以数据库中的内容为准
+            payload = self._conn.execute(
+                "SELECT payload FROM context_entries WHERE session_id = ? AND id = ?",
+                (self.session_id, entry_id),
+            ).fetchone()[0]
+            return self._cache_put(self._decode(payload), layer, key, version, payload)
+
+    def get_by_key(self, layer: ContextLayer, key: str) -> ContextEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, payload, version FROM context_entries "
+                "WHERE session_id = ? AND layer = ? AND key = ?",
+                (self.session_id, int(layer), key),
+            ).fetchone()
+            if row is None:
+                return None
+            return self._materialize(row[0], row[1], layer, key, row[2])
+
+    def delete(self, entry_id: str) -> bool:
+        with self._lock, self._conn:
+            self._forget(entry_id)
+            return self._delete_rows(entry_id)
+
+    def layer_items(self, layer: ContextLayer) -> list[tuple[str, ContextEntry]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, payload, version FROM context_entries "
+                "WHERE session_id = ? AND layer = ? ORDER BY rowid",
+                (self.session_id, int(layer)),
+            ).fetchall()
+            return [
+                (key, self._materialize(entry_id, payload, layer, key, version))
+                for entry_id, key, payload, version in rows
+            ]
+
+    def layer_count(self, layer: ContextLayer) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM context_entries WHERE session_id = ? AND layer = ?",
+                (self.session_id, int(layer)),
+            ).fetchone()
+            return int(row[0])
+
+    def layer_bytes(self, layer: ContextLayer) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM context_entries "
+                "WHERE session_id = ? AND layer = ?",
+                (self.session_id, int(layer)),
+            ).fetchone()
+            return int(row[0])
+
+    def find_for_task(self, task_id: str) -> list[ContextEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, payload, version FROM context_entries "
+                "WHERE session_id = ? AND layer = ? AND ("
+                "parent_id = ? OR source = ? OR id IN ("
+                "SELECT entry_id FROM context_related "
+                "WHERE session_id = ? AND related_id = ?)) ORDER BY rowid",
+                (
+                    self.session_id,
+                    int(ContextLayer.TASK),
+                    task_id,
+                    task_id,
+                    self.session_id,
+                    task_id,
+                ),
+            ).fetchall()
+            return [
+                self._materialize(entry_id, payload, ContextLayer.TASK, key, version)
+                for entry_id, key, payload, version in rows
+            ]
+
+    def find_by_type(self, context_type: ContextType) -> list[ContextEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, layer, key, payload, version FROM context_entries "
+                "WHERE session_id = ? AND type = ? ORDER BY layer, rowid",
+                (self.session_id, context_type.value),
+            ).fetchall()
+            return [
+                self._materialize(entry_id, payload, ContextLayer(layer), key, version)
+                for entry_id, layer, key, payload, version in rows
+            ]
+
+    def expired_ids(self, layer: ContextLayer, now: float) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM context_entries WHERE session_id = ? AND layer = ? "
+                "AND ttl IS NOT NULL AND timestamp + ttl <= ?",
+                (self.session_id, int(layer), now),
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def clear_layer(self, layer: ContextLayer) -> list[str]:
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id FROM context_entries WHERE session_id = ? AND layer = ?",
+                (self.session_id, int(layer)),
+            ).fetchall()
+            removed_ids = [row[0] for row in rows]
+            for entry_id in removed_ids:
+                self._forget(entry_id)
+                self._delete_rows(entry_id)
+            return removed_ids
+
+    def flush(self) -> None:
+        with self._lock, self._conn:
+            for entry, _, _ in list(self._cache.values()):
+                self._write_back(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._cache.clear()
+            self._clean.clear()
+            self._conn.close()
+
+    def _materialize(
+        self, entry_id: str, payload: str, layer: ContextLayer, key: str, version: int
+    ) -> ContextEntry:
+        cached = self._cache.get(entry_id)
+        if cached is not None and self._clean[entry_id][0] == version:
+            self._cache.move_to_end(entry_id)
+            return cached[0]
+        # 未缓存，或其他进程已写入更新的版本：以数据库中的内容为准
+        entry, _, _ = self._cache_put(self._decode(payload), layer, key, version, payload)
+        return entry
+
+    def _cache_put(
+        self,
+        entry: ContextEntry,
+        layer: ContextLayer,
+        key: str,
+        version: int,
+        payload: str,
+    ) -> ResolvedEntry:
+        resolved = (entry, layer, key)
+        self._cache[entry.id] = resolved
+        self._cache.move_to_end(entry.id)
+        self._clean[entry.id] = (version, hash(payload))
+        while len(self._cache) > self.cache_size:
+            evicted_id, (evicted, _, _) = self._cache.popitem(last=False)
+            if self._conn.in_transaction:
+                self._write_back(evicted)
+            else:
+                with self._conn:
+                    self._write_back(evicted)
+            self._clean.pop(evicted_id, None)
+        return resolved
+
+    def _write_back(self, entry: ContextEntry) -> None:
+        state = self._clean.get(entry.id)
+        if state is None:
+            return
+        version, digest = state
+        payload = self._encode(entry)
+        if hash(payload) == digest:
+            return
+
+        cursor = self._conn.execute(
+            "UPDATE context_entries SET payload = ?, version = version + 1 "
+            "WHERE session_id = ? AND id = ? AND version = ?",
+            (payload, self.session_id, entry.id, version),
+        )
+        if cursor.rowcount:
+            self._clean[entry.id] = (version + 1, hash(payload))
+        else:
+            # 其他进程已更新或删除该条目，放弃本进程的过期副本
+            self._forget(entry.id)
+
+    def _read_version(self, entry: ContextEntry) -> int | None:
+        """``entry`` 为本后端缓存的对象时返回其读入版本，否则返回 None。"""
+
+        cached = self._cache.get(entry.id)
+        if cached is None or cached[0] is not entry:
+            return None
+        return self._clean[entry.id][0]
+
+    def _forget(self, entry_id: str) -> None:
+        self._cache.pop(entry_id, None)
+        self._clean.pop(entry_id, None)
+
+    def _delete_rows(self, entry_id: str) -> bool:
+        cursor = self._conn.execute(
+            "DELETE FROM context_entries WHERE session_id = ? AND id = ?",
+            (self.session_id, entry_id),
+        )
+        self._conn.execute(
+            "DELETE FROM context_related WHERE session_id = ? AND entry_id = ?",
+            (self.session_id, entry_id),
+        )
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _encode(entry: ContextEntry) -> str:
+        return json.dumps(entry.to_dict(), ensure_ascii=False)
+
+    @staticmethod
+    def _decode(payload: str) -> ContextEntry:
+        return ContextEntry.from_dict(json.loads(payload))
+
+
+class ForkedBackend(ContextBackend):
+    """写时复制的分支后端。
+
+    读操作先查本分支的本地条目，再穿透到父后端；写入只落在本地，删除父条目时
+    记录墓碑，原地修改父条目前先复制到本地。父条目在分支间共享而不复制，父后端
+    在分支存续期间的修改对分支仍然可见（除非已被本分支覆盖或删除）。
+    """
+
+    def __init__(self, parent: ContextBackend) -> None:
+        self.parent = parent
+        self.local = InMemoryBackend()
+        self.tombstones: set[str] = set()
+
+    def put(self, layer: ContextLayer, key: str, entry: ContextEntry, size: int) -> None:
+        self.tombstones.discard(entry.id)
+        occupant = self.parent.get_by_key(layer, key)
+        if occupant is not None and occupant.id != entry.id:
+            self.tombstones.add(occupant.id)
+        self.local.put(layer, key, entry, size)
+
+    def owns(self, entry_id: str) -> bool:
+        """条目是否由本分支写入或复制（而非与父后端共享）。"""
+
+        return self.local.resolve(entry_id) is not None
+
+    def resolve(self, entry_id: str) -> ResolvedEntry | None:
+        if entry_id in self.tombstones:
+            return None
+        return self.local.resolve(entry_id) or self.parent.resolve(entry_id)
+
+    def resolve_for_update(self, entry_id: str) -> ResolvedEntry | None:
+        resolved = self.local.resolve(entry_id)
+        if resolved is not None or entry_id in self.tombstones:
+            return resolved
+
+        shared = self.parent.resolve(entry_id)
+        if shared is None:
+            return None
+
+        entry, layer, key = shared
+        copied = replace(entry)
+        self.local.put(layer, key, copied, estimate_entry_bytes(copied))
+        return copied, layer, key
+
+    def get_by_key(self, layer: ContextLayer, key: str) -> ContextEntry | None:
+        entry = self.local.get_by_key(layer, key)
+        if entry is not None:
+            return entry
+        entry = self.parent.get_by_key(layer, key)
+        if entry is None or self._is_shadowed(entry.id):
+            return None
+        return entry
+
+    def delete(self, entry_id: str) -> bool:
+        if entry_id in self.tombstones:
+            return False
+        deleted = self.local.delete(entry_id)
+        if self.parent.resolve(entry_id) is not None:
+            self.tombstones.add(entry_id)
+            deleted = True
+        return deleted
+
+    def layer_items(self, layer: ContextLayer) -> list[tuple[str, ContextEntry]]:
+        items = self.local.layer_items(layer)
+        local_keys = {key for key, _ in items}
+        items.extend(
+            (key, entry)
+            for key, entry in self.parent.layer_items(layer)
+            if key not in local_keys and not self._is_shadowed(entry.id)
+        )
+        return items
+
+    def layer_count(self, layer: ContextLayer) -> int:
+        return self.local.layer_count(layer) + self.parent.layer_count(layer) - len(
+            self._shadowed_in(layer)
+        )
+
+    def layer_bytes(self, layer: ContextLayer) -> int:
+        shadowed = sum(estimate_entry_bytes(entry) for entry in self._shadowed_in(layer))
+        return self.local.layer_bytes(layer) + self.parent.layer_bytes(layer) - shadowed
+
+    def find_for_task(self, task_id: str) -> list[ContextEntry]:
+        return self.local.find_for_task(task_id) + [
+            entry
+            for entry in self.parent.find_for_task(task_id)
+            if not self._is_shadowed(entry.id)
+        ]
+
+    def find_by_type(self, context_type: ContextType) -> list[ContextEntry]:
+        return self.local.find_by_type(context_type) + [
+            entry
+            for entry in self.parent.find_by_type(context_type)
+            if not self._is_shadowed(entry.id)
+        ]
+
+    def expired_ids(self, layer: ContextLayer, now: float) -> list[str]:
+        return self.local.expired_ids(layer, now) + [
+            entry_id
+            for entry_id in self.parent.expired_ids(layer, now)
+            if not self._is_shadowed(entry_id)
+        ]
+
+    def clear_layer(self, layer: ContextLayer) -> list[str]:
+        removed_ids = self.local.clear_layer(layer)
+        for _, entry in self.parent.layer_items(layer):
+            if not self._is_shadowed(entry.id):
+                self.tombstones.add(entry.id)
+                removed_ids.append(entry.id)
+        return removed_ids
+
+    def local_items(self) -> list[tuple[ContextLayer, str, ContextEntry]]:
+        """返回本分支写入或复制的所有 (层, 键, 条目)。"""
+
+        return [
+            (layer, key, entry)
+            for layer in ContextLayer
+            for key, entry in self.local.layer_items(layer)
+        ]
+
+    def _is_shadowed(self, entry_id: str) -> bool:
+        return entry_id in self.tombstones or self.local.resolve(entry_id) is not None
+
+    def _shadowed_in(self, layer: ContextLayer) -> list[ContextEntry]:
+        """父后端中位于该层、但已被本分支覆盖（同 ID 或同键）或删除的条目。"""
+
+        shadowed: dict[str, ContextEntry] = {}
+        for key, _ in self.local.layer_items(layer):
+            occupant = self.parent.get_by_key(layer, key)
+            if occupant is not None:
+                shadowed[occupant.id] = occupant
+        for entry_id in self.tombstones - shadowed.keys():
+            resolved = self.parent.resolve(entry_id)
+            if resolved is not None and resolved[1] == layer:
+                shadowed[entry_id] = resolved[0]
+        return list(shadowed.values())
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+
+
+class SummaryCache:
+    """摘要缓存：按 (文本, 最大长度, 模型) 的内容哈希缓存摘要结果。
+
+    内存中使用 LRU，可选地持久化到磁盘目录，使重试、恢复运行等场景下相同文本
+    不会被重复摘要。
+    """
+
+    DEFAULT_MAX_ENTRIES = 512
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        directory: str | Path | None = None,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.directory = Path(directory) if directory is not None else None
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    @staticmethod
+    def make_key(text: str, max_length: int, model: str | None) -> str:
+        """计算缓存键。
+
+        Args:
+            text: 待摘要文本。
+            max_length: 摘要最大长度。
+            model: 生成摘要的模型名称。
+
+        Returns:
+            str: SHA-256 十六进制摘要。
+        """
+
+        digest = hashlib.sha256()
+        digest.update((model or "").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(str(max_length).encode("ascii"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """查询缓存，内存未命中时回退到磁盘。"""
+
+        summary = self._entries.get(key)
+        if summary is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return summary
+
+        summary = self._read_disk(key)
+        if summary is not None:
+            self._remember(key, summary)
+            self._hits += 1
+            self._disk_hits += 1
+            return summary
+
+        self._misses += 1
+        return None
+
+    def put(self, key: str, summary: str) -> None:
+        """写入缓存（以及磁盘目录，如已配置）。"""
+
+        self._remember(key, summary)
+        self._write_disk(key, summary)
+
+    def record_coalesced(self) -> None:
+        """记录一次被合并到进行中请求的摘要调用。"""
+
+        self._coalesced += 1
+
+    def get_stats(self) -> dict[str, object]:
+        """获取缓存统计信息。"""
+
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, summary: str) -> None:
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path | None:
+        if self.directory is None:
+            return None
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def _read_disk(self, key: str) -> str | None:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, summary: str) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _ = path.write_text(summary, encoding="utf-8")
+        except OSError:
+            return
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 from dataclasses import replace
 from typing import TYPE_CHECKING
 
+from .cache import SummaryCache
+from .extractive import ExtractiveSummarizer
 from .types import ContextEntry
 
 if TYPE_CHECKING:
     from ..llm.client import LLMClient
+    from ..logging.spans import SpanTracer
 
 
 class ContextCompressor:
-    """上下文压缩器，使用 LLM 进行摘要压缩。"""
+    """上下文压缩器，分层压缩：本地抽取式摘要优先，LLM 摘要兜底。"""
 
     SUMMARY_PROMPT = """请简洁地总结以下内容，保留关键信息：
 
@@ -26,12 +31,31 @@ class ContextCompressor:
 摘要："""
 
     COMPRESSION_THRESHOLD = 4000
-
-    def __init__(self, llm_client: LLMClient | None = None):
+    DEFAULT_SUMMARY_LENGTH = 1000
+    MIN_SUMMARY_LENGTH = 200
+
+    def __init__(
+        self,
+        llm_client: LLMClient | None = None,
+        cache: SummaryCache | None = None,
+        extractive_first: bool = True,
+        tracer: SpanTracer | None = None,
+    ):
         self._llm_client = llm_client
+        self.tracer = tracer
+        self.cache = cache or SummaryCache()
+        self.extractive_first = extractive_first
+        self.extractive = ExtractiveSummarizer()
+        self._inflight: dict[str, asyncio.Future[str]] = {}
+
+    async def summarize(
+        self, text: str, max_length: int = DEFAULT_SUMMARY_LENGTH
+    ) -> str:
+        """分层生成摘要：抽取式摘要 -> LLM 摘要 -> 智能截断。
 
-    async def summarize(self, text: str, max_length: int = 1000) -> str:
-        """使用 LLM 或智能截断生成摘要。
+        本地抽取式摘要能放入预算时直接返回，只有抽取后仍超出预算的文本（如无句子
+        边界的长段落）才交给 LLM。LLM 摘要结果按内容哈希缓存；相同文本的并发请求
+        会合并为一次 LLM 调用。
 
         Args:
             text: 待压缩文本。
@@ -44,23 +68,88 @@ class ContextCompressor:
         if not text:
             return ""
 
+        if self.extractive_first:
+            extracted = self.extractive.summarize(text, max_length)
+            if extracted is not None:
+                return extracted
+
         if self._llm_client is None:
             return self.truncate_smart(text, max_length)
 
+        key = self.cache.make_key(text, max_length, self._model_name())
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.cache.record_coalesced()
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            summary, from_llm = await self._summarize_with_llm(text, max_length)
+        except BaseException:
+            # 发起者失败或被取消时，合并进来的调用方退回智能截断，而不是随之取消
+            future.set_result(self.truncate_smart(text, max_length))
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if from_llm:
+            self.cache.put(key, summary)
+        future.set_result(summary)
+        return summary
+
+    async def _summarize_with_llm(
+        self, text: str, max_length: int
+    ) -> tuple[str, bool]:
+        """调用 LLM 生成摘要，返回 (摘要, 是否来自 LLM)。"""
+
+        if self._llm_client is None:
+            return self.truncate_smart(text, max_length), False
+
         prompt = self.SUMMARY_PROMPT.format(text=text, max_length=max_length)
+        span = (
+            self.tracer.span("context.summarize", max_length=max_length)
+            if self.tracer is not None
+            else contextlib.nullcontext()
+        )
         try:
-            summary = await self._llm_client.acomplete(prompt, temperature=0.3)
+            with span:
+                summary = await self._llm_client.acomplete(prompt, temperature=0.3)
         except Exception:
-            return self.truncate_smart(text, max_length)
+            return self.truncate_smart(text, max_length), False
 
         cleaned = (summary or "").strip()
         if not cleaned:
-            return self.truncate_smart(text, max_length)
+            return self.truncate_smart(text, max_length), False
 
         if len(cleaned) > max_length:
-            return self.truncate_smart(cleaned, max_length)
+            return self.truncate_smart(cleaned, max_length), True
+
+        return cleaned, True
+
+    def _model_name(self) -> str | None:
+        model = getattr(self._llm_client, "model", None)
+        return model if isinstance(model, str) else None
+
+    def compress_local(self, text: str, max_length: int) -> str:
+        """仅使用本地手段压缩文本（抽取式摘要，失败时智能截断）。
 
-        return cleaned
+        Args:
+            text: 原始文本。
+            max_length: 最大字符数。
+
+        Returns:
+            str: 压缩后的文本。
+        """
+
+        extracted = self.extractive.summarize(text, max_length)
+        if extracted is not None:
+            return extracted
+        return self.truncate_smart(text, max_length)
 
     def truncate_smart(self, text: str, max_length: int) -> str:
         """智能截断文本，尽量保持句子边界。
@@ -102,8 +191,27 @@ class ContextCompressor:
         text = self._stringify(content)
         return len(text) >= self.COMPRESSION_THRESHOLD
 
+    def target_length(self, text: str, token_count: int, token_budget: int) -> int | None:
+        """按 token 预算计算文本需要压缩到的字符长度。
+
+        Args:
+            text: 待压缩文本。
+            token_count: 文本的 token 数。
+            token_budget: 文本在消费者窗口中可占用的 token 数。
+
+        Returns:
+            int | None: 目标字符长度（不低于 ``MIN_SUMMARY_LENGTH``）；
+                文本已能放入预算或无需压缩时返回 None。
+        """
+
+        if token_count <= token_budget:
+            return None
+        target = int(len(text) * max(token_budget, 0) / token_count)
+        target = max(target, self.MIN_SUMMARY_LENGTH)
+        return target if target < len(text) else None
+
     async def compress_entry(
-        self, entry: ContextEntry, max_length: int = 1000
+        self, entry: ContextEntry, max_length: int = DEFAULT_SUMMARY_LENGTH
     ) -> ContextEntry:
         """压缩上下文条目并返回新条目。
 
@@ -118,7 +226,7 @@ class ContextCompressor:
         if entry.is_compressed and entry.summary:
             return entry
 
-        text_content = entry.summary or self._stringify(entry.content)
+        text_content = entry.summary or entry.content_text()
         summary = await self.summarize(text_content, max_length=max_length)
         return replace(
             entry,
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from collections.abc import Mapping, Sequence
+
+from .extractive import tokenize
+from .types import ContextEntry
+
+FINGERPRINT_BITS = 64
+DEFAULT_MAX_DISTANCE = 3
+_BAND_BITS = 16
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def simhash(text: str) -> int | None:
+    """计算文本的 64 位 SimHash 指纹。
+
+    Args:
+        text: 原始文本。
+
+    Returns:
+        int | None: 指纹，相似文本的指纹汉明距离较小；文本没有任何词项（如只含
+        标点或表情）时返回 None，此类条目不参与去重。
+    """
+
+    features = Counter(tokenize(text))
+    if not features:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    for feature, weight in features.items():
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(FINGERPRINT_BITS):
+            if value >> bit & 1:
+                weights[bit] += weight
+            else:
+                weights[bit] -= weight
+
+    fingerprint = 0
+    for bit, total in enumerate(weights):
+        if total > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(left: int, right: int) -> int:
+    """计算两个指纹的汉明距离。"""
+
+    return (left ^ right).bit_count()
+
+
+def deduplicate(
+    entries: Sequence[ContextEntry],
+    fingerprints: Mapping[str, int | None],
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+) -> list[ContextEntry]:
+    """去除近似重复的条目，每个近重复簇只保留排在最前的代表。
+
+    指纹按 16 位分段做 LSH 分桶，只比较至少一段完全相同的条目；当
+    ``max_distance`` 小于段数（4）时，由抽屉原理可知不会漏掉任何近重复对。
+
+    Args:
+        entries: 已按得分降序排列的条目。
+        fingerprints: 条目 ID 到 SimHash 指纹的映射，缺失指纹或指纹为 None 的条目
+            总会保留。
+        max_distance: 视为近重复的最大汉明距离。
+
+    Returns:
+        list[ContextEntry]: 去重后的条目，保持原有顺序。
+    """
+
+    bands = FINGERPRINT_BITS // _BAND_BITS
+    buckets: dict[tuple[int, int], list[int]] = {}
+    kept: list[ContextEntry] = []
+    for entry in entries:
+        fingerprint = fingerprints.get(entry.id)
+        if fingerprint is None:
+            kept.append(entry)
+            continue
+
+        keys = [
+            (band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK)
+            for band in range(bands)
+        ]
+        is_duplicate = any(
+            hamming_distance(fingerprint, other) <= max_distance
+            for key in keys
+            for other in buckets.get(key, ())
+        )
+        if is_duplicate:
+            continue
+
+        kept.append(entry)
+        for key in keys:
+            buckets.setdefault(key, []).append(fingerprint)
+    return kept
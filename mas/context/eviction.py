@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from .types import ContextEntry
+
+
+@dataclass(frozen=True)
+class LayerLimits:
+    """单个上下文层的容量限制。
+
+    Attributes:
+        max_entries: 层内最多保留的条目数，None 表示不限制。
+        max_bytes: 层内内容估算字节数上限，None 表示不限制。
+    """
+
+    max_entries: int | None = None
+    max_bytes: int | None = None
+
+    def is_exceeded(self, entry_count: int, byte_count: int) -> bool:
+        """判断给定的占用是否超出限制。"""
+
+        if self.max_entries is not None and entry_count > self.max_entries:
+            return True
+        return self.max_bytes is not None and byte_count > self.max_bytes
+
+
+class EvictionPolicy(ABC):
+    """淘汰策略：为条目给出淘汰优先级，值越小越先被淘汰。"""
+
+    @abstractmethod
+    def eviction_key(self, entry: ContextEntry) -> tuple[float, ...]:
+        """返回条目的淘汰排序键。"""
+
+    def order(self, entries: list[ContextEntry]) -> list[ContextEntry]:
+        """按淘汰优先级排序（最先淘汰的在前）。"""
+
+        return sorted(entries, key=self.eviction_key)
+
+
+class LRUEvictionPolicy(EvictionPolicy):
+    """最近最少使用：优先淘汰最久未访问、访问次数最少的条目。"""
+
+    def eviction_key(self, entry: ContextEntry) -> tuple[float, ...]:
+        last_used = entry.last_accessed or entry.timestamp
+        return (last_used, float(entry.access_count))
+
+
+class ScoreEvictionPolicy(EvictionPolicy):
+    """按综合分数淘汰：优先淘汰 ``compute_score`` 最低的条目。"""
+
+    def eviction_key(self, entry: ContextEntry) -> tuple[float, ...]:
+        return (entry.compute_score(), entry.timestamp)
+
+
+def estimate_entry_bytes(entry: ContextEntry) -> int:
+    """估算条目内容（含摘要）占用的字节数。
+
+    Args:
+        entry: 上下文条目。
+
+    Returns:
+        int: UTF-8 编码下的估算字节数。
+    """
+
+    size = len(entry.content_text().encode("utf-8"))
+    if entry.summary:
+        size += len(entry.summary.encode("utf-8"))
+    return size
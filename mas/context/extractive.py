@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+_CODE_BLOCK_RE = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+_SENTENCE_END_RE = re.compile(r"[。！？!?；;]+|\.(?=\s|$)|\n+")
+_WORD_RE = re.compile("[a-z0-9_]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_CJK_RE = re.compile("[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+
+def tokenize(text: str) -> list[str]:
+    """将文本切分为检索/打分用的词项。
+
+    英文与数字按单词切分，中日韩文字按字二元组（bigram）切分，单字片段保留为一元。
+
+    Args:
+        text: 原始文本。
+
+    Returns:
+        list[str]: 词项列表。
+    """
+
+    tokens: list[str] = []
+    for match in _WORD_RE.finditer(text.lower()):
+        chunk = match.group()
+        if not _CJK_RE.match(chunk) or len(chunk) == 1:
+            tokens.append(chunk)
+        else:
+            tokens.extend(chunk[index : index + 2] for index in range(len(chunk) - 1))
+    return tokens
+
+
+@dataclass(frozen=True)
+class TextUnit:
+    """抽取的最小单位：一个句子或一个完整的代码块。"""
+
+    start: int
+    end: int
+    text: str
+    is_code: bool = False
+
+
+class ExtractiveSummarizer:
+    """本地抽取式摘要器。
+
+    按句子（识别 ``。``/``.``/换行等边界）切分文本，代码块作为不可拆分的整体；
+    用 TF-IDF 计算每个单元对全文的代表性，并对首句与末句（通常是结论）加权，
+    在字符预算内按得分贪心选取（跳过与已选单元高度重复的单元），最后按原文顺序
+    拼接。
+    """
+
+    LEAD_BONUS = 1.2
+    TAIL_BONUS = 1.3
+    CODE_BONUS = 1.1
+    REDUNDANCY_THRESHOLD = 0.8
+
+    def split_units(self, text: str) -> list[TextUnit]:
+        """将文本切分为句子与代码块单元。
+
+        Args:
+            text: 原始文本。
+
+        Returns:
+            list[TextUnit]: 按原文顺序排列的单元。
+        """
+
+        units: list[TextUnit] = []
+        cursor = 0
+        for match in _CODE_BLOCK_RE.finditer(text):
+            units.extend(self._split_sentences(text, cursor, match.start()))
+            units.append(TextUnit(match.start(), match.end(), match.group(), True))
+            cursor = match.end()
+        units.extend(self._split_sentences(text, cursor, len(text)))
+        return units
+
+    def summarize(self, text: str, max_length: int) -> str | None:
+        """在字符预算内抽取最具代表性的句子。
+
+        Args:
+            text: 待压缩文本。
+            max_length: 摘要允许的最大字符数。
+
+        Returns:
+            str | None: 抽取结果；没有任何单元能放入预算时返回 None。
+        """
+
+        if len(text) <= max_length:
+            return text
+
+        units = self.split_units(text)
+        if not units:
+            return None
+
+        unit_tokens = [set(tokenize(unit.text)) for unit in units]
+        scores = self._score_units(units)
+        ranked = sorted(range(len(units)), key=lambda index: scores[index], reverse=True)
+
+        chosen: list[int] = []
+        used = 0
+        for index in ranked:
+            cost = len(units[index].text) + (1 if chosen else 0)
+            if used + cost > max_length:
+                continue
+            if any(
+                self._is_redundant(unit_tokens[index], unit_tokens[other])
+                for other in chosen
+            ):
+                continue
+            chosen.append(index)
+            used += cost
+
+        if not chosen:
+            return None
+
+        chosen.sort()
+        parts = [units[chosen[0]].text]
+        for previous_index, index in zip(chosen[:-1], chosen[1:], strict=True):
+            parts.append(self._separator(text, units, previous_index, index))
+            parts.append(units[index].text)
+        return "".join(parts)
+
+    @staticmethod
+    def _separator(
+        text: str, units: list[TextUnit], previous_index: int, index: int
+    ) -> str:
+        """相邻单元保留原有空白（最多一个字符），不相邻单元之间换行。"""
+
+        if index != previous_index + 1:
+            return "\n"
+        gap = text[units[previous_index].end : units[index].start]
+        if not gap:
+            return ""
+        return "\n" if "\n" in gap else " "
+
+    @classmethod
+    def _is_redundant(cls, tokens: set[str], other: set[str]) -> bool:
+        if not tokens or not other:
+            return False
+        overlap = len(tokens & other) / len(tokens | other)
+        return overlap >= cls.REDUNDANCY_THRESHOLD
+
+    def _split_sentences(self, text: str, start: int, end: int) -> list[TextUnit]:
+        units: list[TextUnit] = []
+        cursor = start
+        for match in _SENTENCE_END_RE.finditer(text, start, end):
+            boundary = match.end() if match.group()[0] != "\n" else match.start()
+            units.extend(self._make_unit(text, cursor, boundary))
+            cursor = match.end()
+        units.extend(self._make_unit(text, cursor, end))
+        return units
+
+    @staticmethod
+    def _make_unit(text: str, start: int, end: int) -> list[TextUnit]:
+        segment = text[start:end]
+        stripped = segment.strip()
+        if not stripped:
+            return []
+        offset = start + segment.index(stripped)
+        return [TextUnit(offset, offset + len(stripped), stripped)]
+
+    def _score_units(self, units: list[TextUnit]) -> list[float]:
+        unit_tokens = [tokenize(unit.text) for unit in units]
+        document_frequency: Counter[str] = Counter()
+        term_frequency: Counter[str] = Counter()
+        for tokens in unit_tokens:
+            document_frequency.update(set(tokens))
+            term_frequency.update(tokens)
+
+        total_units = len(units)
+        weights = {
+            term: (1.0 + math.log(count))
+            * math.log(1.0 + total_units / document_frequency[term])
+            for term, count in term_frequency.items()
+        }
+
+        scores: list[float] = []
+        for index, tokens in enumerate(unit_tokens):
+            unique = set(tokens)
+            score = (
+                sum(weights[term] for term in unique) / math.sqrt(len(unique))
+                if unique
+                else 0.0
+            )
+            if index == 0:
+                score *= self.LEAD_BONUS
+            if index == total_units - 1:
+                score *= self.TAIL_BONUS
+            if units[index].is_code:
+                score *= self.CODE_BONUS
+            scores.append(score)
+        return scores
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from enum import Enum
+
+
+class DemotionPolicy(str, Enum):
+    """任务输出不再被任何待执行任务需要时的处理方式。"""
+
+    KEEP = "keep"
+    COMPRESS = "compress"
+    SPILL = "spill"
+    DROP = "drop"
+
+
+class ConsumerTracker:
+    """按任务 DAG 维护每个生产任务尚未执行的消费者（引用计数）。
+
+    只有登记过至少一个消费者的生产任务才会在消费者全部释放后被回收；没有下游
+    的叶子任务输出视为工作流的最终产物，始终保留。
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, set[str]] = {}
+        self._consumes: dict[str, set[str]] = {}
+
+    def register(self, dependencies: Mapping[str, Iterable[str]]) -> None:
+        """登记任务依赖关系。
+
+        Args:
+            dependencies: 任务 ID 到其依赖任务 ID 列表的映射。
+        """
+
+        for consumer_id, producer_ids in dependencies.items():
+            producers = set(producer_ids)
+            self._consumes.setdefault(consumer_id, set()).update(producers)
+            for producer_id in producers:
+                self._pending.setdefault(producer_id, set()).add(consumer_id)
+
+    def release(self, consumer_id: str) -> list[str]:
+        """标记消费者已执行完毕。
+
+        Args:
+            consumer_id: 已完成（或已失败）的任务 ID。
+
+        Returns:
+            list[str]: 因此不再有待执行消费者的生产任务 ID。
+        """
+
+        released: list[str] = []
+        for producer_id in self._consumes.pop(consumer_id, ()):
+            consumers = self._pending.get(producer_id)
+            if consumers is None:
+                continue
+            consumers.discard(consumer_id)
+            if not consumers:
+                del self._pending[producer_id]
+                released.append(producer_id)
+        return released
+
+    def pending_consumers(self, producer_id: str) -> frozenset[str]:
+        """获取生产任务尚未执行的消费者。"""
+
+        return frozenset(self._pending.get(producer_id, ()))
+
+    def dependencies_of(self, consumer_id: str) -> frozenset[str]:
+        """获取尚未执行的消费者所依赖的生产任务。"""
+
+        return frozenset(self._consumes.get(consumer_id, ()))
+
+    def copy(self) -> ConsumerTracker:
+        """复制当前登记，副本与本追踪器互不影响。"""
+
+        tracker = ConsumerTracker()
+        tracker._pending = {producer: set(consumers) for producer, consumers in self._pending.items()}
+        tracker._consumes = {consumer: set(producers) for consumer, producers in self._consumes.items()}
+        return tracker
+
+    def clear(self) -> None:
+        """清空所有登记。"""
+
+        self._pending.clear()
+        self._consumes.clear()
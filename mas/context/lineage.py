@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+
+LocalCompressor = Callable[[str, int], str]
+
+
+class RollingSummary:
+    """沿依赖 DAG 维护每个任务的祖先累积摘要。
+
+    每个任务完成时记录自身输出的简短摘要，并由其直接依赖的累积摘要增量合并出
+    “祖先摘要”。累积结果始终被压缩在 ``max_chars`` 以内，因此无论工作流多深，
+    下游任务拿到的祖先信息都是固定开销。
+    """
+
+    DEFAULT_MAX_CHARS = 1500
+    DIGEST_CHARS = 300
+    MIN_DIGEST_CHARS = 60
+
+    def __init__(
+        self,
+        compress: LocalCompressor,
+        max_chars: int = DEFAULT_MAX_CHARS,
+    ) -> None:
+        """初始化滚动摘要。
+
+        Args:
+            compress: 本地压缩函数 ``(text, max_length) -> str``。
+            max_chars: 单条祖先摘要的最大字符数。
+        """
+
+        self._compress = compress
+        self.max_chars = max_chars
+        self._digests: dict[str, str] = {}
+        self._ancestry: dict[str, dict[str, str]] = {}
+        self.parent: RollingSummary | None = None
+
+    def record(self, task_id: str, output: str, dependency_ids: Iterable[str]) -> None:
+        """记录任务输出并更新其祖先摘要。
+
+        Args:
+            task_id: 已完成的任务 ID。
+            output: 任务输出。
+            dependency_ids: 该任务的直接依赖。
+        """
+
+        merged: dict[str, str] = {}
+        for dependency_id in dependency_ids:
+            merged.update(self._ancestry_of(dependency_id))
+            digest = self._digest_of(dependency_id)
+            if digest is not None:
+                merged[dependency_id] = digest
+
+        self._ancestry[task_id] = self._fit(merged)
+        self._digests[task_id] = self._compress(output.strip(), self.DIGEST_CHARS)
+
+    def ancestry_for(self, dependency_ids: Iterable[str]) -> dict[str, str]:
+        """获取一组直接依赖之上的祖先摘要（不含这些依赖本身）。
+
+        Args:
+            dependency_ids: 目标任务的直接依赖。
+
+        Returns:
+            dict[str, str]: 按拓扑顺序排列的 {祖先任务 ID: 摘要}。
+        """
+
+        direct = list(dict.fromkeys(dependency_ids))
+        merged: dict[str, str] = {}
+        for dependency_id in direct:
+            merged.update(self._ancestry_of(dependency_id))
+        for dependency_id in direct:
+            merged.pop(dependency_id, None)
+        return self._fit(merged)
+
+    def format(self, ancestry: dict[str, str]) -> str:
+        """将祖先摘要格式化为上下文片段。"""
+
+        if not ancestry:
+            return ""
+        lines = ["## 祖先任务摘要"]
+        lines.extend(f"- {task_id}: {digest}" for task_id, digest in ancestry.items())
+        return "\n".join(lines)
+
+    def forget(self, task_id: str) -> None:
+        """移除任务的滚动摘要记录（分支只移除自身的记录）。"""
+
+        self._digests.pop(task_id, None)
+        self._ancestry.pop(task_id, None)
+
+    def fork(self) -> RollingSummary:
+        """创建分支摘要：读取穿透到本摘要，新记录只写入分支，直到 ``merge``。
+
+        Returns:
+            RollingSummary: 分支摘要。
+        """
+
+        branch = RollingSummary(self._compress, max_chars=self.max_chars)
+        branch.parent = self
+        return branch
+
+    def merge(self, branch: RollingSummary) -> None:
+        """把分支记录的摘要合并回本摘要。
+
+        Args:
+            branch: 由 ``fork`` 创建的分支摘要。
+        """
+
+        self._digests.update(branch._digests)
+        self._ancestry.update(branch._ancestry)
+        branch._digests.clear()
+        branch._ancestry.clear()
+
+    def _digest_of(self, task_id: str) -> str | None:
+        digest = self._digests.get(task_id)
+        if digest is None and self.parent is not None:
+            return self.parent._digest_of(task_id)
+        return digest
+
+    def _ancestry_of(self, task_id: str) -> dict[str, str]:
+        ancestry = self._ancestry.get(task_id)
+        if ancestry is None and self.parent is not None:
+            return self.parent._ancestry_of(task_id)
+        return ancestry or {}
+
+    def _fit(self, ancestry: dict[str, str]) -> dict[str, str]:
+        """将祖先摘要压缩到字符预算内：先均分压缩，仍超出则丢弃最早的祖先。"""
+
+        if self._size(ancestry) <= self.max_chars:
+            return ancestry
+
+        allowance = max(self.MIN_DIGEST_CHARS, self.max_chars // len(ancestry))
+        fitted = {
+            task_id: digest
+            if len(digest) <= allowance
+            else self._compress(digest, allowance)
+            for task_id, digest in ancestry.items()
+        }
+        while len(fitted) > 1 and self._size(fitted) > self.max_chars:
+            fitted.pop(next(iter(fitted)))
+        return fitted
+
+    @staticmethod
+    def _size(ancestry: dict[str, str]) -> int:
+        return sum(len(task_id) + len(digest) + 4 for task_id, digest in ancestry.items())
@@ -1,11 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import copy
 import json
+import math
+import tempfile
 import time
 import uuid
+import weakref
+from collections import ChainMap, OrderedDict
+from collections.abc import Iterable, Mapping, MutableMapping
+from dataclasses import replace
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+from .backend import ContextBackend, SQLiteBackend
 from .compression import ContextCompressor
+from .dedup import DEFAULT_MAX_DISTANCE, deduplicate
+from .eviction import EvictionPolicy, LayerLimits, estimate_entry_bytes
+from .gc import ConsumerTracker, DemotionPolicy
+from .lineage import RollingSummary
 from .scorer import ContextScorer
 from .store import ContextStore
 from .types import ContextEntry, ContextLayer, ContextType
@@ -13,6 +28,11 @@ from .window import ContextWindow
 
 if TYPE_CHECKING:
     from ..llm.client import LLMClient
+    from ..logging.spans import SpanTracer
+
+ContextCacheKey = tuple[str, frozenset[str], int, int, str | None]
+BlockSignature = tuple[int | None, str, bool]
+PendingCompression = tuple[asyncio.Task[None], int]
 
 
 class ContextManager:
@@ -21,11 +41,29 @@ class ContextManager:
     提供上下文的添加、检索、压缩和格式化功能。
     """
 
+    RETRIEVAL_MAX_RELEVANCE = 0.85
+    BLOCK_CACHE_SIZE = 1024
+
     def __init__(
         self,
         session_id: str,
         llm_client: LLMClient | None = None,
         max_tokens: int = 8000,
+        layer_limits: dict[ContextLayer, LayerLimits] | None = None,
+        eviction_policy: EvictionPolicy | None = None,
+        backend: ContextBackend | None = None,
+        background_compression: bool = True,
+        max_concurrent_compressions: int = 4,
+        compression_deadline: float = 0.5,
+        ancestry_max_chars: int = RollingSummary.DEFAULT_MAX_CHARS,
+        retrieval_top_k: int | None = None,
+        dedup_max_distance: int | None = DEFAULT_MAX_DISTANCE,
+        gc_policy: DemotionPolicy = DemotionPolicy.KEEP,
+        spill_backend: ContextBackend | None = None,
+        pack_threshold: int | None = None,
+        cold_after: float | None = None,
+        context_cache_size: int = 128,
+        tracer: SpanTracer | None = None,
     ) -> None:
         """初始化上下文管理器。
 
@@ -33,13 +71,63 @@ class ContextManager:
             session_id: 会话唯一标识符。
             llm_client: LLM 客户端（用于摘要压缩）。
             max_tokens: 上下文窗口的最大 token 数。
+            layer_limits: 各层容量限制，默认不限制。
+            eviction_policy: 超出容量时的淘汰策略，默认 LRU。
+            backend: 上下文存储后端，默认内存存储。
+            background_compression: 是否在后台异步压缩大条目（不阻塞任务完成）。
+            max_concurrent_compressions: 后台压缩的最大并发数。
+            compression_deadline: 构建上下文时等待未完成压缩的最长秒数，
+                超时后对该条目使用智能截断。
+            ancestry_max_chars: 祖先累积摘要的最大字符数。
+            retrieval_top_k: 启用本地检索索引时，按任务目标检索的条目数；
+                None 表示不启用。
+            dedup_max_distance: 视为近重复的最大 SimHash 汉明距离；None 表示不去重。
+            gc_policy: 任务输出的所有消费者执行完毕后的降级策略，默认保留。
+            spill_backend: ``SPILL`` 策略使用的溢出后端，默认在临时目录创建
+                SQLite 文件。
+            pack_threshold: 内容字符数达到该值的条目以 zlib 压缩驻留；None 表示不按大小压缩。
+            cold_after: 超过该秒数未访问的条目以 zlib 压缩驻留；None 表示不按冷热压缩。
+            context_cache_size: 缓存的已组装上下文字符串数量，0 表示不缓存。
+            tracer: 可选的 span 追踪器，用于记录压缩、摘要 LLM 调用及等待压缩的耗时。
         """
 
         self.session_id = session_id
-        self.store = ContextStore(session_id)
+        self.store = ContextStore(
+            session_id,
+            limits=layer_limits,
+            eviction_policy=eviction_policy,
+            backend=backend,
+            retrieval_index=retrieval_top_k is not None,
+            pack_threshold=pack_threshold,
+            cold_after=cold_after,
+        )
+        self.retrieval_top_k = retrieval_top_k
+        self.dedup_max_distance = dedup_max_distance
         self.scorer = ContextScorer()
-        self.window = ContextWindow(max_tokens=max_tokens)
-        self.compressor = ContextCompressor(llm_client)
+        self.window = ContextWindow(
+            max_tokens=max_tokens, model=getattr(llm_client, "model", None)
+        )
+        self.compressor = ContextCompressor(llm_client, tracer=tracer)
+        self.background_compression = background_compression
+        self.compression_deadline = compression_deadline
+        self._compression_semaphore = asyncio.Semaphore(max(1, max_concurrent_compressions))
+        # 条目 ID -> (后台压缩任务, 目标长度)
+        self._pending_compressions: MutableMapping[str, PendingCompression] = {}
+        self.rolling_summary = RollingSummary(
+            self.compressor.compress_local, max_chars=ancestry_max_chars
+        )
+        self.consumers = ConsumerTracker()
+        self.gc_policy = gc_policy
+        self._spill_backend = spill_backend
+        self._spill_cleanup: weakref.finalize[..., ContextManager] | None = None
+        self._gc_counts = {"compressed": 0, "spilled": 0, "dropped": 0, "recalled": 0}
+        self._produced_tokens: MutableMapping[str, int] = {}
+        self.context_cache_size = context_cache_size
+        self.tracer = tracer
+        self._context_cache: OrderedDict[ContextCacheKey, tuple[str, float]] = OrderedDict()
+        self._context_cache_hits = 0
+        self._context_cache_misses = 0
+        self._block_cache: OrderedDict[str, tuple[BlockSignature, str]] = OrderedDict()
 
     async def add_task_output(
         self,
@@ -47,23 +135,27 @@ class ContextManager:
         output: str,
         agent_name: str,
         dependent_task_ids: list[str] | None = None,
+        dependency_ids: list[str] | None = None,
     ) -> str:
         """添加任务输出到上下文。
 
-        如果输出超过压缩阈值，自动进行压缩。
+        已登记下游消费者时，只在输出会挤爆消费者的 token 窗口时压缩，并且只压缩到
+        放得下的长度；否则输出超过固定压缩阈值时自动压缩。启用后台压缩时，原始条目
+        会立即写入，摘要在后台生成后替换进条目。同时增量更新该任务的祖先累积摘要。
 
         Args:
             task_id: 任务 ID。
             output: 任务输出内容。
             agent_name: 执行任务的 Agent 名称。
             dependent_task_ids: 依赖此任务的其他任务 ID。
+            dependency_ids: 此任务的直接依赖任务 ID（用于滚动摘要）。
 
         Returns:
             str: 创建的上下文条目 ID。
         """
 
         importance = self.scorer.compute_task_importance(task_id, agent_name)
-        related = list(dependent_task_ids or [])
+        related = tuple(dependent_task_ids or ())
         entry = ContextEntry(
             id=self._generate_entry_id(ContextType.DEPENDENCY_OUTPUT, task_id),
             type=ContextType.DEPENDENCY_OUTPUT,
@@ -75,10 +167,8 @@ class ContextManager:
             related_ids=related,
         )
 
-        if await self.compressor.should_compress(entry.content):
-            entry = await self.compressor.compress_entry(entry)
-
-        return self.store.add(ContextLayer.TASK, entry)
+        self.rolling_summary.record(task_id, output, dependency_ids or [])
+        return await self._store_task_entry(entry)
 
     async def add_shared_state(
         self,
@@ -113,62 +203,135 @@ class ContextManager:
         task_id: str,
         dependency_ids: list[str],
         max_tokens: int | None = None,
+        objective: str | None = None,
     ) -> str:
         """获取优化后的任务上下文字符串。
 
+        启用检索索引且提供任务目标时，非依赖条目只保留与目标最相似的 top-k 条
+        （跨所有层），其余无关条目不再进入候选。结果按
+        (任务, 依赖集合, 存储版本, 预算, 目标) 缓存，输入相同且存储未变化时
+        （如重试、对冲请求）直接返回缓存的字符串。
+
         Args:
             task_id: 当前任务 ID。
             dependency_ids: 依赖任务 ID 列表。
             max_tokens: 最大 token 数限制。
+            objective: 当前任务目标，用于相似度检索。
 
         Returns:
             str: 格式化的上下文字符串。
         """
 
-        dependency_set = set(dependency_ids)
-        task_layer_entries = self.store.get_layer(ContextLayer.TASK).values()
-        dependency_entries: list[ContextEntry] = []
-        for entry in task_layer_entries:
-            if self._is_dependency_entry(entry, dependency_set):
-                dependency_entries.append(entry)
+        budget = max_tokens or self.window.max_tokens
+        version = self.store.version
+        cache_key = (task_id, frozenset(dependency_ids), version, budget, objective)
+        cached = self._context_cache.get(cache_key)
+        if cached is not None and cached[1] > time.time():
+            self._context_cache.move_to_end(cache_key)
+            self._context_cache_hits += 1
+            return cached[0]
+
+        self._context_cache_misses += 1
+        context_text, valid_until = await self._build_context(
+            task_id, dependency_ids, budget, objective
+        )
+        if valid_until is not None and self.store.version == version:
+            self._context_cache[cache_key] = (context_text, valid_until)
+            while len(self._context_cache) > self.context_cache_size:
+                self._context_cache.popitem(last=False)
+        return context_text
 
-        shared_entries = list(self.store.get_layer(ContextLayer.WORKFLOW).values())
-        candidates = dependency_entries + shared_entries
+    async def _build_context(
+        self,
+        task_id: str,
+        dependency_ids: list[str],
+        budget: int,
+        objective: str | None,
+    ) -> tuple[str, float | None]:
+        """构建上下文字符串，并返回结果可缓存到的时间点（不可缓存时为 None）。"""
+
+        dependency_entries = self.store.get_task_entries(dependency_ids)
+        if self._spill_backend is not None:
+            found = {entry.source for entry in dependency_entries}
+            dependency_entries.extend(self._recall_spilled(set(dependency_ids) - found))
+
+        similarity: dict[str, float] = {}
+        if objective and self.retrieval_top_k is not None:
+            other_entries, similarity = self._retrieve_similar(
+                objective, {entry.id for entry in dependency_entries}
+            )
+        else:
+            other_entries = list(self.store.get_layer(ContextLayer.WORKFLOW).values())
+        candidates = dependency_entries + other_entries
+        ancestry = self.rolling_summary.format(
+            self.rolling_summary.ancestry_for(dependency_ids)
+        )
         if not candidates:
-            return self._format_context([], task_id)
+            return self._format_context([], task_id, ancestry), math.inf
 
-        ranked = self.scorer.rank_entries(candidates, target_task_id=task_id)
-        selected = self.window.select(ranked, max_tokens=max_tokens)
-        return self._format_context(selected, task_id)
+        settled = await self._settle_pending_compressions(candidates)
+        truncated = any(
+            settled_entry is not entry
+            for settled_entry, entry in zip(settled, candidates, strict=True)
+        )
+        valid_until = min(
+            (entry.timestamp + entry.ttl for entry in candidates if entry.ttl is not None),
+            default=math.inf,
+        )
+
+        if ancestry:
+            budget = max(budget - self.window.count_tokens(ancestry), 0)
+        ranked = self.scorer.rank_entries(
+            settled,
+            target_task_id=task_id,
+            similarity=similarity,
+            dependency_ids=dependency_ids,
+        )
+        if self.dedup_max_distance is not None:
+            ranked = deduplicate(
+                ranked, self.store.fingerprints(), self.dedup_max_distance
+            )
+        selected = self.window.select(ranked, max_tokens=budget)
+        context_text = self._format_context(selected, task_id, ancestry, dependency_ids)
+        return context_text, None if truncated else valid_until
 
     def _format_context(
         self,
         entries: list[ContextEntry],
         current_task_id: str,
+        ancestry: str = "",
+        dependency_ids: Iterable[str] = (),
     ) -> str:
         """格式化上下文条目为结构化字符串。
 
+        只有来自直接依赖的任务输出与错误列在“前置任务的输出”下；检索到的其他
+        任务输出归入“其他上下文”。
+
         Args:
             entries: 选中的上下文条目。
             current_task_id: 当前任务 ID。
+            ancestry: 已格式化的祖先累积摘要。
+            dependency_ids: 当前任务的直接依赖。
 
         Returns:
             str: 格式化的上下文字符串。
         """
 
-        if not entries:
+        if not entries and not ancestry:
             return f"## 上下文\n- 任务 {current_task_id} 暂无可用上下文。"
 
         dependency_sections: list[str] = []
         shared_sections: list[str] = []
         other_sections: list[str] = []
+        dependencies = set(dependency_ids)
 
         for entry in entries:
-            formatted_content = self._stringify(entry)
-            header = f"- 来源 {entry.source} | 重要性 {entry.importance:.2f}\n{formatted_content}"
+            header = self._format_block(entry)
             if entry.type == ContextType.SHARED_STATE:
                 shared_sections.append(header)
-            elif entry.type == ContextType.DEPENDENCY_OUTPUT or entry.type == ContextType.ERROR_CONTEXT:
+            elif entry.type in (ContextType.DEPENDENCY_OUTPUT, ContextType.ERROR_CONTEXT) and (
+                entry.source in dependencies or entry.parent_id in dependencies
+            ):
                 dependency_sections.append(header)
             else:
                 other_sections.append(header)
@@ -177,6 +340,8 @@ class ContextManager:
         if dependency_sections:
             parts.append("## 前置任务的输出")
             parts.extend(dependency_sections)
+        if ancestry:
+            parts.append(ancestry)
         if shared_sections:
             parts.append("## 共享状态")
             parts.extend(shared_sections)
@@ -186,6 +351,24 @@ class ContextManager:
 
         return "\n".join(parts)
 
+    def _format_block(self, entry: ContextEntry) -> str:
+        """格式化单个条目，按 (条目版本, 重要性, 是否压缩) 缓存结果。"""
+
+        importance = f"{entry.importance:.2f}"
+        revision = self.store.revision(entry.id)
+        signature = (revision, importance, entry.is_compressed)
+        cached = self._block_cache.get(entry.id)
+        if cached is not None and cached[0] == signature:
+            self._block_cache.move_to_end(entry.id)
+            return cached[1]
+
+        block = f"- 来源 {entry.source} | 重要性 {importance}\n{self._stringify(entry)}"
+        if revision is not None:
+            self._block_cache[entry.id] = (signature, block)
+            while len(self._block_cache) > self.BLOCK_CACHE_SIZE:
+                self._block_cache.popitem(last=False)
+        return block
+
     async def add_error_context(
         self,
         task_id: str,
@@ -214,10 +397,319 @@ class ContextManager:
             parent_id=task_id,
         )
 
-        if await self.compressor.should_compress(entry.content):
-            entry = await self.compressor.compress_entry(entry)
+        return await self._store_task_entry(entry)
 
-        return self.store.add(ContextLayer.TASK, entry)
+    def _retrieve_similar(
+        self, objective: str, exclude_ids: set[str]
+    ) -> tuple[list[ContextEntry], dict[str, float]]:
+        """按任务目标检索相似条目，返回条目及归一化相似度。"""
+
+        hits = self.store.search(
+            objective, top_k=(self.retrieval_top_k or 0) + len(exclude_ids)
+        )
+        hits = [(entry, score) for entry, score in hits if entry.id not in exclude_ids]
+        hits = hits[: self.retrieval_top_k]
+        if not hits:
+            return [], {}
+
+        best = hits[0][1] or 1.0
+        similarity = {
+            entry.id: self.RETRIEVAL_MAX_RELEVANCE * score / best for entry, score in hits
+        }
+        return [entry for entry, _ in hits], similarity
+
+    def fork(self) -> ContextManager:
+        """为并行分支创建共享只读视图的上下文管理器。
+
+        分支使用写时复制的子存储：可读取当前所有上下文，但写入在 ``merge`` 前
+        对本管理器及其他分支不可见。滚动摘要、消费者登记、产出 token 与回收计数
+        同样按分支隔离；分支构建上下文时仍会等待本管理器未完成的后台压缩。评分器、
+        窗口、压缩器与摘要缓存与本管理器共享。
+
+        Returns:
+            ContextManager: 分支上下文管理器。
+        """
+
+        branch = copy.copy(self)
+        branch.store = self.store.fork()
+        branch.rolling_summary = self.rolling_summary.fork()
+        branch.consumers = self.consumers.copy()
+        branch._produced_tokens = ChainMap({}, self._produced_tokens)
+        branch._gc_counts = dict.fromkeys(self._gc_counts, 0)
+        branch._pending_compressions = ChainMap({}, self._pending_compressions)
+        branch._context_cache = OrderedDict()
+        branch._context_cache_hits = 0
+        branch._context_cache_misses = 0
+        branch._block_cache = OrderedDict()
+        return branch
+
+    async def merge(self, branch: ContextManager) -> int:
+        """将分支的上下文、滚动摘要与统计合并回本管理器。
+
+        不等待分支的后台压缩：未完成的压缩转交给本管理器跟踪，完成后直接更新
+        本管理器的存储。合并后的分支不应再使用。
+
+        Args:
+            branch: 由 ``fork`` 创建的分支管理器。
+
+        Returns:
+            int: 合并的写入与删除条数。
+        """
+
+        self.rolling_summary.merge(branch.rolling_summary)
+        if isinstance(branch._produced_tokens, ChainMap):
+            self._produced_tokens.update(branch._produced_tokens.maps[0])
+            branch._produced_tokens.maps[0].clear()
+        for action, count in branch._gc_counts.items():
+            self._gc_counts[action] += count
+        branch._gc_counts = dict.fromkeys(branch._gc_counts, 0)
+        merged = self.store.merge(branch.store)
+
+        branch.store = self.store
+        pending = branch._pending_compressions
+        if isinstance(pending, ChainMap):
+            pending = pending.maps[0]
+        for entry_id, (task, max_length) in pending.items():
+            if not task.done():
+                self._track_compression(entry_id, task, max_length)
+        branch._pending_compressions = {}
+        return merged
+
+    def track_consumers(self, dependencies: Mapping[str, Iterable[str]]) -> None:
+        """登记工作流 DAG，用于按引用计数回收任务输出。
+
+        Args:
+            dependencies: 任务 ID 到其依赖任务 ID 列表的映射。
+        """
+
+        self.consumers.register(dependencies)
+
+    async def release_consumer(self, task_id: str) -> int:
+        """标记任务已执行完毕，并按 ``gc_policy`` 降级不再被需要的任务输出。
+
+        Args:
+            task_id: 已完成（或已失败）的任务 ID。
+
+        Returns:
+            int: 被降级的条目数。
+        """
+
+        released = set(self.consumers.release(task_id))
+        for producer_id in released:
+            self._produced_tokens.pop(producer_id, None)
+        if not released or self.gc_policy == DemotionPolicy.KEEP:
+            return 0
+
+        victims = [
+            entry
+            for entry in self.store.get_task_entries(released)
+            if entry.source in released or entry.parent_id in released
+        ]
+        for entry in victims:
+            await self._demote(entry)
+        return len(victims)
+
+    async def _demote(self, entry: ContextEntry) -> None:
+        if self.gc_policy == DemotionPolicy.COMPRESS:
+            if not entry.is_compressed and entry.id not in self._pending_compressions:
+                self._schedule_compression(
+                    entry, self.compressor.DEFAULT_SUMMARY_LENGTH, demoted=True
+                )
+            return
+
+        if self.gc_policy == DemotionPolicy.SPILL:
+            self._get_spill_backend().put(
+                ContextLayer.TASK, entry.id, entry, estimate_entry_bytes(entry)
+            )
+            self._gc_counts["spilled"] += 1
+        else:
+            self._gc_counts["dropped"] += 1
+        self.store.remove(entry.id)
+
+    def _recall_spilled(self, task_ids: set[str]) -> list[ContextEntry]:
+        """把依赖任务已溢出到磁盘的输出取回任务层。"""
+
+        if self._spill_backend is None:
+            return []
+
+        recalled: list[ContextEntry] = []
+        for task_id in task_ids:
+            for entry in self._spill_backend.find_for_task(task_id):
+                if entry.source != task_id and entry.parent_id != task_id:
+                    continue
+                self._spill_backend.delete(entry.id)
+                self.store.add(ContextLayer.TASK, entry)
+                recalled.append(entry)
+        self._gc_counts["recalled"] += len(recalled)
+        return recalled
+
+    def _get_spill_backend(self) -> ContextBackend:
+        if self._spill_backend is None:
+            path = Path(tempfile.gettempdir()) / "mas" / f"spill-{self.session_id}.sqlite3"
+            backend = SQLiteBackend(path, self.session_id)
+            self._spill_backend = backend
+            self._spill_cleanup = weakref.finalize(self, _discard_spill_file, backend, path)
+        return self._spill_backend
+
+    def close(self) -> None:
+        """取消未完成的后台压缩，关闭存储与溢出后端，并删除自动创建的溢出文件。"""
+
+        for task, _ in self._pending_compressions.values():
+            task.cancel()
+        self._pending_compressions.clear()
+        self.store.close()
+        if self._spill_cleanup is not None:
+            self._spill_cleanup()
+            self._spill_cleanup = None
+            self._spill_backend = None
+        elif self._spill_backend is not None:
+            self._spill_backend.close()
+
+    async def wait_for_compressions(self) -> None:
+        """等待所有后台压缩任务完成。"""
+
+        pending = [task for task, _ in self._pending_compressions.values()]
+        if pending:
+            with self._span("context.compress_wait"):
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _store_task_entry(self, entry: ContextEntry) -> str:
+        max_length = await self._compression_length(entry)
+        if max_length is None:
+            return self.store.add(ContextLayer.TASK, entry)
+
+        if not self.background_compression:
+            with self._span("context.compress", task_id=entry.source, max_length=max_length):
+                entry = await self.compressor.compress_entry(entry, max_length)
+            return self.store.add(ContextLayer.TASK, entry)
+
+        entry_id = self.store.add(ContextLayer.TASK, entry)
+        self._schedule_compression(entry, max_length)
+        return entry_id
+
+    async def _compression_length(self, entry: ContextEntry) -> int | None:
+        """决定条目是否需要压缩，以及压缩到的字符长度。
+
+        已登记消费者时按消费者窗口的超额程度计算目标长度，能放入预算的条目不压缩；
+        消费者未知时退回固定的字符阈值。
+        """
+
+        token_share = self._token_share(entry.source)
+        if token_share is None:
+            if not await self.compressor.should_compress(entry.content):
+                return None
+            return self.compressor.DEFAULT_SUMMARY_LENGTH
+
+        text = entry.content_text()
+        tokens = self.window.count_tokens(text)
+        max_length = self.compressor.target_length(text, tokens, token_share)
+        effective = tokens if max_length is None else min(tokens, token_share)
+        self._produced_tokens[entry.source] = (
+            self._produced_tokens.get(entry.source, 0) + effective
+        )
+        return max_length
+
+    def _token_share(self, producer_id: str) -> int | None:
+        """生产任务的输出在各消费者窗口中可占用的最小 token 份额。
+
+        每个消费者的窗口预算先扣除已产出的兄弟依赖所占 token，余量在尚未产出的
+        依赖（含本任务）间平分；消费者未知时返回 None。
+        """
+
+        consumers = self.consumers.pending_consumers(producer_id)
+        if not consumers:
+            return None
+
+        share: int | None = None
+        for consumer_id in consumers:
+            used = 0
+            outstanding = 0
+            for dependency_id in self.consumers.dependencies_of(consumer_id):
+                produced = self._produced_tokens.get(dependency_id)
+                if dependency_id == producer_id or produced is None:
+                    outstanding += 1
+                else:
+                    used += produced
+            consumer_share = max(self.window.max_tokens - used, 0) // max(outstanding, 1)
+            share = consumer_share if share is None else min(share, consumer_share)
+        return share
+
+    def _schedule_compression(
+        self, entry: ContextEntry, max_length: int, demoted: bool = False
+    ) -> None:
+        """在后台压缩条目，受并发上限约束，构建上下文时最多等待 ``compression_deadline``。"""
+
+        task = asyncio.create_task(self._compress_in_background(entry, max_length, demoted))
+        self._track_compression(entry.id, task, max_length)
+
+    def _track_compression(
+        self, entry_id: str, task: asyncio.Task[None], max_length: int
+    ) -> None:
+        self._pending_compressions[entry_id] = (task, max_length)
+        task.add_done_callback(
+            lambda _task: self._pending_compressions.pop(entry_id, None)
+        )
+
+    async def _compress_in_background(
+        self, entry: ContextEntry, max_length: int, demoted: bool = False
+    ) -> None:
+        async with self._compression_semaphore:
+            try:
+                with self._span("context.compress", task_id=entry.source, max_length=max_length):
+                    compressed = await self.compressor.compress_entry(entry, max_length)
+            except Exception:
+                return
+
+        updated = self.store.update(
+            entry.id,
+            is_compressed=True,
+            original_length=compressed.original_length,
+            summary=compressed.summary,
+        )
+        if updated and demoted:
+            self._gc_counts["compressed"] += 1
+
+    def _span(self, name: str, **attributes: object) -> contextlib.AbstractContextManager[object]:
+        if self.tracer is None:
+            return contextlib.nullcontext()
+        return self.tracer.span(name, **attributes)
+
+    async def _settle_pending_compressions(
+        self, entries: list[ContextEntry]
+    ) -> list[ContextEntry]:
+        """等待候选条目的后台压缩，超时则按压缩时的目标长度以智能截断的副本代替。"""
+
+        pending = {
+            entry.id: self._pending_compressions[entry.id]
+            for entry in entries
+            if entry.id in self._pending_compressions
+        }
+        if not pending:
+            return entries
+
+        with self._span("context.compress_wait"):
+            await asyncio.wait(
+                [task for task, _ in pending.values()], timeout=self.compression_deadline
+            )
+
+        settled: list[ContextEntry] = []
+        for entry in entries:
+            scheduled = pending.get(entry.id)
+            if scheduled is None or scheduled[0].done() or entry.is_compressed:
+                settled.append(entry)
+                continue
+
+            max_length = scheduled[1]
+            text = self._stringify(entry)
+            settled.append(
+                replace(
+                    entry,
+                    is_compressed=True,
+                    original_length=len(text),
+                    summary=self.compressor.truncate_smart(text, max_length),
+                )
+            )
+        return settled
 
     def clear_task_context(self) -> int:
         """清空任务层上下文。返回清除的条目数。"""
@@ -253,21 +745,51 @@ class ContextManager:
             "layer_counts": layer_counts,
             "total_entries": len(all_entries),
             "token_estimate": self.window.estimate_total_tokens(all_entries),
+            "eviction": self.store.get_eviction_stats(),
+            "pending_compressions": len(self._pending_compressions),
+            "summary_cache": self.compressor.cache.get_stats(),
+            "gc": {"policy": self.gc_policy.value, **self._gc_counts},
+            "packing": self.store.get_packing_stats(),
+            "context_cache": {
+                "size": len(self._context_cache),
+                "hits": self._context_cache_hits,
+                "misses": self._context_cache_misses,
+            },
+            "timestamp": time.time(),
+        }
+
+    def get_metrics(self) -> dict[str, object]:
+        """获取可低成本采集的上下文统计，供指标导出使用。
+
+        条目数与字节数直接取自后端维护的计数，不读取、不解压条目，也不估算 token。
+
+        Returns:
+            dict[str, object]: 与 ``get_stats`` 结构相同，但不含 ``token_estimate``。
+        """
+
+        layer_counts = {
+            layer.name.lower(): self.store.backend.layer_count(layer) for layer in ContextLayer
+        }
+        return {
+            "session_id": self.session_id,
+            "layer_counts": layer_counts,
+            "total_entries": sum(layer_counts.values()),
+            "eviction": self.store.get_eviction_stats(),
+            "pending_compressions": len(self._pending_compressions),
+            "summary_cache": self.compressor.cache.get_stats(),
+            "gc": {"policy": self.gc_policy.value, **self._gc_counts},
+            "packing": self.store.get_packing_stats(),
+            "context_cache": {
+                "size": len(self._context_cache),
+                "hits": self._context_cache_hits,
+                "misses": self._context_cache_misses,
+            },
             "timestamp": time.time(),
         }
 
     def _generate_entry_id(self, context_type: ContextType, identifier: str) -> str:
         return f"{context_type.value}_{identifier}_{uuid.uuid4().hex[:8]}"
 
-    def _is_dependency_entry(
-        self, entry: ContextEntry, dependency_ids: set[str]
-    ) -> bool:
-        if entry.source in dependency_ids:
-            return True
-        if entry.parent_id and entry.parent_id in dependency_ids:
-            return True
-        return bool(dependency_ids.intersection(entry.related_ids))
-
     def _stringify(self, entry: ContextEntry) -> str:
         content = entry.summary if entry.is_compressed and entry.summary else entry.content
         if isinstance(content, str):
@@ -276,3 +798,12 @@ class ContextManager:
             return json.dumps(content, ensure_ascii=False, sort_keys=True)
         except Exception:
             return str(content)
+
+
+def _discard_spill_file(backend: ContextBackend, path: Path) -> None:
+    """关闭自动创建的溢出后端并删除其 SQLite 文件（含 WAL/SHM 旁路文件）。"""
+
+    backend.close()
+    for suffix in ("", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            Path(f"{path}{suffix}").unlink()
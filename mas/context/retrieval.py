@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter
+
+from .extractive import tokenize
+
+
+class BM25Index:
+    """本地 BM25 倒排索引，用于按任务目标检索相似的上下文条目。
+
+    只遍历查询词项的倒排链表，检索代价与命中文档数相关而非与条目总数成正比；
+    完全离线，不依赖任何向量服务。
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[str, int]] = {}
+        self._doc_terms: dict[str, Counter[str]] = {}
+        self._doc_lengths: dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """索引（或重建）一条文档。"""
+
+        self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, doc_id: str) -> bool:
+        """从索引中移除文档。"""
+
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        return True
+
+    def clear(self) -> None:
+        """清空索引。"""
+
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_lengths.clear()
+        self._total_length = 0
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[str, float]]:
+        """检索与查询最相关的文档。
+
+        Args:
+            query: 查询文本（通常为任务目标）。
+            top_k: 返回的最大文档数。
+
+        Returns:
+            list[tuple[str, float]]: 按 BM25 得分降序的 (文档 ID, 得分)。
+        """
+
+        total_docs = len(self._doc_lengths)
+        if total_docs == 0 or top_k <= 0:
+            return []
+
+        average_length = self._total_length / total_docs or 1.0
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.K1 * (
+                    1 - self.B + self.B * self._doc_lengths[doc_id] / average_length
+                )
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (
+                    self.K1 + 1
+                ) / (frequency + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
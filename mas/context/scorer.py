@@ -71,13 +71,21 @@ class ContextScorer:
         return self.TYPE_WEIGHTS.get(entry.type, 0.5)
 
     def rank_entries(
-        self, entries: list[ContextEntry], target_task_id: str | None = None
+        self,
+        entries: list[ContextEntry],
+        target_task_id: str | None = None,
+        similarity: dict[str, float] | None = None,
+        dependency_ids: Iterable[str] | None = None,
     ) -> list[ContextEntry]:
         """按综合得分排序上下文条目（降序）。
 
         Args:
             entries: 待排序的上下文条目。
             target_task_id: 当前关注的任务 ID。
+            similarity: 条目 ID 到检索相似度（0.0-1.0）的映射，用于提升与任务目标
+                相似的非依赖条目的相关性。
+            dependency_ids: 目标任务的直接依赖；未提供时按条目类型推断
+                （所有 ``DEPENDENCY_OUTPUT`` 条目的来源）。
 
         Returns:
             list[ContextEntry]: 已按分数排序的上下文条目。
@@ -86,17 +94,23 @@ class ContextScorer:
         if not entries:
             return []
 
-        dependency_ids = self._collect_dependency_ids(entries)
+        dependencies = (
+            list(dependency_ids)
+            if dependency_ids is not None
+            else self._collect_dependency_ids(entries)
+        )
         for entry in entries:
             entry.importance = self._compute_entry_importance(entry)
             if target_task_id:
                 entry.relevance_score = self.compute_relevance(
-                    entry, target_task_id, dependency_ids
+                    entry, target_task_id, dependencies
                 )
             else:
                 entry.relevance_score = max(
                     entry.relevance_score, self.TYPE_WEIGHTS.get(entry.type, 0.5)
                 )
+            if similarity and entry.id in similarity:
+                entry.relevance_score = max(entry.relevance_score, similarity[entry.id])
 
         scored = sorted(
             entries,
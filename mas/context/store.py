@@ -1,20 +1,82 @@
 from __future__ import annotations
 
+import time
+from collections import ChainMap
+from collections.abc import Iterable, Mapping
+from dataclasses import replace
+from types import MappingProxyType
+
+from .backend import (
+    ContextBackend,
+    ForkedBackend,
+    InMemoryBackend,
+    ResolvedEntry,
+    StaleEntryError,
+)
+from .dedup import simhash
+from .eviction import (
+    EvictionPolicy,
+    LayerLimits,
+    LRUEvictionPolicy,
+    estimate_entry_bytes,
+)
+from .retrieval import BM25Index
 from .types import ContextEntry, ContextLayer, ContextType
 
 
 class ContextStore:
-    """分层上下文存储，按 ContextLayer 组织上下文条目。"""
-
-    def __init__(self, session_id: str):
+    """分层上下文存储，按 ContextLayer 组织上下文条目。
+
+    条目的实际存放由 ``ContextBackend`` 负责（默认内存字典，可替换为 SQLite 等持久化
+    后端）。支持基于 ``ContextEntry.ttl`` 的过期清理，以及按层的容量限制（条目数/估算
+    字节数）。过期条目在访问时惰性移除，并按 ``sweep_interval`` 周期性整体清扫；超出
+    容量时按淘汰策略移除条目。可选地维护本地 BM25 检索索引，按查询文本跨层检索
+    相似条目；插入时为每个条目计算 SimHash 指纹，供近重复去重使用。
+
+    ``fork`` 生成写时复制的子存储（用于并行分支），子存储共享父条目而不复制，
+    在汇合点通过 ``merge`` 把分支的写入与删除合并回父存储。子存储读取共享条目时
+    若需记录访问，会先复制一份，父存储中的条目不会被分支修改。
+
+    设置 ``pack_threshold``/``cold_after`` 后，超过大小阈值或长时间未访问的条目内容
+    会被 zlib 压缩驻留。经由本存储的读取接口访问时返回解压后的临时副本，驻留的条目
+    保持压缩；只有 ``update`` 修改条目时才原地解压，并在下次清扫时重新压缩。
+    """
+
+    DEFAULT_SWEEP_INTERVAL = 60.0
+    MIN_PACK_CHARS = 512
+    UPDATE_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        session_id: str,
+        limits: dict[ContextLayer, LayerLimits] | None = None,
+        eviction_policy: EvictionPolicy | None = None,
+        sweep_interval: float = DEFAULT_SWEEP_INTERVAL,
+        backend: ContextBackend | None = None,
+        retrieval_index: bool = False,
+        parent: ContextStore | None = None,
+        pack_threshold: int | None = None,
+        cold_after: float | None = None,
+    ):
         self.session_id = session_id
-        self._layers: dict[ContextLayer, dict[str, ContextEntry]] = {
-            ContextLayer.SYSTEM: {},
-            ContextLayer.WORKFLOW: {},
-            ContextLayer.TASK: {},
-            ContextLayer.AGENT: {},
-        }
-        self._index: dict[str, tuple[ContextLayer, str]] = {}  # id -> (layer, key)
+        self.parent = parent
+        self.pack_threshold = pack_threshold
+        self.cold_after = cold_after
+        self._version = 0
+        self._revisions: dict[str, int] = {}
+        self._packed_savings: dict[str, int] = {}
+        self._pack_count = 0
+        self._unpack_count = 0
+        self.backend: ContextBackend = backend or InMemoryBackend()
+        self.retrieval: BM25Index | None = BM25Index() if retrieval_index else None
+        self._fingerprints: dict[str, int | None] = {}
+        self.limits: dict[ContextLayer, LayerLimits] = dict(limits or {})
+        self.eviction_policy: EvictionPolicy = eviction_policy or LRUEvictionPolicy()
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.time()
+        self._evicted_count = 0
+        self._expired_count = 0
+        self.rebuild_indexes()
 
     def add(self, layer: ContextLayer, entry: ContextEntry, key: str | None = None) -> str:
         """添加上下文条目到指定层。
@@ -28,13 +90,20 @@ class ContextStore:
             str: 被添加条目的 ID。
         """
 
+        self._maybe_sweep()
         entry_id = entry.id
-        if entry_id in self._index:
-            self.remove(entry_id)
+        self.remove(entry_id)
 
         entry_key = key or entry_id
-        self._layers[layer][entry_key] = entry
-        self._index[entry_id] = (layer, entry_key)
+        previous = self.backend.get_by_key(layer, entry_key)
+        if previous is not None:
+            self.remove(previous.id)
+
+        self.backend.put(layer, entry_key, entry, estimate_entry_bytes(entry))
+        self._index_entry(entry)
+        self._touch(entry_id)
+        self._maybe_pack(entry, time.time())
+        self._enforce_limits(layer, protected_id=entry_id)
         return entry_id
 
     def get(self, entry_id: str) -> ContextEntry | None:
@@ -47,13 +116,17 @@ class ContextStore:
             ContextEntry | None: 匹配的条目。
         """
 
+        self._maybe_sweep()
         resolved = self._resolve_entry(entry_id)
         if resolved is None:
             return None
 
         entry, _, _ = resolved
-        entry.increment_access()
-        return entry
+        if entry.is_expired():
+            self._expire(entry_id)
+            return None
+
+        return self._readable(entry, touch=True)
 
     def get_by_key(self, layer: ContextLayer, key: str) -> ContextEntry | None:
         """通过层和键获取上下文条目。
@@ -66,12 +139,15 @@ class ContextStore:
             ContextEntry | None: 匹配的条目。
         """
 
-        entry = self._layers[layer].get(key)
+        self._maybe_sweep()
+        entry = self.backend.get_by_key(layer, key)
         if entry is None:
             return None
+        if entry.is_expired():
+            self._expire(entry.id)
+            return None
 
-        entry.increment_access()
-        return entry
+        return self._readable(entry, touch=True)
 
     def get_layer(self, layer: ContextLayer) -> dict[str, ContextEntry]:
         """获取指定层的所有条目。
@@ -83,7 +159,9 @@ class ContextStore:
             dict[str, ContextEntry]: 层内条目的浅拷贝。
         """
 
-        return dict(self._layers[layer])
+        self._maybe_sweep()
+        self._purge_expired_in(layer)
+        return {key: self._readable(entry) for key, entry in self.backend.layer_items(layer)}
 
     def get_for_task(self, task_id: str) -> list[ContextEntry]:
         """获取与指定任务相关的上下文条目。
@@ -95,19 +173,37 @@ class ContextStore:
             list[ContextEntry]: 相关上下文条目集合。
         """
 
+        self._maybe_sweep()
+        for layer in (ContextLayer.SYSTEM, ContextLayer.WORKFLOW, ContextLayer.TASK):
+            self._purge_expired_in(layer)
+
         entries: list[ContextEntry] = []
-        entries.extend(self._layers[ContextLayer.SYSTEM].values())
-        entries.extend(self._layers[ContextLayer.WORKFLOW].values())
+        entries.extend(entry for _, entry in self.backend.layer_items(ContextLayer.SYSTEM))
+        entries.extend(
+            entry for _, entry in self.backend.layer_items(ContextLayer.WORKFLOW)
+        )
+        entries.extend(self.backend.find_for_task(task_id))
+        return [self._readable(entry) for entry in entries]
+
+    def get_task_entries(self, task_ids: Iterable[str]) -> list[ContextEntry]:
+        """获取任务层中属于（或关联到）任一指定任务的条目。
+
+        只通过后端的任务索引定位条目，不遍历、也不解压任务层的其他条目。
+
+        Args:
+            task_ids: 任务 ID 集合（通常为依赖任务）。
 
-        for entry in self._layers[ContextLayer.TASK].values():
-            if (
-                entry.parent_id == task_id
-                or entry.source == task_id
-                or task_id in entry.related_ids
-            ):
-                entries.append(entry)
+        Returns:
+            list[ContextEntry]: 去重后的相关条目。
+        """
 
-        return list(entries)
+        self._maybe_sweep()
+        self._purge_expired_in(ContextLayer.TASK)
+        found: dict[str, ContextEntry] = {}
+        for task_id in task_ids:
+            for entry in self.backend.find_for_task(task_id):
+                found.setdefault(entry.id, entry)
+        return [self._readable(entry) for entry in found.values()]
 
     def get_by_type(self, context_type: ContextType) -> list[ContextEntry]:
         """获取指定类型的所有条目。
@@ -119,12 +215,10 @@ class ContextStore:
             list[ContextEntry]: 匹配的上下文条目列表。
         """
 
-        results: list[ContextEntry] = []
-        for layer_entries in self._layers.values():
-            results.extend(
-                entry for entry in layer_entries.values() if entry.type == context_type
-            )
-        return results
+        self._maybe_sweep()
+        for layer in ContextLayer:
+            self._purge_expired_in(layer)
+        return [self._readable(entry) for entry in self.backend.find_by_type(context_type)]
 
     def update(self, entry_id: str, **kwargs: object) -> bool:
         """更新上下文条目的属性。
@@ -135,19 +229,42 @@ class ContextStore:
 
         Returns:
             bool: 是否成功更新至少一个字段。
-        """
 
-        resolved = self._resolve_entry(entry_id)
-        if resolved is None:
-            return False
+        Raises:
+            StaleEntryError: 持久化后端中的条目被其他写入者持续修改，重试后仍冲突。
+        """
 
-        entry, _, _ = resolved
-        updated = False
-        for field, value in kwargs.items():
-            if hasattr(entry, field):
-                setattr(entry, field, value)
-                updated = True
-        return updated
+        for attempt in range(self.UPDATE_ATTEMPTS):
+            resolved = self.backend.resolve_for_update(entry_id)
+            if resolved is None:
+                return False
+
+            entry, layer, key = resolved
+            self._thaw(entry)
+            updated = False
+            for field, value in kwargs.items():
+                if hasattr(entry, field):
+                    if field == "related_ids":
+                        value = tuple(value)  # type: ignore[arg-type]
+                    setattr(entry, field, value)
+                    updated = True
+            if not updated:
+                return False
+
+            try:
+                self.backend.put(layer, key, entry, estimate_entry_bytes(entry))
+            except StaleEntryError:
+                # 条目在读取后被其他写入者修改：重新读取最新版本后再应用本次更新
+                if attempt == self.UPDATE_ATTEMPTS - 1:
+                    raise
+                continue
+            break
+
+        self._touch(entry_id)
+        if "content" in kwargs:
+            self._index_entry(entry)
+        self._enforce_limits(layer, protected_id=entry_id)
+        return True
 
     def remove(self, entry_id: str) -> bool:
         """移除上下文条目。
@@ -159,13 +276,10 @@ class ContextStore:
             bool: 是否成功移除。
         """
 
-        resolved = self._resolve_entry(entry_id)
-        if resolved is None:
+        self._unindex_entry(entry_id)
+        if not self.backend.delete(entry_id):
             return False
-
-        _, layer, key = resolved
-        del self._layers[layer][key]
-        del self._index[entry_id]
+        self._version += 1
         return True
 
     def clear_layer(self, layer: ContextLayer) -> int:
@@ -178,15 +292,12 @@ class ContextStore:
             int: 被清除的条目数。
         """
 
-        entries = self._layers[layer]
-        removed_ids = [entry.id for entry in entries.values()]
-        cleared_count = len(removed_ids)
-
+        removed_ids = self.backend.clear_layer(layer)
         for entry_id in removed_ids:
-            self._index.pop(entry_id, None)
-
-        entries.clear()
-        return cleared_count
+            self._unindex_entry(entry_id)
+        if removed_ids:
+            self._version += 1
+        return len(removed_ids)
 
     def clear_all(self) -> int:
         """清空所有层的所有条目。
@@ -196,23 +307,357 @@ class ContextStore:
         """
 
         total = 0
-        for layer in self._layers:
+        for layer in ContextLayer:
             total += self.clear_layer(layer)
         return total
 
-    def _resolve_entry(
-        self, entry_id: str
-    ) -> tuple[ContextEntry, ContextLayer, str] | None:
-        """定位条目及其所在层。"""
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        layers: tuple[ContextLayer, ...] | None = None,
+    ) -> list[tuple[ContextEntry, float]]:
+        """跨层检索与查询文本最相似的条目。
 
-        mapping = self._index.get(entry_id)
-        if mapping is None:
-            return None
+        Args:
+            query: 查询文本（通常为任务目标）。
+            top_k: 返回的最大条目数。
+            layers: 限定检索的层级，默认所有层。
 
-        layer, key = mapping
-        entry = self._layers[layer].get(key)
-        if entry is None:
-            self._index.pop(entry_id, None)
-            return None
+        Returns:
+            list[tuple[ContextEntry, float]]: 按相似度降序的 (条目, BM25 得分)；
+                未启用检索索引时返回空列表。
+        """
+
+        if self.retrieval is None:
+            return []
+
+        self._maybe_sweep()
+        oversample = top_k if layers is None else top_k * 4
+        results: list[tuple[ContextEntry, float]] = []
+        for entry_id, score in self._search_ids(query, oversample):
+            resolved = self._resolve_entry(entry_id)
+            if resolved is None:
+                continue
+            entry, layer, _ = resolved
+            if layers is not None and layer not in layers:
+                continue
+            if entry.is_expired():
+                self._expire(entry_id)
+                continue
+            results.append((self._readable(entry), score))
+            if len(results) >= top_k:
+                break
+        return results
+
+    def _search_ids(self, query: str, top_k: int) -> list[tuple[str, float]]:
+        """检索条目 ID；子存储合并自身与父存储的命中（被本分支覆盖的父命中除外）。"""
+
+        hits = self.retrieval.search(query, top_k) if self.retrieval is not None else []
+        if self.parent is None:
+            return hits
+
+        hits.extend(
+            (entry_id, score)
+            for entry_id, score in self.parent._search_ids(query, top_k)
+            if entry_id not in self._fingerprints
+        )
+        hits.sort(key=lambda item: item[1], reverse=True)
+        return hits[:top_k]
+
+    def fork(self) -> ContextStore:
+        """创建写时复制的子存储。
+
+        子存储的读取穿透到本存储，写入、更新与删除只作用于子存储，不影响本存储，
+        直到调用 ``merge``。
+
+        Returns:
+            ContextStore: 子存储，沿用本存储的容量限制与淘汰策略。
+        """
+
+        return ContextStore(
+            self.session_id,
+            limits=self.limits,
+            eviction_policy=self.eviction_policy,
+            sweep_interval=self.sweep_interval,
+            backend=ForkedBackend(self.backend),
+            retrieval_index=self.retrieval is not None,
+            parent=self,
+            pack_threshold=self.pack_threshold,
+            cold_after=self.cold_after,
+        )
+
+    def merge(self, child: ContextStore) -> int:
+        """把子存储的写入与删除合并回本存储（冲突时以子存储为准）。
+
+        Args:
+            child: 由 ``fork`` 创建的子存储。
+
+        Returns:
+            int: 合并的写入与删除条数。
+
+        Raises:
+            ValueError: 子存储不是由本存储派生。
+        """
+
+        backend = child.backend
+        if child.parent is not self or not isinstance(backend, ForkedBackend):
+            raise ValueError("只能合并由当前存储 fork 出的子存储")
+
+        merged = 0
+        for entry_id in backend.tombstones:
+            if self.remove(entry_id):
+                merged += 1
+        for layer, key, entry in backend.local_items():
+            self.add(layer, entry, key=key)
+            merged += 1
+
+        child.backend = ForkedBackend(self.backend)
+        child._fingerprints.clear()
+        child._revisions.clear()
+        if child.retrieval is not None:
+            child.retrieval.clear()
+        return merged
+
+    @property
+    def version(self) -> int:
+        """存储版本号：任何条目的增删改都会使其单调递增（子存储叠加父存储版本）。"""
+
+        if self.parent is None:
+            return self._version
+        return self._version + self.parent.version
+
+    def revision(self, entry_id: str) -> int | None:
+        """获取条目最近一次写入时的版本号，用于缓存按条目失效。"""
+
+        revision = self._revisions.get(entry_id)
+        if revision is None and self.parent is not None:
+            return self.parent.revision(entry_id)
+        return revision
+
+    def fingerprint(self, entry_id: str) -> int | None:
+        """获取条目的 SimHash 指纹。"""
+
+        return self.fingerprints().get(entry_id)
+
+    def fingerprints(self) -> Mapping[str, int | None]:
+        """获取所有条目指纹的只读视图（子存储会叠加父存储的指纹）。"""
+
+        maps: list[dict[str, int | None]] = []
+        store: ContextStore | None = self
+        while store is not None:
+            maps.append(store._fingerprints)
+            store = store.parent
+        if len(maps) == 1:
+            return MappingProxyType(maps[0])
+        return MappingProxyType(ChainMap(*maps))
+
+    def rebuild_indexes(self) -> int:
+        """根据后端现有条目重建指纹与检索索引（如重新打开持久化会话后）。
+
+        子存储只索引自身写入的条目，父条目的索引由父存储提供。
+
+        Returns:
+            int: 被索引的条目数。
+        """
+
+        self._fingerprints.clear()
+        if self.retrieval is not None:
+            self.retrieval.clear()
+
+        if isinstance(self.backend, ForkedBackend):
+            entries = [entry for _, _, entry in self.backend.local_items()]
+        else:
+            entries = [
+                entry
+                for layer in ContextLayer
+                for _, entry in self.backend.layer_items(layer)
+            ]
+        for entry in entries:
+            self._index_entry(entry)
+        return len(entries)
+
+    def _index_entry(self, entry: ContextEntry) -> None:
+        text = entry.content_text()
+        self._fingerprints[entry.id] = simhash(text)
+        if self.retrieval is not None:
+            self.retrieval.add(entry.id, text)
+
+    def _touch(self, entry_id: str) -> None:
+        self._version += 1
+        self._revisions[entry_id] = self.version
+
+    def _unindex_entry(self, entry_id: str) -> None:
+        self._fingerprints.pop(entry_id, None)
+        self._revisions.pop(entry_id, None)
+        self._packed_savings.pop(entry_id, None)
+        if self.retrieval is not None:
+            self.retrieval.remove(entry_id)
+
+    def sweep(self) -> int:
+        """清理所有过期条目，并对超出容量的层执行淘汰。
+
+        Returns:
+            int: 本次移除的条目数（过期 + 淘汰）。
+        """
+
+        self._last_sweep = time.time()
+        removed = 0
+        for layer in ContextLayer:
+            removed += self._purge_expired_in(layer)
+            removed += self._enforce_limits(layer)
+        self._pack_entries()
+        return removed
+
+    def flush(self) -> None:
+        """将后端缓存中的修改写回持久层。"""
+
+        self.backend.flush()
+
+    def close(self) -> None:
+        """关闭存储后端。"""
+
+        self.backend.close()
+
+    def get_eviction_stats(self) -> dict[str, object]:
+        """获取过期/淘汰统计信息。
+
+        Returns:
+            dict[str, object]: 包含累计过期数、淘汰数及各层估算字节数。
+        """
+
+        return {
+            "expired": self._expired_count,
+            "evicted": self._evicted_count,
+            "layer_bytes": {
+                layer.name.lower(): self.backend.layer_bytes(layer)
+                for layer in ContextLayer
+            },
+        }
+
+    def get_packing_stats(self) -> dict[str, int]:
+        """获取冷条目压缩统计信息。
+
+        Returns:
+            dict[str, int]: 当前压缩驻留的条目数、节省的字节数及累计压缩/解压次数。
+        """
+
+        return {
+            "packed_entries": len(self._packed_savings),
+            "bytes_saved": sum(self._packed_savings.values()),
+            "packs": self._pack_count,
+            "unpacks": self._unpack_count,
+        }
+
+    def _packing_enabled(self) -> bool:
+        return self.pack_threshold is not None or self.cold_after is not None
+
+    def _maybe_pack(self, entry: ContextEntry, now: float) -> None:
+        if not self._packing_enabled() or entry.is_packed:
+            return
+
+        size = len(entry.content) if isinstance(entry.content, str) else len(entry.content_text())
+        if size < self.MIN_PACK_CHARS:
+            return
+        oversized = self.pack_threshold is not None and size >= self.pack_threshold
+        idle = now - (entry.last_accessed or entry.timestamp)
+        cold = self.cold_after is not None and idle >= self.cold_after
+        if not (oversized or cold):
+            return
+
+        saved = entry.pack_content()
+        if saved:
+            self._packed_savings[entry.id] = saved
+            self._pack_count += 1
+
+    def _pack_entries(self) -> None:
+        """压缩所有符合条件的条目，并校正压缩统计。"""
+
+        if not self._packing_enabled():
+            return
+
+        now = time.time()
+        live_ids: set[str] = set()
+        for layer in ContextLayer:
+            for _, entry in self.backend.layer_items(layer):
+                if self._is_shared(entry.id):
+                    continue
+                self._maybe_pack(entry, now)
+                if entry.is_packed:
+                    live_ids.add(entry.id)
+        for entry_id in set(self._packed_savings) - live_ids:
+            del self._packed_savings[entry_id]
+
+    def _is_shared(self, entry_id: str) -> bool:
+        """条目是否属于父存储、仅被本子存储共享读取。"""
+
+        backend = self.backend
+        return isinstance(backend, ForkedBackend) and not backend.owns(entry_id)
+
+    def _readable(self, entry: ContextEntry, touch: bool = False) -> ContextEntry:
+        """返回可读的条目并（可选）记录访问。
+
+        已压缩的条目解压到临时副本，驻留的条目保持压缩；共享的父条目在记录访问前
+        先复制，避免分支读取修改父存储。
+        """
+
+        if touch:
+            if self._is_shared(entry.id):
+                entry = replace(entry)
+            entry.increment_access()
+        if entry.is_packed:
+            entry = replace(entry)
+            entry.unpack_content()
+            self._unpack_count += 1
+        return entry
+
+    def _thaw(self, entry: ContextEntry) -> None:
+        if entry.unpack_content():
+            self._packed_savings.pop(entry.id, None)
+            self._unpack_count += 1
+
+    def _maybe_sweep(self) -> None:
+        if time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def _purge_expired_in(self, layer: ContextLayer) -> int:
+        expired_ids = self.backend.expired_ids(layer, time.time())
+        for entry_id in expired_ids:
+            self._expire(entry_id)
+        return len(expired_ids)
+
+    def _expire(self, entry_id: str) -> None:
+        if self.remove(entry_id):
+            self._expired_count += 1
+
+    def _enforce_limits(
+        self, layer: ContextLayer, protected_id: str | None = None
+    ) -> int:
+        limits = self.limits.get(layer)
+        if limits is None or not self._over_limit(layer, limits):
+            return 0
+
+        evicted = 0
+        candidates = [
+            entry
+            for _, entry in self.backend.layer_items(layer)
+            if entry.id != protected_id
+        ]
+        for victim in self.eviction_policy.order(candidates):
+            if not self._over_limit(layer, limits):
+                break
+            if self.remove(victim.id):
+                evicted += 1
+
+        self._evicted_count += evicted
+        return evicted
+
+    def _over_limit(self, layer: ContextLayer, limits: LayerLimits) -> bool:
+        return limits.is_exceeded(
+            self.backend.layer_count(layer), self.backend.layer_bytes(layer)
+        )
+
+    def _resolve_entry(self, entry_id: str) -> ResolvedEntry | None:
+        """定位条目及其所在层。"""
 
-        return entry, layer, key
+        return self.backend.resolve(entry_id)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+_CJK_RUN_RE = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+
+_CL100K_PATTERN = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*"""
+    r"""|\s*[\r\n]|\s+(?!\S)|\s+"""
+)
+_CL100K_SPECIAL_TOKENS = {
+    "<|endoftext|>": 100257,
+    "<|fim_prefix|>": 100258,
+    "<|fim_middle|>": 100259,
+    "<|fim_suffix|>": 100260,
+    "<|endofprompt|>": 100276,
+}
+
+
+class Tokenizer(ABC):
+    """Token 计数器接口。"""
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """统计单段文本的 token 数。"""
+
+    def count_batch(self, texts: Sequence[str]) -> list[int]:
+        """批量统计 token 数。"""
+
+        return [self.count(text) for text in texts]
+
+
+@dataclass(frozen=True)
+class EstimatingTokenizer(Tokenizer):
+    """按字符类别校准的 token 估算器（无需词表）。
+
+    ASCII 文本按 ``ascii_chars_per_token`` 折算，中日韩文字按 ``cjk_tokens_per_char``
+    折算，其余字符（全角标点、符号等）按 ``other_tokens_per_char`` 折算。
+    """
+
+    cjk_tokens_per_char: float = 1.0
+    ascii_chars_per_token: float = 4.0
+    other_tokens_per_char: float = 1.0
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+
+        if text.isascii():
+            return max(1, math.ceil(len(text) / self.ascii_chars_per_token))
+
+        # 按连续片段匹配 CJK，ASCII 由编码时丢弃非 ASCII 字符计数，避免逐字符匹配
+        cjk = sum(len(run) for run in _CJK_RUN_RE.findall(text))
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        other = len(text) - cjk - ascii_chars
+        estimate = (
+            ascii_chars / self.ascii_chars_per_token
+            + cjk * self.cjk_tokens_per_char
+            + other * self.other_tokens_per_char
+        )
+        return max(1, math.ceil(estimate))
+
+
+class EncodingTokenizer(Tokenizer):
+    """包装 tiktoken ``Encoding`` 或 HuggingFace ``tokenizers.Tokenizer``。"""
+
+    def __init__(self, encoding: Any) -> None:
+        self._encoding = encoding
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if hasattr(self._encoding, "encode_ordinary"):
+            return len(self._encoding.encode_ordinary(text))
+        return len(self._encoding.encode(text).ids)
+
+    def count_batch(self, texts: Sequence[str]) -> list[int]:
+        if hasattr(self._encoding, "encode_ordinary_batch"):
+            return [len(tokens) for tokens in self._encoding.encode_ordinary_batch(list(texts))]
+        if hasattr(self._encoding, "encode_batch"):
+            return [len(encoded.ids) for encoded in self._encoding.encode_batch(list(texts))]
+        return super().count_batch(texts)
+
+
+TokenizerLoader = Callable[[Path], Tokenizer | None]
+
+
+def load_tiktoken_file(path: Path) -> Tokenizer | None:
+    """从本地 ``cl100k_base.tiktoken`` 文件构建编码（不访问网络）。"""
+
+    if not path.exists():
+        return None
+    import tiktoken
+    from tiktoken.load import load_tiktoken_bpe
+
+    encoding = tiktoken.Encoding(
+        name=path.stem,
+        pat_str=_CL100K_PATTERN,
+        mergeable_ranks=load_tiktoken_bpe(str(path)),
+        special_tokens=_CL100K_SPECIAL_TOKENS,
+    )
+    return EncodingTokenizer(encoding)
+
+
+def load_hf_tokenizer_file(path: Path) -> Tokenizer | None:
+    """从本地 ``tokenizer.json`` 构建 HuggingFace 分词器（不访问网络）。"""
+
+    if not path.exists():
+        return None
+    from tokenizers import Tokenizer as HFTokenizer
+
+    return EncodingTokenizer(HFTokenizer.from_file(str(path)))
+
+
+@dataclass(frozen=True)
+class TokenizerSpec:
+    """模型族的分词器配置。"""
+
+    filename: str
+    loader: TokenizerLoader
+    estimator: EstimatingTokenizer
+
+
+class TokenizerRegistry:
+    """按模型名解析分词器的注册表。
+
+    分词器文件只从本地缓存目录加载（``MAS_TOKENIZER_DIR``，默认
+    ``~/.cache/mas/tokenizers``），从不下载；文件缺失或依赖未安装时返回 None，
+    调用方使用对应模型族校准过的估算器。
+    """
+
+    DEFAULT_CACHE_DIR = Path.home() / ".cache" / "mas" / "tokenizers"
+    DEFAULT_ESTIMATOR = EstimatingTokenizer()
+
+    def __init__(self, cache_dir: str | Path | None = None) -> None:
+        env_dir = os.getenv("MAS_TOKENIZER_DIR")
+        self.cache_dir = Path(cache_dir or env_dir or self.DEFAULT_CACHE_DIR)
+        self._specs: dict[str, TokenizerSpec] = {}
+        self._loaded: dict[str, Tokenizer | None] = {}
+
+    def register(
+        self,
+        model_prefix: str,
+        filename: str,
+        loader: TokenizerLoader,
+        estimator: EstimatingTokenizer | None = None,
+    ) -> None:
+        """注册模型族的分词器。
+
+        Args:
+            model_prefix: 模型名前缀（大小写不敏感，最长前缀优先）。
+            filename: 相对缓存目录的分词器文件路径。
+            loader: 从文件构建分词器的函数。
+            estimator: 该模型族的校准估算器。
+        """
+
+        self._specs[model_prefix.lower()] = TokenizerSpec(
+            filename=filename,
+            loader=loader,
+            estimator=estimator or self.DEFAULT_ESTIMATOR,
+        )
+        self._loaded.clear()
+
+    def load(self, model: str | None) -> Tokenizer | None:
+        """加载模型对应的精确分词器，不可用时返回 None。"""
+
+        spec = self._match(model)
+        if spec is None:
+            return None
+        if spec.filename not in self._loaded:
+            try:
+                tokenizer = spec.loader(self.cache_dir / spec.filename)
+            except Exception:
+                tokenizer = None
+            self._loaded[spec.filename] = tokenizer
+        return self._loaded[spec.filename]
+
+    def estimator_for(self, model: str | None) -> EstimatingTokenizer:
+        """获取模型族的校准估算器。"""
+
+        spec = self._match(model)
+        return spec.estimator if spec is not None else self.DEFAULT_ESTIMATOR
+
+    def _match(self, model: str | None) -> TokenizerSpec | None:
+        if not model:
+            return None
+        normalized = model.lower()
+        prefixes = [prefix for prefix in self._specs if normalized.startswith(prefix)]
+        if not prefixes:
+            return None
+        return self._specs[max(prefixes, key=len)]
+
+
+def _build_default_registry() -> TokenizerRegistry:
+    registry = TokenizerRegistry()
+    registry.register(
+        "minimax",
+        "minimax/tokenizer.json",
+        load_hf_tokenizer_file,
+        EstimatingTokenizer(cjk_tokens_per_char=0.7, ascii_chars_per_token=4.2),
+    )
+    openai_estimator = EstimatingTokenizer(cjk_tokens_per_char=1.2)
+    for prefix in ("cl100k_base", "gpt-4", "gpt-3.5"):
+        registry.register(prefix, "cl100k_base.tiktoken", load_tiktoken_file, openai_estimator)
+    return registry
+
+
+default_registry = _build_default_registry()
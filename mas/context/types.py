@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import json
 import math
+import sys
 import time
+import zlib
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import Any
 
 
 class ContextType(str, Enum):
@@ -26,9 +31,15 @@ class ContextLayer(int, Enum):
     AGENT = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextEntry:
-    """上下文条目，用于追踪运行时产生的关键数据。"""
+    """上下文条目，用于追踪运行时产生的关键数据。
+
+    使用 ``__slots__`` 去掉实例 ``__dict__``；``source``/``parent_id`` 会被驻留
+    (intern)，``related_ids`` 规范化为元组，以降低长会话中大量条目的内存开销。
+    冷条目的内容可以用 ``pack_content`` 压缩为 zlib 字节，打包期间 ``content``
+    为空字符串，``content_text``/``to_dict`` 仍返回原始内容。
+    """
 
     id: str
     type: ContextType
@@ -40,10 +51,125 @@ class ContextEntry:
     access_count: int = 0
     ttl: int | None = None
     parent_id: str | None = None
-    related_ids: list[str] = field(default_factory=list)
+    related_ids: tuple[str, ...] = ()
     is_compressed: bool = False
     original_length: int = 0
     summary: str | None = None
+    last_accessed: float = 0.0
+    packed_content: bytes | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.source = sys.intern(self.source)
+        if self.parent_id is not None:
+            self.parent_id = sys.intern(self.parent_id)
+        self.related_ids = _intern_ids(self.related_ids)
+
+    def content_text(self) -> str:
+        """以字符串形式返回原始内容（字典内容序列化为 JSON）。"""
+
+        content = self.raw_content()
+        if isinstance(content, str):
+            return content
+        try:
+            return json.dumps(content, ensure_ascii=False, sort_keys=True)
+        except Exception:
+            return str(content)
+
+    @property
+    def is_packed(self) -> bool:
+        """内容当前是否以压缩字节形式保存。"""
+
+        return self.packed_content is not None
+
+    def raw_content(self) -> str | dict[str, object]:
+        """返回原始内容；已打包时解压但不改变条目状态。"""
+
+        if self.packed_content is None:
+            return self.content
+        payload = zlib.decompress(self.packed_content)
+        if payload[:1] == b"j":
+            content: dict[str, object] = json.loads(payload[1:].decode("utf-8"))
+            return content
+        return payload[1:].decode("utf-8")
+
+    def pack_content(self, level: int = 6) -> int:
+        """将内容压缩为 zlib 字节以降低常驻内存。
+
+        Args:
+            level: zlib 压缩级别。
+
+        Returns:
+            int: 节省的字节数；已打包、无法序列化或压缩无收益时返回 0。
+        """
+
+        if self.packed_content is not None:
+            return 0
+        if isinstance(self.content, str):
+            payload = b"s" + self.content.encode("utf-8")
+        else:
+            try:
+                payload = b"j" + json.dumps(self.content, ensure_ascii=False).encode("utf-8")
+            except (TypeError, ValueError):
+                return 0
+
+        packed = zlib.compress(payload, level)
+        if len(packed) >= len(payload):
+            return 0
+        self.packed_content = packed
+        self.content = ""
+        return len(payload) - len(packed)
+
+    def unpack_content(self) -> bool:
+        """解压已打包的内容，返回是否发生了解压。"""
+
+        if self.packed_content is None:
+            return False
+        self.content = self.raw_content()
+        self.packed_content = None
+        return True
+
+    def to_dict(self) -> dict[str, object]:
+        """序列化为可 JSON 编码的字典。"""
+
+        return {
+            "id": self.id,
+            "type": self.type.value,
+            "content": self.raw_content(),
+            "timestamp": self.timestamp,
+            "source": self.source,
+            "importance": self.importance,
+            "relevance_score": self.relevance_score,
+            "access_count": self.access_count,
+            "ttl": self.ttl,
+            "parent_id": self.parent_id,
+            "related_ids": list(self.related_ids),
+            "is_compressed": self.is_compressed,
+            "original_length": self.original_length,
+            "summary": self.summary,
+            "last_accessed": self.last_accessed,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ContextEntry:
+        """从 ``to_dict`` 的结果重建条目。"""
+
+        return cls(
+            id=data["id"],
+            type=ContextType(data["type"]),
+            content=data["content"],
+            timestamp=data["timestamp"],
+            source=data["source"],
+            importance=data.get("importance", 0.5),
+            relevance_score=data.get("relevance_score", 0.5),
+            access_count=data.get("access_count", 0),
+            ttl=data.get("ttl"),
+            parent_id=data.get("parent_id"),
+            related_ids=tuple(data.get("related_ids", ())),
+            is_compressed=data.get("is_compressed", False),
+            original_length=data.get("original_length", 0),
+            summary=data.get("summary"),
+            last_accessed=data.get("last_accessed", 0.0),
+        )
 
     def compute_score(self, current_task_id: str | None = None) -> float:
         """计算上下文条目的综合分数。
@@ -71,3 +197,25 @@ class ContextEntry:
         """记录上下文条目被访问一次。"""
 
         self.access_count += 1
+        self.last_accessed = time.time()
+
+    def is_expired(self, now: float | None = None) -> bool:
+        """判断条目是否已超过 TTL。
+
+        Args:
+            now: 当前时间戳，默认为 ``time.time()``。
+
+        Returns:
+            bool: 设置了 TTL 且已过期时返回 True。
+        """
+
+        if self.ttl is None:
+            return False
+        current_time = time.time() if now is None else now
+        return current_time - self.timestamp >= self.ttl
+
+
+def _intern_ids(ids: Iterable[str]) -> tuple[str, ...]:
+    """将 ID 序列转换为驻留字符串组成的元组。"""
+
+    return tuple(sys.intern(item) for item in ids)
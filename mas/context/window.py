@@ -1,19 +1,32 @@
 from __future__ import annotations
 
-import math
-from typing import Any
+from collections.abc import Sequence
 
+from .tokenizer import Tokenizer, TokenizerRegistry, default_registry
 from .types import ContextEntry
 
 
 class ContextWindow:
-    """上下文窗口管理器，处理 token 预算内的上下文选择。"""
+    """上下文窗口管理器，处理 token 预算内的上下文选择。
+
+    token 计数按模型从 ``TokenizerRegistry`` 解析本地分词器；分词器不可用时使用
+    该模型族校准过的 CJK 感知估算器。
+    """
 
     DEFAULT_MAX_TOKENS = 8000
 
-    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS):
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        model: str | None = None,
+        registry: TokenizerRegistry | None = None,
+    ):
         self.max_tokens = max_tokens
-        self._encoding: Any = None
+        self.model = model
+        self.registry = registry or default_registry
+        self._estimator = self.registry.estimator_for(model)
+        self._encoding: Tokenizer | None = None
+        self._encoding_resolved = False
 
     def count_tokens(self, text: str) -> int:
         """计算文本的 token 数。
@@ -22,7 +35,7 @@ class ContextWindow:
             text: 待统计的文本。
 
         Returns:
-            int: 估算的 token 数。
+            int: token 数（分词器不可用时为估算值）。
         """
 
         if not text:
@@ -31,11 +44,30 @@ class ContextWindow:
         encoding = self._ensure_encoding()
         if encoding is not None:
             try:
-                return len(encoding.encode(text))
+                return encoding.count(text)
             except Exception:
                 self._encoding = None
 
-        return max(1, math.ceil(len(text) / 4))
+        return self._estimator.count(text)
+
+    def count_tokens_batch(self, texts: Sequence[str]) -> list[int]:
+        """批量计算多段文本的 token 数。
+
+        Args:
+            texts: 待统计的文本序列。
+
+        Returns:
+            list[int]: 与输入一一对应的 token 数。
+        """
+
+        encoding = self._ensure_encoding()
+        if encoding is not None:
+            try:
+                return encoding.count_batch(texts)
+            except Exception:
+                self._encoding = None
+
+        return self._estimator.count_batch(texts)
 
     def select(
         self, entries: list[ContextEntry], max_tokens: int | None = None
@@ -81,22 +113,18 @@ class ContextWindow:
             int: 总 token 数估算。
         """
 
-        return sum(self._entry_tokens(entry) for entry in entries)
-
-    def _ensure_encoding(self) -> Any:
-        if self._encoding is not None:
-            return self._encoding
+        return sum(self.count_tokens_batch([self._entry_text(entry) for entry in entries]))
 
-        try:
-            import tiktoken
-
-            self._encoding = tiktoken.get_encoding("cl100k_base")
-        except Exception:
-            self._encoding = None
+    def _ensure_encoding(self) -> Tokenizer | None:
+        if not self._encoding_resolved:
+            self._encoding = self.registry.load(self.model)
+            self._encoding_resolved = True
 
         return self._encoding
 
     def _entry_tokens(self, entry: ContextEntry) -> int:
+        return self.count_tokens(self._entry_text(entry))
+
+    def _entry_text(self, entry: ContextEntry) -> str:
         content = entry.summary if entry.is_compressed and entry.summary else entry.content
-        text = content if isinstance(content, str) else str(content)
-        return self.count_tokens(text)
+        return content if isinstance(content, str) else str(content)
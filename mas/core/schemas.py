@@ -91,6 +91,7 @@ class TaskResult:
     start_time: float | None = None
     end_time: float | None = None
     agent_name: str | None = None
+    timing: dict[str, float] = field(default_factory=dict)
 
     def to_dict(self) -> dict[str, object]:
         return {
@@ -102,6 +103,7 @@ class TaskResult:
             "start_time": self.start_time,
             "end_time": self.end_time,
             "agent_name": self.agent_name,
+            "timing": self.timing,
         }
 
     def to_json(self) -> str:
@@ -117,6 +119,15 @@ class WorkflowResult:
     errors: dict[str, str] = field(default_factory=dict)
     total_duration_ms: float | None = None
     session_id: str | None = None
+    timing: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def framework_ms(self) -> float | None:
+        return self.timing.get("framework_ms")
+
+    @property
+    def llm_ms(self) -> float | None:
+        return self.timing.get("llm_ms")
 
     def to_dict(self) -> dict[str, object]:
         return {
@@ -127,6 +138,7 @@ class WorkflowResult:
             "errors": self.errors,
             "total_duration_ms": self.total_duration_ms,
             "session_id": self.session_id,
+            "timing": self.timing,
         }
 
     def to_json(self) -> str:
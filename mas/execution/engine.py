@@ -7,6 +7,7 @@ from logging import Logger
 from typing import TYPE_CHECKING, final
 
 from ..agents.pool import AgentPoolRegistry
+from ..context.gc import DemotionPolicy
 from ..context.manager import ContextManager
 from ..core.schemas import (
     ExecutionContext,
@@ -20,12 +21,16 @@ from ..core.task import Task
 from ..core.workflow import Workflow
 from ..hooks.manager import HookManager
 from ..llm.client import LLMClient
+from ..logging.blobs import BlobStore
 from ..logging.events import LogEvent
+from ..logging.prometheus import MetricsServer, render_metrics
+from ..logging.spans import Span
 from ..logging.tracker import ExecutionTracker
 from ..permissions.manager import PermissionManager
 from ..utils.logger import get_logger
 from .runner import TaskRunner
 from .scheduler import TaskScheduler
+from .timing import LLM_PHASE, PhaseTimer, aggregate_timings
 
 if TYPE_CHECKING:
     from ..core.schemas import AgentDescriptor
@@ -46,6 +51,7 @@ class ExecutionEngine:
     tracker: ExecutionTracker
     _logger: Logger
     context_manager: ContextManager
+    metrics_server: MetricsServer | None
 
     def __init__(
         self,
@@ -56,6 +62,13 @@ class ExecutionEngine:
         runner: TaskRunner | None = None,
         verbose: bool = False,
         context_max_tokens: int = 8000,
+        context_retrieval_top_k: int | None = None,
+        isolate_parallel_context: bool = False,
+        context_gc_policy: DemotionPolicy = DemotionPolicy.KEEP,
+        tracking_path: str | None = None,
+        tracking_max_records: int | None = None,
+        tracking_blob_dir: str | None = None,
+        tracing_path: str | None = None,
     ) -> None:
         llm_client = llm_client or LLMClient()
         hook_manager = hook_manager or HookManager()
@@ -64,7 +77,12 @@ class ExecutionEngine:
         runner = runner or TaskRunner()
         agent_pool = AgentPoolRegistry()
         session_id = str(uuid.uuid4())
-        tracker = ExecutionTracker(session_id)
+        tracker = ExecutionTracker(
+            session_id,
+            sink_path=tracking_path,
+            max_records=tracking_max_records,
+            blob_store=BlobStore(tracking_blob_dir) if tracking_blob_dir else None,
+        )
         logger = get_logger("mas.execution")
 
         self.llm_client: LLMClient = llm_client
@@ -77,16 +95,80 @@ class ExecutionEngine:
         self.verbose: bool = verbose
         self.tracker: ExecutionTracker = tracker
         self._logger = logger
+        self.isolate_parallel_context = isolate_parallel_context
+        self.tracing_path = tracing_path
         self.context_manager = ContextManager(
             session_id=self._session_id,
             llm_client=self.llm_client,
             max_tokens=context_max_tokens,
+            retrieval_top_k=context_retrieval_top_k,
+            gc_policy=context_gc_policy,
+            tracer=self.tracker.tracer,
+        )
+        self.metrics_server = None
+        self._inflight_tasks = 0
+        self._queued_tasks = 0
+        self._context_stats: dict[str, object] | None = None
+        self._compression_ms: dict[str, float] = {}
+        self._compression_wait_ms = 0.0
+        self._summarize_ms = 0.0
+        self.tracker.tracer.add_listener(self._observe_compression)
+
+    def metrics_text(self) -> str:
+        """Render current engine metrics in Prometheus text format.
+
+        While the metrics server runs, context statistics are the snapshot taken
+        after the latest wave, so rendering from the server thread never touches
+        the live store. Without a server they are collected on each call.
+        """
+        llm_stats = getattr(self.llm_client, "get_stats", None)
+        context_stats = self._context_stats
+        if self.metrics_server is None:
+            context_stats = self.context_manager.get_metrics()
+        return render_metrics(
+            self.tracker,
+            context_stats=context_stats,
+            llm_stats=llm_stats() if callable(llm_stats) else None,
+            gauges={
+                "inflight_tasks": self._inflight_tasks,
+                "queued_tasks": self._queued_tasks,
+            },
         )
 
+    def serve_metrics(self, host: str = "127.0.0.1", port: int = 9464) -> MetricsServer:
+        """Expose ``metrics_text`` at ``http://host:port/metrics`` until ``stop``."""
+        if self.metrics_server is None:
+            self._context_stats = self.context_manager.get_metrics()
+            self.metrics_server = MetricsServer(self.metrics_text, host, port).start()
+        return self.metrics_server
+
+    def close(self) -> None:
+        """Stop the metrics server, close tracking output and release context storage."""
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+            self._context_stats = None
+        self.tracker.close()
+        self.context_manager.close()
+
     async def run(self, workflow: Workflow) -> WorkflowResult:
         """Execute the workflow and return results."""
+        with self.tracker.tracer.span(
+            "workflow", description=workflow.description, task_count=len(workflow.tasks)
+        ) as span:
+            workflow_result = await self._run_workflow(workflow)
+            span.set_attribute("success", workflow_result.success)
+        if self.tracing_path:
+            self.tracker.tracer.export_otlp_json(self.tracing_path)
+        return workflow_result
+
+    async def _run_workflow(self, workflow: Workflow) -> WorkflowResult:
         task_results: dict[str, TaskResult] = {}
         errors: dict[str, str] = {}
+        workflow_timer = PhaseTimer()
+        self._compression_ms = {}
+        self._compression_wait_ms = 0.0
+        self._summarize_ms = 0.0
 
         context = ExecutionContext(
             original_task="",
@@ -95,6 +177,9 @@ class ExecutionEngine:
         )
 
         self.tracker.log_workflow_start(workflow.description)
+        self.context_manager.track_consumers(
+            {task_id: task.dependencies for task_id, task in workflow.tasks.items()}
+        )
         if self.verbose:
             self._print_workflow_start(workflow)
 
@@ -104,6 +189,9 @@ class ExecutionEngine:
                 if not self.scheduler.has_pending_tasks(workflow):
                     break
                 break
+            self._queued_tasks = sum(
+                1 for task in workflow.tasks.values() if task.status == TaskStatus.PENDING
+            )
 
             runner_results = await asyncio.gather(
                 *[self.runner.run(task) for task in ready_tasks],
@@ -125,10 +213,22 @@ class ExecutionEngine:
                         "Runner results processed", extra={"count": len(_unused)}
                     )
 
-            llm_results = await asyncio.gather(
-                *[self._execute_task(task, context, task_results) for task in ready_tasks],
-                return_exceptions=True,
-            )
+            branches = self._fork_context(ready_tasks)
+            with workflow_timer.phase("tasks"):
+                llm_results = await asyncio.gather(
+                    *[
+                        self._execute_task(task, context, task_results, branch)
+                        for task, branch in zip(ready_tasks, branches, strict=True)
+                    ],
+                    return_exceptions=True,
+                )
+            for branch in branches:
+                if branch is not self.context_manager:
+                    await self.context_manager.merge(branch)
+            for task in ready_tasks:
+                await self.context_manager.release_consumer(task.task_id)
+            if self.metrics_server is not None:
+                self._context_stats = self.context_manager.get_metrics()
 
             for task, result in zip(ready_tasks, llm_results, strict=True):
                 if isinstance(result, Exception):
@@ -159,6 +259,8 @@ class ExecutionEngine:
                     if self.verbose:
                         self._print_task_end(result)
 
+        self._queued_tasks = 0
+
         # Check for incomplete tasks
         for task_id, task in workflow.tasks.items():
             if task.status != TaskStatus.COMPLETED and task_id not in errors:
@@ -171,6 +273,19 @@ class ExecutionEngine:
             errors=errors,
             session_id=self._session_id,
         )
+        for task_id, compression_ms in self._compression_ms.items():
+            if task_id in task_results:
+                task_results[task_id].timing["compression_ms"] = compression_ms
+        wall_ms = workflow_timer.elapsed_ms()
+        workflow_result.timing = aggregate_timings(
+            (result.timing for result in task_results.values()),
+            wall_ms=wall_ms,
+            scheduling_ms=max(wall_ms - workflow_timer.phases.get("tasks", 0.0), 0.0),
+            compression_ms=sum(self._compression_ms.values()),
+            background_compression=self.context_manager.background_compression,
+            compression_wait_ms=self._compression_wait_ms,
+            summarize_ms=self._summarize_ms,
+        )
         self.tracker.log_workflow_end(workflow_result)
         workflow_result.total_duration_ms = self._get_total_duration_ms()
         if self.verbose:
@@ -183,22 +298,57 @@ class ExecutionEngine:
         task: Task,
         context: ExecutionContext,
         task_results: dict[str, TaskResult],
+        context_manager: ContextManager | None = None,
     ) -> TaskResult:
         """Execute a single task with hooks and LLM."""
+        timer = PhaseTimer()
+        with self.tracker.tracer.span(
+            "task", task_id=task.task_id, capability=task.capability.value
+        ) as span:
+            queue_wait_ms = self._queue_wait_ms(task, task_results)
+            if queue_wait_ms is not None:
+                span.set_attribute("queue_wait_ms", queue_wait_ms)
+            self._queued_tasks -= 1
+            self._inflight_tasks += 1
+            try:
+                result = await self._run_task(
+                    task, context, task_results, timer, context_manager
+                )
+            finally:
+                self._inflight_tasks -= 1
+            span.set_attribute("agent", result.agent_name or "default")
+            span.set_attribute("success", result.success)
+            if not result.success:
+                span.set_error(result.error or "Unknown error")
+        result.timing = timer.breakdown()
+        return result
+
+    async def _run_task(
+        self,
+        task: Task,
+        context: ExecutionContext,
+        task_results: dict[str, TaskResult],
+        timer: PhaseTimer,
+        context_manager: ContextManager | None = None,
+    ) -> TaskResult:
+        tracer = self.tracker.tracer
+        context_manager = context_manager or self.context_manager
         task.mark_running()
         start_time = time.time()
 
         # Select agent for this task
-        try:
-            agent = self.agent_pool.select_best_agent(task.capability, {})
-        except LookupError:
-            # No agent found, use default execution
-            agent = None
+        with tracer.span("agent.select", task_id=task.task_id), timer.phase("agent_selection"):
+            try:
+                agent = self.agent_pool.select_best_agent(task.capability, {})
+            except LookupError:
+                # No agent found, use default execution
+                agent = None
 
         agent_name = agent.name if agent else "default"
         context.current_agent = agent_name
-        self.tracker.log_agent_selected(task.task_id, agent_name)
-        self.tracker.log_task_start(task.task_id, agent_name)
+        with timer.phase("tracker"):
+            self.tracker.log_agent_selected(task.task_id, agent_name)
+            self.tracker.log_task_start(task.task_id, agent_name, list(task.dependencies))
         if self.verbose:
             self._print_task_start(task.task_id, agent_name)
 
@@ -212,14 +362,16 @@ class ExecutionEngine:
         )
 
         # Execute PreToolUse hooks
-        pre_result = await self.hook_manager.execute_pre_tool_use(hook_context)
-        self.tracker.log_hook_executed(
-            task.task_id,
-            agent_name,
-            hook_context.tool_name,
-            pre_result.decision.value,
-            pre_result.message,
-        )
+        with tracer.span("hook.pre_tool_use", task_id=task.task_id), timer.phase("hooks"):
+            pre_result = await self.hook_manager.execute_pre_tool_use(hook_context)
+        with timer.phase("tracker"):
+            self.tracker.log_hook_executed(
+                task.task_id,
+                agent_name,
+                hook_context.tool_name,
+                pre_result.decision.value,
+                pre_result.message,
+            )
         if pre_result.decision == PermissionDecision.DENY:
             result = TaskResult(
                 task_id=task.task_id,
@@ -229,28 +381,37 @@ class ExecutionEngine:
                 end_time=time.time(),
                 agent_name=agent_name,
             )
-            self.tracker.log_task_end(task.task_id, result)
+            with timer.phase("tracker"):
+                self.tracker.log_task_end(task.task_id, result)
             return result
 
         # Execute LLM call
         try:
             # Get optimized context from ContextManager
-            optimized_context = await self.context_manager.get_context_for_task(
-                task_id=task.task_id,
-                dependency_ids=task.dependencies,
-                max_tokens=8000,
-            )
+            with (
+                tracer.span("context.build", task_id=task.task_id) as context_span,
+                timer.phase("context"),
+            ):
+                optimized_context = await context_manager.get_context_for_task(
+                    task_id=task.task_id,
+                    dependency_ids=task.dependencies,
+                    max_tokens=8000,
+                    objective=task.objective,
+                )
+                context_span.set_attribute("context_chars", len(optimized_context))
 
-            output = await self._call_llm(task, agent, optimized_context)
+            output = await self._call_llm(task, agent, optimized_context, timer)
         except Exception as e:
             # Store error context
-            await self.context_manager.add_error_context(
-                task_id=task.task_id,
-                error=str(e),
-                agent_name=agent_name,
-            )
+            with timer.phase("context"):
+                await context_manager.add_error_context(
+                    task_id=task.task_id,
+                    error=str(e),
+                    agent_name=agent_name,
+                )
             # Execute OnError hooks
-            hook_result = await self.hook_manager.execute_on_error(hook_context)
+            with tracer.span("hook.on_error", task_id=task.task_id), timer.phase("hooks"):
+                hook_result = await self.hook_manager.execute_on_error(hook_context)
             _ = hook_result
             if hook_result.decision != PermissionDecision.ALLOW:
                 self._logger.warning(
@@ -269,21 +430,24 @@ class ExecutionEngine:
                 end_time=time.time(),
                 agent_name=agent_name,
             )
-            self.tracker.log_error(task.task_id, e)
-            self.tracker.log_task_end(task.task_id, result)
+            with timer.phase("tracker"):
+                self.tracker.log_error(task.task_id, e)
+                self.tracker.log_task_end(task.task_id, result)
             return result
 
         # Execute PostToolUse hooks
-        post_result = await self.hook_manager.execute_post_tool_use(
-            hook_context, output
-        )
-        self.tracker.log_hook_executed(
-            task.task_id,
-            agent_name,
-            hook_context.tool_name,
-            post_result.decision.value,
-            post_result.message,
-        )
+        with tracer.span("hook.post_tool_use", task_id=task.task_id), timer.phase("hooks"):
+            post_result = await self.hook_manager.execute_post_tool_use(
+                hook_context, output
+            )
+        with timer.phase("tracker"):
+            self.tracker.log_hook_executed(
+                task.task_id,
+                agent_name,
+                hook_context.tool_name,
+                post_result.decision.value,
+                post_result.message,
+            )
         if post_result.decision == PermissionDecision.DENY:
             result = TaskResult(
                 task_id=task.task_id,
@@ -293,15 +457,18 @@ class ExecutionEngine:
                 end_time=time.time(),
                 agent_name=agent_name,
             )
-            self.tracker.log_task_end(task.task_id, result)
+            with timer.phase("tracker"):
+                self.tracker.log_task_end(task.task_id, result)
             return result
 
         # Store task output in context manager
-        await self.context_manager.add_task_output(
-            task_id=task.task_id,
-            output=str(output),
-            agent_name=agent_name,
-        )
+        with timer.phase("context"):
+            await context_manager.add_task_output(
+                task_id=task.task_id,
+                output=str(output),
+                agent_name=agent_name,
+                dependency_ids=task.dependencies,
+            )
 
         result = TaskResult(
             task_id=task.task_id,
@@ -312,7 +479,8 @@ class ExecutionEngine:
             end_time=time.time(),
             agent_name=agent_name,
         )
-        self.tracker.log_task_end(task.task_id, result)
+        with timer.phase("tracker"):
+            self.tracker.log_task_end(task.task_id, result)
         return result
 
     async def _call_llm(
@@ -320,6 +488,7 @@ class ExecutionEngine:
         task: Task,
         agent: AgentDescriptor | None,
         context_str: str,
+        timer: PhaseTimer | None = None,
     ) -> str:
         """Call LLM with the task and agent configuration.
 
@@ -327,7 +496,9 @@ class ExecutionEngine:
             task: The task to execute
             agent: The agent descriptor (or None for default)
             context_str: Pre-formatted context string
+            timer: Phase timer that records time spent waiting on the LLM
         """
+        timer = timer or PhaseTimer()
         if agent:
             system_prompt = agent.system_prompt
             model = agent.model
@@ -349,14 +520,30 @@ class ExecutionEngine:
 
 请基于上述上下文（如果有）完成当前任务，并提供你的回答。"""
 
-        self.tracker.log_llm_request(task.task_id, agent_name, prompt)
-        try:
-            response = await self.llm_client.acomplete(
-                prompt=prompt,
-                model=model,
-                temperature=temperature,
+        count_tokens = self.context_manager.window.count_tokens
+        with timer.phase("tracker"):
+            self.tracker.log_llm_request(
+                task.task_id, agent_name, prompt, tokens=count_tokens(prompt)
             )
-            self.tracker.log_llm_response(task.task_id, agent_name, response)
+        try:
+            with self.tracker.tracer.span(
+                "llm.attempt",
+                task_id=task.task_id,
+                agent=agent_name,
+                model=model or getattr(self.llm_client, "model", ""),
+                prompt_chars=len(prompt),
+            ) as span:
+                with timer.phase(LLM_PHASE):
+                    response = await self.llm_client.acomplete(
+                        prompt=prompt,
+                        model=model,
+                        temperature=temperature,
+                    )
+                span.set_attribute("response_chars", len(response))
+            with timer.phase("tracker"):
+                self.tracker.log_llm_response(
+                    task.task_id, agent_name, response, tokens=count_tokens(response)
+                )
             return response
         except ValueError as e:
             # API key not set - return placeholder for testing
@@ -366,6 +553,39 @@ class ExecutionEngine:
                 return response
             raise
 
+    @staticmethod
+    def _queue_wait_ms(task: Task, task_results: dict[str, TaskResult]) -> float | None:
+        """Time between the task's last dependency finishing and the task starting."""
+        finished = [
+            task_results[dependency].end_time
+            for dependency in task.dependencies
+            if dependency in task_results
+        ]
+        ready_at = max((end_time for end_time in finished if end_time), default=None)
+        if ready_at is None:
+            return None
+        return max(time.time() - ready_at, 0.0) * 1000
+
+    def _observe_compression(self, span: Span) -> None:
+        if span.duration_ms is None:
+            return
+        if span.name == "context.compress_wait":
+            self._compression_wait_ms += span.duration_ms
+            return
+        if span.name == "context.summarize":
+            self._summarize_ms += span.duration_ms
+            return
+        if span.name != "context.compress":
+            return
+        task_id = str(span.attributes.get("task_id", ""))
+        self._compression_ms[task_id] = self._compression_ms.get(task_id, 0.0) + span.duration_ms
+
+    def _fork_context(self, ready_tasks: list[Task]) -> list[ContextManager]:
+        """Give each parallel task a copy-on-write context branch when isolation is on."""
+        if not self.isolate_parallel_context or len(ready_tasks) < 2:
+            return [self.context_manager] * len(ready_tasks)
+        return [self.context_manager.fork() for _ in ready_tasks]
+
     @staticmethod
     def _ignore_runner_results(_results: list[TaskResult | BaseException]) -> None:
         return None
@@ -375,10 +595,8 @@ class ExecutionEngine:
         return None
 
     def _get_total_duration_ms(self) -> float | None:
-        for record in reversed(self.tracker.records):
-            if record.event == LogEvent.WORKFLOW_END:
-                return record.duration_ms
-        return None
+        record = self.tracker.latest(LogEvent.WORKFLOW_END)
+        return record.duration_ms if record is not None else None
 
     def _print_workflow_start(self, workflow: Workflow) -> None:
         timestamp = time.strftime("%H:%M:%S", time.localtime())
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+LLM_PHASE = "llm"
+
+
+class PhaseTimer:
+    """Accumulates ``perf_counter`` wall time per named phase.
+
+    Everything measured outside the ``llm`` phase counts as framework time,
+    including work that is not wrapped in any phase.
+    """
+
+    phases: dict[str, float]
+    _start: float
+
+    def __init__(self) -> None:
+        self.phases = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def breakdown(self) -> dict[str, float]:
+        total_ms = self.elapsed_ms()
+        llm_ms = self.phases.get(LLM_PHASE, 0.0)
+        timing = {
+            f"{name}_ms": elapsed
+            for name, elapsed in self.phases.items()
+            if name != LLM_PHASE
+        }
+        timing["llm_ms"] = llm_ms
+        timing["framework_ms"] = max(total_ms - llm_ms, 0.0)
+        timing["total_ms"] = total_ms
+        return timing
+
+
+def aggregate_timings(
+    timings: Iterable[dict[str, float]],
+    wall_ms: float,
+    scheduling_ms: float = 0.0,
+    compression_ms: float = 0.0,
+    background_compression: bool = True,
+    compression_wait_ms: float = 0.0,
+    summarize_ms: float = 0.0,
+) -> dict[str, float]:
+    """Sum per-task breakdowns into workflow totals.
+
+    Task figures are summed across parallel tasks, so ``framework_ms`` and
+    ``llm_ms`` are work time rather than wall time. ``scheduling_ms`` is
+    the engine's time outside task execution and is added to
+    ``framework_ms``. Inline compression already counts toward the tasks'
+    ``context`` phase; background compression is added only for the part of
+    ``compression_ms`` nobody waited on, since ``compression_wait_ms`` (time spent
+    blocked on pending compressions) is already inside task or scheduling time.
+    ``summarize_ms``, the summarizer's LLM calls within compression, moves from
+    ``framework_ms`` to ``llm_ms``.
+    """
+    totals: dict[str, float] = {}
+    for timing in timings:
+        for key, value in timing.items():
+            totals[key] = totals.get(key, 0.0) + value
+    totals.pop("total_ms", None)
+    totals["scheduling_ms"] = scheduling_ms
+    totals["compression_ms"] = compression_ms
+    totals["compression_wait_ms"] = compression_wait_ms
+    totals["summarize_ms"] = summarize_ms
+    framework_ms = totals.get("framework_ms", 0.0) + scheduling_ms
+    if background_compression:
+        framework_ms += max(compression_ms - compression_wait_ms, 0.0)
+    framework_ms = max(framework_ms - summarize_ms, 0.0)
+    llm_ms = totals.get("llm_ms", 0.0) + summarize_ms
+    totals["framework_ms"] = framework_ms
+    totals["llm_ms"] = llm_ms
+    totals["wall_ms"] = wall_ms
+    totals["framework_share"] = (
+        framework_ms / (framework_ms + llm_ms) if framework_ms + llm_ms else 0.0
+    )
+    return totals
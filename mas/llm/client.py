@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import os
+import time
 from typing import Any
 
 import httpx
@@ -11,11 +12,17 @@ class LLMClient:
     api_key: str | None
     base_url: str
     model: str
+    request_count: int
+    error_count: int
+    total_latency_ms: float
 
     def __init__(self, api_key: str | None = None, model: str = "MiniMax-M2.1"):
         self.api_key = api_key or os.getenv("MINIMAX_API_KEY")
         self.base_url = "https://api.minimax.chat/v1"
         self.model = model
+        self.request_count = 0
+        self.error_count = 0
+        self.total_latency_ms = 0.0
 
     async def acomplete(
         self,
@@ -36,16 +43,32 @@ class LLMClient:
             payload["response_format"] = response_format
 
         headers: dict[str, str] = {"Authorization": f"Bearer {self.api_key}"}
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions", json=payload, headers=headers
-            )
-            _ = response.raise_for_status()
-            data: Any = response.json()
+        self.request_count += 1
+        start = time.perf_counter()
+        try:
+            async with httpx.AsyncClient(timeout=300.0) as client:
+                response = await client.post(
+                    f"{self.base_url}/chat/completions", json=payload, headers=headers
+                )
+                _ = response.raise_for_status()
+                data: Any = response.json()
+        except Exception:
+            self.error_count += 1
+            raise
+        finally:
+            self.total_latency_ms += (time.perf_counter() - start) * 1000
 
         parsed = self._parse_response_data(data)
         return parsed
 
+    def get_stats(self) -> dict[str, object]:
+        return {
+            "model": self.model,
+            "requests": self.request_count,
+            "errors": self.error_count,
+            "latency_ms_total": self.total_latency_ms,
+        }
+
     def _parse_response_data(self, data: object) -> str:
         if not isinstance(data, dict):
             return str(data)
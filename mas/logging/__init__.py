@@ -1,4 +1,24 @@
+from .blobs import BlobStore
+from .chrome_trace import build_chrome_trace, export_chrome_trace
 from .events import LogEvent, LogRecord
+from .metrics import LatencyHistogram, MetricsRegistry
+from .prometheus import MetricsServer, render_metrics
+from .sink import JsonlSink
+from .spans import Span, SpanTracer
 from .tracker import ExecutionTracker
 
-__all__ = ["LogEvent", "LogRecord", "ExecutionTracker"]
+__all__ = [
+    "BlobStore",
+    "LogEvent",
+    "LogRecord",
+    "ExecutionTracker",
+    "JsonlSink",
+    "LatencyHistogram",
+    "MetricsRegistry",
+    "MetricsServer",
+    "Span",
+    "SpanTracer",
+    "build_chrome_trace",
+    "export_chrome_trace",
+    "render_metrics",
+]
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .events import LogEvent, LogRecord
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class TaskTiming:
+    """Start/end of one task, in milliseconds since the workflow started."""
+
+    task_id: str
+    agent_name: str | None
+    dependencies: list[str]
+    start_ms: float
+    end_ms: float | None = None
+    ready_ms: float = 0.0
+    success: bool | None = None
+
+    @property
+    def executing_ms(self) -> float:
+        return max((self.end_ms if self.end_ms is not None else self.start_ms) - self.start_ms, 0.0)
+
+    @property
+    def waiting_ms(self) -> float:
+        return max(self.start_ms - self.ready_ms, 0.0)
+
+
+@dataclass
+class AgentUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+    latency_ms: list[float] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, object]:
+        latencies = sorted(self.latency_ms)
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "latency_ms_total": sum(latencies),
+            "latency_ms_mean": sum(latencies) / len(latencies) if latencies else None,
+            "latency_ms_max": latencies[-1] if latencies else None,
+        }
+
+
+def load_records(path: str | Path) -> list[LogRecord]:
+    """Read records written by ``export_json``, ``export_jsonl`` or a JSONL sink."""
+    text = Path(path).read_text(encoding="utf-8")
+    if text.lstrip().startswith("["):
+        payloads = json.loads(text)
+    else:
+        payloads = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [LogRecord.from_dict(payload) for payload in payloads]
+
+
+def load_spans(path: str | Path) -> list[dict[str, object]]:
+    """Flatten an OTLP JSON export into ``name``/``start_ns``/``end_ns``/``attributes`` dicts."""
+    payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    spans: list[dict[str, object]] = []
+    for resource_spans in payload.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                spans.append(
+                    {
+                        "name": span.get("name"),
+                        "start_ns": int(span.get("startTimeUnixNano", 0)),
+                        "end_ns": int(span.get("endTimeUnixNano", 0)),
+                        "attributes": {
+                            item["key"]: next(iter(item.get("value", {}).values()), None)
+                            for item in span.get("attributes", [])
+                        },
+                    }
+                )
+    return spans
+
+
+def split_sessions(records: Iterable[LogRecord]) -> dict[str, list[LogRecord]]:
+    sessions: dict[str, list[LogRecord]] = {}
+    for record in records:
+        sessions.setdefault(record.session_id, []).append(record)
+    return sessions
+
+
+def split_runs(records: Iterable[LogRecord]) -> dict[tuple[str, int], list[LogRecord]]:
+    """Split records into workflow runs keyed by ``(session_id, run)``.
+
+    An engine keeps its session ID across ``run()`` calls, so each
+    ``WORKFLOW_START`` begins a new run, numbered from 1 within its session.
+    Records logged before the first start belong to run 1.
+    """
+    runs: dict[tuple[str, int], list[LogRecord]] = {}
+    for session_id, session_records in split_sessions(records).items():
+        run = 1
+        started = False
+        for record in sorted(session_records, key=lambda record: record.timestamp):
+            if record.event == LogEvent.WORKFLOW_START:
+                if started:
+                    run += 1
+                started = True
+            runs.setdefault((session_id, run), []).append(record)
+    return runs
+
+
+def analyze(
+    records: list[LogRecord],
+    spans: list[dict[str, object]] | None = None,
+    run: int | None = None,
+) -> dict[str, object]:
+    """Compute post-run performance figures for one workflow run's records.
+
+    Reports the critical path, per-task waiting versus executing time, achieved
+    parallelism versus DAG width, time lost to scheduling barriers, LLM usage per
+    agent and, when ``spans`` are given, compression overhead from the spans
+    that started during the run.
+    """
+    records = sorted(records, key=lambda record: record.timestamp)
+    origin = _workflow_origin(records)
+    tasks = _task_timings(records, origin)
+    makespan_ms = _makespan_ms(records, origin, tasks)
+
+    for timing in tasks.values():
+        dependency_ends = [
+            tasks[dependency].end_ms
+            for dependency in timing.dependencies
+            if dependency in tasks and tasks[dependency].end_ms is not None
+        ]
+        timing.ready_ms = max((end for end in dependency_ends if end is not None), default=0.0)
+
+    busy_ms = sum(timing.executing_ms for timing in tasks.values())
+    critical_ms, critical_path = _critical_path(tasks)
+    return {
+        "session_id": records[0].session_id if records else None,
+        "run": run,
+        "makespan_ms": makespan_ms,
+        "critical_path": critical_path,
+        "critical_path_ms": critical_ms,
+        "scheduling_overhead_ms": max(makespan_ms - critical_ms, 0.0),
+        "parallelism": {
+            "achieved": busy_ms / makespan_ms if makespan_ms else 0.0,
+            "peak": _peak_concurrency(tasks.values()),
+            "dag_width": _dag_width(tasks),
+        },
+        "barrier_wait_ms": sum(
+            timing.waiting_ms for timing in tasks.values() if timing.dependencies
+        ),
+        "tasks": [
+            {
+                "task_id": timing.task_id,
+                "agent": timing.agent_name,
+                "waiting_ms": timing.waiting_ms,
+                "executing_ms": timing.executing_ms,
+                "success": timing.success,
+            }
+            for timing in sorted(tasks.values(), key=lambda timing: timing.start_ms)
+        ],
+        "llm": {agent: usage.to_dict() for agent, usage in sorted(_llm_usage(records).items())},
+        "compression": (
+            _compression_overhead(_spans_during(spans, records, origin), makespan_ms)
+            if spans is not None
+            else None
+        ),
+    }
+
+
+def format_report(report: dict[str, object]) -> str:
+    run = report.get("run")
+    lines = [f"Session {report['session_id']}" + (f" run {run}" if run is not None else "")]
+    lines.append(f"  makespan            {report['makespan_ms']:10.1f} ms")
+    lines.append(f"  critical path       {report['critical_path_ms']:10.1f} ms")
+    lines.append(f"  scheduling overhead {report['scheduling_overhead_ms']:10.1f} ms")
+    lines.append(f"  barrier wait        {report['barrier_wait_ms']:10.1f} ms")
+    parallelism = report["parallelism"]
+    assert isinstance(parallelism, dict)
+    lines.append(
+        f"  parallelism         {parallelism['achieved']:10.2f} achieved, "
+        f"{parallelism['peak']} peak, {parallelism['dag_width']} DAG width"
+    )
+    critical_path = report["critical_path"]
+    assert isinstance(critical_path, list)
+    lines.append(f"  critical tasks      {' -> '.join(critical_path) or '-'}")
+
+    lines.append("")
+    lines.append(f"  {'task':<24} {'agent':<16} {'waiting ms':>11} {'executing ms':>13}")
+    for task in _as_dicts(report["tasks"]):
+        lines.append(
+            f"  {task['task_id']!s:<24} {task['agent'] or '-'!s:<16} "
+            f"{task['waiting_ms']:>11.1f} {task['executing_ms']:>13.1f}"
+        )
+
+    llm = report["llm"]
+    assert isinstance(llm, dict)
+    if llm:
+        lines.append("")
+        lines.append(
+            f"  {'agent':<16} {'calls':>5} {'prompt tok':>10} {'resp tok':>9} "
+            f"{'total ms':>10} {'mean ms':>9} {'max ms':>9}"
+        )
+        for agent, usage in llm.items():
+            lines.append(
+                f"  {agent:<16} {usage['calls']:>5} {usage['prompt_tokens']:>10} "
+                f"{usage['response_tokens']:>9} {usage['latency_ms_total']:>10.1f} "
+                f"{_optional(usage['latency_ms_mean']):>9} {_optional(usage['latency_ms_max']):>9}"
+            )
+
+    compression = report["compression"]
+    if isinstance(compression, dict):
+        lines.append("")
+        lines.append(
+            f"  compression         {compression['count']} runs, "
+            f"{compression['total_ms']:.1f} ms total, "
+            f"{compression['share_of_makespan']:.1%} of makespan"
+        )
+    return "\n".join(lines)
+
+
+def _workflow_origin(records: list[LogRecord]) -> float:
+    for record in records:
+        if record.event == LogEvent.WORKFLOW_START:
+            return record.timestamp
+    return records[0].timestamp if records else 0.0
+
+
+def _task_timings(records: list[LogRecord], origin: float) -> dict[str, TaskTiming]:
+    tasks: dict[str, TaskTiming] = {}
+    for record in records:
+        if record.task_id is None:
+            continue
+        offset_ms = (record.timestamp - origin) * 1000
+        if record.event == LogEvent.TASK_START:
+            dependencies = record.data.get("dependencies")
+            tasks[record.task_id] = TaskTiming(
+                task_id=record.task_id,
+                agent_name=record.agent_name,
+                dependencies=list(dependencies) if isinstance(dependencies, list) else [],
+                start_ms=offset_ms,
+            )
+        elif record.event == LogEvent.TASK_END and record.task_id in tasks:
+            timing = tasks[record.task_id]
+            timing.end_ms = offset_ms
+            timing.success = bool(record.data.get("success"))
+    return tasks
+
+
+def _makespan_ms(
+    records: list[LogRecord], origin: float, tasks: dict[str, TaskTiming]
+) -> float:
+    for record in reversed(records):
+        if record.event == LogEvent.WORKFLOW_END:
+            return (record.timestamp - origin) * 1000
+    return max((timing.end_ms or timing.start_ms for timing in tasks.values()), default=0.0)
+
+
+def _critical_path(tasks: dict[str, TaskTiming]) -> tuple[float, list[str]]:
+    longest: dict[str, tuple[float, list[str]]] = {}
+
+    def visit(task_id: str, stack: frozenset[str]) -> tuple[float, list[str]]:
+        if task_id in longest:
+            return longest[task_id]
+        timing = tasks[task_id]
+        best: tuple[float, list[str]] = (0.0, [])
+        for dependency in timing.dependencies:
+            if dependency in tasks and dependency not in stack:
+                candidate = visit(dependency, stack | {task_id})
+                if candidate[0] > best[0]:
+                    best = candidate
+        longest[task_id] = (best[0] + timing.executing_ms, [*best[1], task_id])
+        return longest[task_id]
+
+    return max((visit(task_id, frozenset()) for task_id in tasks), default=(0.0, []))
+
+
+def _dag_width(tasks: dict[str, TaskTiming]) -> int:
+    depth: dict[str, int] = {}
+
+    def level(task_id: str, stack: frozenset[str]) -> int:
+        if task_id not in depth:
+            parents = [
+                level(dependency, stack | {task_id})
+                for dependency in tasks[task_id].dependencies
+                if dependency in tasks and dependency not in stack
+            ]
+            depth[task_id] = max(parents, default=-1) + 1
+        return depth[task_id]
+
+    counts: defaultdict[int, int] = defaultdict(int)
+    for task_id in tasks:
+        counts[level(task_id, frozenset())] += 1
+    return max(counts.values(), default=0)
+
+
+def _peak_concurrency(timings: Iterable[TaskTiming]) -> int:
+    edges: list[tuple[float, int]] = []
+    for timing in timings:
+        edges.append((timing.start_ms, 1))
+        edges.append((timing.start_ms + timing.executing_ms, -1))
+    running = peak = 0
+    for _, change in sorted(edges):
+        running += change
+        peak = max(peak, running)
+    return peak
+
+
+def _llm_usage(records: list[LogRecord]) -> dict[str, AgentUsage]:
+    usage: defaultdict[str, AgentUsage] = defaultdict(AgentUsage)
+    requests: dict[str, LogRecord] = {}
+    for record in records:
+        agent = record.agent_name or "default"
+        if record.event == LogEvent.LLM_REQUEST and record.task_id is not None:
+            requests[record.task_id] = record
+            usage[agent].calls += 1
+            usage[agent].prompt_tokens += _tokens(record, "prompt")
+        elif record.event == LogEvent.LLM_RESPONSE:
+            usage[agent].response_tokens += _tokens(record, "response")
+            request = requests.pop(record.task_id, None) if record.task_id else None
+            if request is not None:
+                usage[agent].latency_ms.append((record.timestamp - request.timestamp) * 1000)
+    return dict(usage)
+
+
+def _tokens(record: LogRecord, field_name: str) -> int:
+    tokens = record.data.get(f"{field_name}_tokens")
+    if isinstance(tokens, int):
+        return tokens
+    length = record.data.get(f"{field_name}_length")
+    if not isinstance(length, int):
+        text = record.data.get(field_name)
+        length = len(text) if isinstance(text, str) else 0
+    return -(-length // CHARS_PER_TOKEN)
+
+
+def _spans_during(
+    spans: list[dict[str, object]], records: list[LogRecord], origin: float
+) -> list[dict[str, object]]:
+    if not records:
+        return []
+    start_ns = int(origin * 1e9)
+    end_ns = int(records[-1].timestamp * 1e9)
+    return [span for span in spans if start_ns <= _nanoseconds(span, "start_ns") <= end_ns]
+
+
+def _compression_overhead(
+    spans: list[dict[str, object]], makespan_ms: float
+) -> dict[str, object]:
+    durations = [
+        (_nanoseconds(span, "end_ns") - _nanoseconds(span, "start_ns")) / 1_000_000
+        for span in spans
+        if span.get("name") == "context.compress" and span.get("end_ns")
+    ]
+    total_ms = sum(durations)
+    return {
+        "count": len(durations),
+        "total_ms": total_ms,
+        "max_ms": max(durations, default=0.0),
+        "share_of_makespan": total_ms / makespan_ms if makespan_ms else 0.0,
+    }
+
+
+def _nanoseconds(span: dict[str, object], key: str) -> int:
+    value = span.get(key)
+    return value if isinstance(value, int) else 0
+
+
+def _as_dicts(value: object) -> Iterator[dict[str, object]]:
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                yield item
+
+
+def _optional(value: object) -> str:
+    return f"{value:.1f}" if isinstance(value, (int, float)) else "-"
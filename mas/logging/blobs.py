@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import queue
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+
+class BlobStore:
+    """Content-addressed store for large texts (sha256 -> zlib bytes).
+
+    Recently used blobs stay in an in-memory LRU. With a ``directory`` every blob
+    is also written to disk once, on a background thread so ``put`` never blocks on
+    file I/O, and lookups still succeed after memory eviction; without one, evicted
+    blobs are gone.
+    """
+
+    directory: Path | None
+    max_entries: int
+    level: int
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        max_entries: int = 1024,
+        level: int = 6,
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self.max_entries = max(1, max_entries)
+        self.level = level
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._pending: dict[str, tuple[bytes, int]] = {}
+        self._written: set[str] = set()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._duplicates = 0
+        self._raw_bytes = 0
+        self._stored_bytes = 0
+        self._closed = False
+        self._queue: queue.Queue[str | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(
+                target=self._run, name="mas-blob-writer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def put(self, text: str) -> str:
+        digest = self.digest(text)
+        with self._lock:
+            self._puts += 1
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                self._duplicates += 1
+                return digest
+            if digest in self._pending or digest in self._written:
+                self._duplicates += 1
+                return digest
+
+            raw = text.encode("utf-8")
+            payload = zlib.compress(raw, self.level)
+            self._raw_bytes += len(raw)
+            self._stored_bytes += len(payload)
+            self._remember(digest, payload)
+            if self.directory is None:
+                return digest
+            self._pending[digest] = (payload, len(raw))
+            if not self._closed:
+                self._queue.put(digest)
+                return digest
+        self._write(digest)
+        return digest
+
+    def get(self, digest: str) -> str | None:
+        with self._lock:
+            payload = self._memory.get(digest)
+            if payload is not None:
+                self._memory.move_to_end(digest)
+            elif digest in self._pending:
+                payload = self._pending[digest][0]
+            else:
+                path = self._path_for(digest)
+                if path is None or not path.exists():
+                    return None
+                payload = path.read_bytes()
+                self._remember(digest, payload)
+        return zlib.decompress(payload).decode("utf-8")
+
+    def __contains__(self, digest: object) -> bool:
+        if not isinstance(digest, str):
+            return False
+        if digest in self._memory or digest in self._pending:
+            return True
+        path = self._path_for(digest)
+        return path is not None and path.exists()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "puts": self._puts,
+                "duplicates": self._duplicates,
+                "unique_blobs": self._puts - self._duplicates,
+                "memory_blobs": len(self._memory),
+                "raw_bytes": self._raw_bytes,
+                "stored_bytes": self._stored_bytes,
+            }
+
+    def flush(self) -> None:
+        """Block until every queued blob has been written to disk."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write out the remaining blobs and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while True:
+            digest = self._queue.get()
+            try:
+                if digest is None:
+                    return
+                self._write(digest)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, digest: str) -> None:
+        path = self._path_for(digest)
+        with self._lock:
+            pending = self._pending.get(digest)
+        if path is None or pending is None:
+            return
+        payload, raw_length = pending
+        if path.exists():
+            # Written by an earlier store on the same directory: count it as a
+            # duplicate, as ``put`` would have if it had checked the disk.
+            with self._lock:
+                self._duplicates += 1
+                self._raw_bytes -= raw_length
+                self._stored_bytes -= len(payload)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(payload)
+            tmp_path.replace(path)
+        with self._lock:
+            self._pending.pop(digest, None)
+            self._written.add(digest)
+
+    def _remember(self, digest: str, payload: bytes) -> None:
+        self._memory[digest] = payload
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path_for(self, digest: str) -> Path | None:
+        if self.directory is None or len(digest) != 64 or not digest.isalnum():
+            return None
+        return self.directory / digest[:2] / f"{digest}.z"
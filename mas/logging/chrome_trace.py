@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from pathlib import Path
+
+from .spans import Span
+
+_PID = 1
+_WORKFLOW_TID = 0
+_BACKGROUND_TID = 1
+_BACKGROUND_SPANS = {"context.compress"}
+
+
+def build_chrome_trace(spans: Iterable[Span]) -> dict[str, object]:
+    """Convert finished spans into Chrome Trace Event Format.
+
+    Every task gets its own lane (``tid``) holding the task span and its children;
+    workflow-level spans sit on lane 0 and background compression on lane 1.
+    ``running_tasks`` and ``llm_inflight`` counter tracks show concurrency, so
+    idle gaps at wave barriers stand out.
+    """
+    finished = sorted(
+        (span for span in spans if span.end_ns is not None), key=lambda span: span.start_ns
+    )
+    if not finished:
+        return {"traceEvents": [], "displayTimeUnit": "ms"}
+
+    origin_ns = finished[0].start_ns
+    by_id = {span.span_id: span for span in finished}
+    lanes: dict[str, int] = {}
+    events: list[dict[str, object]] = [
+        _metadata("process_name", _PID, None, "mas workflow"),
+        _metadata("thread_name", _PID, _WORKFLOW_TID, "workflow"),
+        _metadata("thread_name", _PID, _BACKGROUND_TID, "background compression"),
+    ]
+
+    for span in finished:
+        if span.name in _BACKGROUND_SPANS:
+            tid = _BACKGROUND_TID
+        else:
+            task_span = _owning_task(span, by_id)
+            tid = _WORKFLOW_TID
+            if task_span is not None:
+                if task_span.span_id not in lanes:
+                    lanes[task_span.span_id] = len(lanes) + 2
+                    label = f"task {task_span.attributes.get('task_id', task_span.span_id)}"
+                    events.append(
+                        _metadata("thread_name", _PID, lanes[task_span.span_id], label)
+                    )
+                tid = lanes[task_span.span_id]
+
+        events.append(
+            {
+                "name": span.name,
+                "cat": span.name.split(".", 1)[0],
+                "ph": "X",
+                "ts": _micros(span.start_ns - origin_ns),
+                "dur": _micros(span.end_ns - span.start_ns),  # type: ignore[operator]
+                "pid": _PID,
+                "tid": tid,
+                "args": {key: _arg(value) for key, value in span.attributes.items()},
+            }
+        )
+
+    events.extend(_counter(finished, "task", "running_tasks", origin_ns))
+    events.extend(_counter(finished, "llm.attempt", "llm_inflight", origin_ns))
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(spans: Iterable[Span], path: str | Path) -> None:
+    Path(path).write_text(
+        json.dumps(build_chrome_trace(spans), ensure_ascii=False), encoding="utf-8"
+    )
+
+
+def _owning_task(span: Span, by_id: dict[str, Span]) -> Span | None:
+    current: Span | None = span
+    while current is not None:
+        if current.name == "task":
+            return current
+        current = by_id.get(current.parent_span_id) if current.parent_span_id else None
+    return None
+
+
+def _counter(
+    spans: list[Span], span_name: str, counter_name: str, origin_ns: int
+) -> list[dict[str, object]]:
+    changes: list[tuple[int, int]] = []
+    for span in spans:
+        if span.name == span_name:
+            changes.append((span.start_ns, 1))
+            changes.append((span.end_ns, -1))  # type: ignore[arg-type]
+    changes.sort()
+
+    events: list[dict[str, object]] = []
+    running = 0
+    for timestamp_ns, delta in changes:
+        running += delta
+        events.append(
+            {
+                "name": counter_name,
+                "ph": "C",
+                "ts": _micros(timestamp_ns - origin_ns),
+                "pid": _PID,
+                "args": {counter_name: running},
+            }
+        )
+    return events
+
+
+def _metadata(name: str, pid: int, tid: int | None, label: str) -> dict[str, object]:
+    event: dict[str, object] = {"name": name, "ph": "M", "pid": pid, "args": {"name": label}}
+    if tid is not None:
+        event["tid"] = tid
+    return event
+
+
+def _micros(nanoseconds: int) -> float:
+    return nanoseconds / 1000
+
+
+def _arg(value: object) -> object:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from enum import Enum
+from typing import Any
 
 
 class LogEvent(str, Enum):
@@ -25,3 +26,26 @@ class LogRecord:
     agent_name: str | None
     data: dict[str, object]
     duration_ms: float | None = None
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "event": self.event.value,
+            "timestamp": self.timestamp,
+            "session_id": self.session_id,
+            "task_id": self.task_id,
+            "agent_name": self.agent_name,
+            "data": self.data,
+            "duration_ms": self.duration_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any]) -> LogRecord:
+        return cls(
+            event=LogEvent(payload["event"]),
+            timestamp=payload["timestamp"],
+            session_id=payload["session_id"],
+            task_id=payload.get("task_id"),
+            agent_name=payload.get("agent_name"),
+            data=payload.get("data") or {},
+            duration_ms=payload.get("duration_ms"),
+        )
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections.abc import Iterable
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """Fixed-memory log-linear latency histogram (HDR-style).
+
+    Values are recorded in microseconds into buckets that are exact below
+    ``2 ** precision_bits`` and keep a relative error of about
+    ``2 ** -(precision_bits - 1)`` above it; values beyond ``max_value_ms`` are
+    clamped into the last bucket.
+    """
+
+    precision_bits: int
+    max_value_ms: float
+
+    def __init__(self, precision_bits: int = 5, max_value_ms: float = 3_600_000.0) -> None:
+        self.precision_bits = precision_bits
+        self.max_value_ms = max_value_ms
+        self._half = 1 << (precision_bits - 1)
+        self._max_micros = int(max_value_ms * 1000)
+        self._counts = [0] * (self._index(self._max_micros) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def record(self, value_ms: float) -> None:
+        value_ms = max(value_ms, 0.0)
+        micros = min(int(value_ms * 1000), self._max_micros)
+        self._counts[self._index(micros)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.min_ms = min(self.min_ms, value_ms)
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, quantile: float) -> float | None:
+        """Return the value at ``quantile`` (0-100), or None when empty."""
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(quantile / 100 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = self._bounds(index)
+                value = (low + high) / 2 / 1000
+                return min(max(value, self.min_ms), self.max_ms)
+        return self.max_ms
+
+    def merge(self, other: LatencyHistogram) -> None:
+        if other.precision_bits != self.precision_bits or len(other._counts) != len(self._counts):
+            raise ValueError("Histograms must share precision and range to merge")
+        for index, bucket_count in enumerate(other._counts):
+            self._counts[index] += bucket_count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def cumulative_counts(self, bounds_ms: Iterable[float]) -> list[int]:
+        """Count values at or below each of the ascending ``bounds_ms``.
+
+        Counts are resolved at bucket granularity: a bucket is included once its
+        upper edge falls within the bound.
+        """
+        counts: list[int] = []
+        seen = 0
+        index = 0
+        for bound_ms in bounds_ms:
+            limit = int(bound_ms * 1000)
+            while index < len(self._counts) and self._bounds(index)[1] <= limit:
+                seen += self._counts[index]
+                index += 1
+            counts.append(seen)
+        return counts
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        return {
+            "count": self.count,
+            "mean": self.total_ms / self.count if self.count else None,
+            "min": self.min_ms if self.count else None,
+            "max": self.max_ms if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+    def _index(self, micros: int) -> int:
+        if micros < 2 * self._half:
+            return micros
+        shift = micros.bit_length() - self.precision_bits
+        return shift * self._half + (micros >> shift)
+
+    def _bounds(self, index: int) -> tuple[int, int]:
+        if index < 2 * self._half:
+            return index, index
+        shift = index // self._half - 1
+        mantissa = index - shift * self._half
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class MetricsRegistry:
+    """Latency histograms keyed by metric name and label set."""
+
+    def __init__(self, precision_bits: int = 5) -> None:
+        self.precision_bits = precision_bits
+        self._histograms: dict[tuple[str, LabelSet], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, value_ms: float, **labels: object) -> None:
+        key = (metric, _label_set(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = LatencyHistogram(self.precision_bits)
+                self._histograms[key] = histogram
+            histogram.record(value_ms)
+
+    def histogram(self, metric: str, **labels: object) -> LatencyHistogram:
+        """Merge every series of ``metric`` whose labels include ``labels``."""
+        wanted = set(_label_set(labels))
+        merged = LatencyHistogram(self.precision_bits)
+        with self._lock:
+            for (name, label_set), histogram in self._histograms.items():
+                if name == metric and wanted.issubset(label_set):
+                    merged.merge(histogram)
+        return merged
+
+    def percentile(self, metric: str, quantile: float, **labels: object) -> float | None:
+        return self.histogram(metric, **labels).percentile(quantile)
+
+    def series(self) -> Iterable[tuple[str, dict[str, str], LatencyHistogram]]:
+        with self._lock:
+            items = list(self._histograms.items())
+        for (metric, label_set), histogram in items:
+            yield metric, dict(label_set), histogram
+
+    def snapshot(self) -> dict[str, list[dict[str, object]]]:
+        result: dict[str, list[dict[str, object]]] = {}
+        for metric, labels, histogram in self.series():
+            result.setdefault(metric, []).append({"labels": labels, **histogram.snapshot()})
+        return result
+
+
+def _label_set(labels: dict[str, object]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .metrics import MetricsRegistry
+from .tracker import ExecutionTracker
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS_MS = (
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    100.0,
+    250.0,
+    500.0,
+    1_000.0,
+    2_500.0,
+    5_000.0,
+    10_000.0,
+    30_000.0,
+    60_000.0,
+    300_000.0,
+)
+
+
+class PrometheusWriter:
+    """Builds a Prometheus text exposition (format 0.0.4)."""
+
+    namespace: str
+    _lines: list[str]
+    _declared: set[str]
+
+    def __init__(self, namespace: str = "mas") -> None:
+        self.namespace = namespace
+        self._lines = []
+        self._declared = set()
+
+    def counter(
+        self, name: str, value: float, help_text: str, **labels: object
+    ) -> None:
+        self._sample(f"{name}_total", "counter", value, help_text, labels)
+
+    def gauge(self, name: str, value: float, help_text: str, **labels: object) -> None:
+        self._sample(name, "gauge", value, help_text, labels)
+
+    def histograms(
+        self,
+        registry: MetricsRegistry,
+        buckets_ms: tuple[float, ...] = DEFAULT_BUCKETS_MS,
+    ) -> None:
+        for metric, labels, histogram in sorted(
+            registry.series(), key=lambda item: (item[0], sorted(item[1].items()))
+        ):
+            name = self._declare(metric, "histogram", f"{metric} distribution in milliseconds")
+            for bound, count in zip(
+                buckets_ms, histogram.cumulative_counts(buckets_ms), strict=True
+            ):
+                self._line(f"{name}_bucket", count, {**labels, "le": _format_value(bound)})
+            self._line(f"{name}_bucket", histogram.count, {**labels, "le": "+Inf"})
+            self._line(f"{name}_sum", histogram.total_ms, labels)
+            self._line(f"{name}_count", histogram.count, labels)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n" if self._lines else ""
+
+    def _sample(
+        self,
+        name: str,
+        metric_type: str,
+        value: float,
+        help_text: str,
+        labels: Mapping[str, object],
+    ) -> None:
+        full_name = self._declare(name, metric_type, help_text)
+        self._line(full_name, value, labels)
+
+    def _declare(self, name: str, metric_type: str, help_text: str) -> str:
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        if full_name not in self._declared:
+            self._declared.add(full_name)
+            self._lines.append(f"# HELP {full_name} {help_text}")
+            self._lines.append(f"# TYPE {full_name} {metric_type}")
+        return full_name
+
+    def _line(self, name: str, value: float, labels: Mapping[str, object]) -> None:
+        label_text = ",".join(
+            f'{key}="{_escape_label(str(label))}"'
+            for key, label in labels.items()
+            if label is not None
+        )
+        prefix = f"{name}{{{label_text}}}" if label_text else name
+        self._lines.append(f"{prefix} {_format_value(value)}")
+
+
+def render_metrics(
+    tracker: ExecutionTracker,
+    context_stats: Mapping[str, object] | None = None,
+    llm_stats: Mapping[str, object] | None = None,
+    gauges: Mapping[str, float] | None = None,
+    namespace: str = "mas",
+    buckets_ms: tuple[float, ...] = DEFAULT_BUCKETS_MS,
+) -> str:
+    """Render tracker, context and LLM client metrics as Prometheus text.
+
+    ``context_stats`` is the dict returned by ``ContextManager.get_metrics`` (or
+    ``get_stats``, which adds a token estimate),
+    ``llm_stats`` the one returned by ``LLMClient.get_stats`` and ``gauges`` any
+    extra point-in-time values (for example in-flight tasks).
+    """
+    writer = PrometheusWriter(namespace)
+    summary = tracker.get_summary()
+    event_counts = summary["event_counts"]
+    if isinstance(event_counts, dict):
+        for event, count in sorted(event_counts.items()):
+            writer.counter("events", count, "Execution events recorded", event=event)
+    writer.gauge(
+        "tracker_retained_records", _number(summary["retained_events"]), "Records held in memory"
+    )
+    for name, value in sorted((gauges or {}).items()):
+        writer.gauge(name, value, name.replace("_", " ").capitalize())
+    if context_stats is not None:
+        _write_context_stats(writer, context_stats)
+    if llm_stats is not None:
+        model = llm_stats.get("model")
+        writer.counter(
+            "llm_requests", _number(llm_stats.get("requests")), "LLM requests sent", model=model
+        )
+        writer.counter(
+            "llm_errors", _number(llm_stats.get("errors")), "LLM requests that failed", model=model
+        )
+        writer.counter(
+            "llm_request_duration_ms",
+            _number(llm_stats.get("latency_ms_total")),
+            "Cumulative LLM request latency in milliseconds",
+            model=model,
+        )
+    writer.histograms(tracker.metrics, buckets_ms)
+    return writer.render()
+
+
+class MetricsServer:
+    """Serves ``render()`` at ``/metrics`` from a background thread."""
+
+    host: str
+    port: int
+    _render: Callable[[], str]
+    _server: ThreadingHTTPServer | None
+    _thread: threading.Thread | None
+
+    def __init__(
+        self, render: Callable[[], str], host: str = "127.0.0.1", port: int = 9464
+    ) -> None:
+        self.host = host
+        self.port = port
+        self._render = render
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self) -> MetricsServer:
+        if self._server is not None:
+            return self
+        render = self._render
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                return None
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mas-metrics", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self._server = None
+        self._thread = None
+
+
+def _write_context_stats(writer: PrometheusWriter, stats: Mapping[str, object]) -> None:
+    layer_counts = stats.get("layer_counts")
+    if isinstance(layer_counts, dict):
+        for layer, count in layer_counts.items():
+            writer.gauge("context_entries", count, "Context entries per layer", layer=layer)
+    eviction = stats.get("eviction")
+    if isinstance(eviction, dict):
+        layer_bytes = eviction.get("layer_bytes")
+        if isinstance(layer_bytes, dict):
+            for layer, size in layer_bytes.items():
+                writer.gauge(
+                    "context_bytes", size, "Estimated context bytes per layer", layer=layer
+                )
+        writer.counter(
+            "context_evicted", _number(eviction.get("evicted")), "Context entries evicted"
+        )
+        writer.counter(
+            "context_expired", _number(eviction.get("expired")), "Context entries expired"
+        )
+    if "token_estimate" in stats:
+        writer.gauge(
+            "context_tokens", _number(stats.get("token_estimate")), "Estimated context tokens"
+        )
+    writer.gauge(
+        "context_pending_compressions",
+        _number(stats.get("pending_compressions")),
+        "Background compressions in flight",
+    )
+    for cache in ("summary_cache", "context_cache"):
+        cache_stats = stats.get(cache)
+        if not isinstance(cache_stats, dict):
+            continue
+        cache_name = cache.removesuffix("_cache")
+        writer.gauge("cache_entries", _number(cache_stats.get("size")), "Cache size", cache=cache_name)
+        writer.counter("cache_hits", _number(cache_stats.get("hits")), "Cache hits", cache=cache_name)
+        writer.counter(
+            "cache_misses", _number(cache_stats.get("misses")), "Cache misses", cache=cache_name
+        )
+    packing = stats.get("packing")
+    if isinstance(packing, dict):
+        writer.gauge(
+            "context_packed_entries",
+            _number(packing.get("packed_entries")),
+            "Context entries held compressed",
+        )
+    gc = stats.get("gc")
+    if isinstance(gc, dict):
+        for action, count in gc.items():
+            if action != "policy":
+                writer.counter(
+                    "context_gc", _number(count), "Context entries demoted", action=action
+                )
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _number(value: object) -> float:
+    return value if isinstance(value, (int, float)) else 0
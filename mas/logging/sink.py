@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import atexit
+import json
+import queue
+import threading
+from pathlib import Path
+
+from .events import LogRecord
+
+
+class JsonlSink:
+    """Append-only JSONL writer that serializes and writes records on a background thread."""
+
+    path: Path
+    max_batch: int
+
+    def __init__(self, path: str | Path, max_batch: int = 256) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_batch = max(1, max_batch)
+        self._queue: queue.Queue[LogRecord | None] = queue.Queue()
+        self._file = self.path.open("a", encoding="utf-8")
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="mas-jsonl-sink", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, record: LogRecord) -> None:
+        if self._closed:
+            raise ValueError("JSONL sink is closed")
+        self._queue.put(record)
+
+    def flush(self) -> None:
+        """Block until every queued record has been written to the file."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = [
+                json.dumps(record.to_dict(), ensure_ascii=False, default=str)
+                for record in batch
+                if record is not None
+            ]
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+            if self._queue.empty():
+                self._file.flush()
+            for _ in batch:
+                self._queue.task_done()
+            if None in batch:
+                self._file.flush()
+                return
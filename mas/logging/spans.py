@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, object] = field(default_factory=dict)
+    status_code: int = STATUS_UNSET
+    status_message: str | None = None
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: object) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException | str) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = str(error)
+
+    def to_otlp(self) -> dict[str, object]:
+        payload: dict[str, object] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns if self.end_ns is not None else self.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id is not None:
+            payload["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            payload["status"] = {"code": self.status_code, "message": self.status_message}
+        return payload
+
+
+class SpanTracer:
+    """Hierarchical span tracer.
+
+    The active span is tracked in a ``ContextVar``, so spans opened inside tasks
+    started with ``asyncio.gather``/``create_task`` are parented to the span that
+    was active when the task was created. Timestamps are wall-clock anchored at
+    construction and advanced with ``perf_counter_ns``, so durations are monotonic.
+    Each root span starts a new trace.
+    """
+
+    service_name: str
+    spans: deque[Span]
+
+    def __init__(
+        self,
+        service_name: str = "mas",
+        resource_attributes: dict[str, object] | None = None,
+        max_spans: int | None = None,
+    ) -> None:
+        self.service_name = service_name
+        self.resource_attributes = dict(resource_attributes or {})
+        self.spans = deque(maxlen=max_spans)
+        self._active: ContextVar[Span | None] = ContextVar("mas_active_span", default=None)
+        self._anchor_wall_ns = time.time_ns()
+        self._anchor_perf_ns = time.perf_counter_ns()
+        self._listeners: list[Callable[[Span], None]] = []
+
+    @property
+    def current_span(self) -> Span | None:
+        return self._active.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes: object) -> Iterator[Span]:
+        span = self.start_span(name, **attributes)
+        token = self._active.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.set_error(error)
+            raise
+        finally:
+            self._active.reset(token)
+            self.end_span(span)
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """Call ``listener`` with every span as it ends."""
+        self._listeners.append(listener)
+
+    def start_span(self, name: str, **attributes: object) -> Span:
+        parent = self._active.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_span_id=parent.span_id if parent is not None else None,
+            start_ns=self._now_ns(),
+            attributes=dict(attributes),
+        )
+
+    def end_span(self, span: Span) -> None:
+        if span.end_ns is not None:
+            return
+        span.end_ns = self._now_ns()
+        if span.status_code == STATUS_UNSET:
+            span.status_code = STATUS_OK
+        self.spans.append(span)
+        for listener in self._listeners:
+            listener(span)
+
+    def to_otlp(self) -> dict[str, object]:
+        resource = {"service.name": self.service_name, **self.resource_attributes}
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in resource.items()
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "mas"},
+                            "spans": [span.to_otlp() for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export_otlp_json(self, path: str | Path) -> None:
+        Path(path).write_text(
+            json.dumps(self.to_otlp(), ensure_ascii=False), encoding="utf-8"
+        )
+
+    def _now_ns(self) -> int:
+        return self._anchor_wall_ns + (time.perf_counter_ns() - self._anchor_perf_ns)
+
+
+def _otlp_value(value: object) -> dict[str, object]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
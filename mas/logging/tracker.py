@@ -2,23 +2,74 @@ from __future__ import annotations
 
 import json
 import time
-from dataclasses import asdict
+from collections import Counter, deque
+from collections.abc import Iterator
 from pathlib import Path
+from typing import TypeVar
 
 from ..core.schemas import TaskResult, WorkflowResult
+from .blobs import BlobStore
+from .chrome_trace import export_chrome_trace
 from .events import LogEvent, LogRecord
+from .metrics import MetricsRegistry
+from .sink import JsonlSink
+from .spans import Span, SpanTracer
+
+K = TypeVar("K")
 
 
 class ExecutionTracker:
+    """Records execution events.
+
+    With ``max_records`` only the most recent records are kept in memory; with
+    ``sink_path`` every record is also streamed to an append-only JSONL file, which
+    then holds the complete history. Summaries come from running counters, so they
+    cover every event regardless of how many records are retained. With a
+    ``blob_store`` prompts and responses are stored once by content hash and the
+    records keep only ``<field>_digest``/``<field>_length``; use ``lookup`` or
+    ``expand`` to get the text back. ``tracer`` records hierarchical spans
+    alongside the flat events, and finished spans feed the latency histograms
+    behind ``get_metrics``. Retained records are indexed by task, event and
+    agent; ``query``, ``latest`` and ``aggregate_durations`` use the indexes
+    instead of scanning ``records``.
+    """
+
     session_id: str
-    records: list[LogRecord]
+    records: deque[LogRecord]
+    sink: JsonlSink | None
+    blob_store: BlobStore | None
+    tracer: SpanTracer
+    metrics: MetricsRegistry
     _timers: dict[str, float]
+    _event_counts: Counter[str]
+    _total_events: int
+    _by_task: dict[str, deque[LogRecord]]
+    _by_event: dict[LogEvent, deque[LogRecord]]
+    _by_agent: dict[str, deque[LogRecord]]
 
-    def __init__(self, session_id: str) -> None:
+    def __init__(
+        self,
+        session_id: str,
+        sink_path: str | Path | None = None,
+        max_records: int | None = None,
+        blob_store: BlobStore | None = None,
+        tracer: SpanTracer | None = None,
+    ) -> None:
         self.session_id = session_id
-        self.records = []
+        self.records = deque(maxlen=max_records)
+        self.sink = JsonlSink(sink_path) if sink_path is not None else None
+        self.blob_store = blob_store
+        self.tracer = tracer or SpanTracer(
+            resource_attributes={"session.id": session_id}, max_spans=max_records
+        )
+        self.metrics = MetricsRegistry()
+        self.tracer.add_listener(self._observe_span)
         self._timers = {}
-        self.session_id = self.session_id
+        self._event_counts = Counter()
+        self._total_events = 0
+        self._by_task = {}
+        self._by_event = {}
+        self._by_agent = {}
 
     def log_workflow_start(self, task_description: str) -> None:
         self._timers["workflow"] = time.time()
@@ -39,13 +90,15 @@ class ExecutionTracker:
             duration_ms=duration_ms,
         )
 
-    def log_task_start(self, task_id: str, agent_name: str) -> None:
+    def log_task_start(
+        self, task_id: str, agent_name: str, dependencies: list[str] | None = None
+    ) -> None:
         self._timers[task_id] = time.time()
         self._add_record(
             LogEvent.TASK_START,
             task_id=task_id,
             agent_name=agent_name,
-            data={},
+            data={"dependencies": dependencies} if dependencies is not None else {},
         )
 
     def log_agent_selected(self, task_id: str, agent_name: str) -> None:
@@ -56,20 +109,30 @@ class ExecutionTracker:
             data={},
         )
 
-    def log_llm_request(self, task_id: str, agent_name: str, prompt: str) -> None:
+    def log_llm_request(
+        self, task_id: str, agent_name: str, prompt: str, tokens: int | None = None
+    ) -> None:
+        data = self._text_field("prompt", prompt)
+        if tokens is not None:
+            data["prompt_tokens"] = tokens
         self._add_record(
             LogEvent.LLM_REQUEST,
             task_id=task_id,
             agent_name=agent_name,
-            data={"prompt": prompt},
+            data=data,
         )
 
-    def log_llm_response(self, task_id: str, agent_name: str, response: str) -> None:
+    def log_llm_response(
+        self, task_id: str, agent_name: str, response: str, tokens: int | None = None
+    ) -> None:
+        data = self._text_field("response", response)
+        if tokens is not None:
+            data["response_tokens"] = tokens
         self._add_record(
             LogEvent.LLM_RESPONSE,
             task_id=task_id,
             agent_name=agent_name,
-            data={"response": response},
+            data=data,
         )
 
     def log_task_end(self, task_id: str, result: TaskResult) -> None:
@@ -108,15 +171,144 @@ class ExecutionTracker:
     def get_summary(self) -> dict[str, object]:
         return {
             "session_id": self.session_id,
-            "total_events": len(self.records),
+            "total_events": self._total_events,
+            "retained_events": len(self.records),
             "event_counts": self._count_events(),
         }
 
+    def get_metrics(self) -> dict[str, list[dict[str, object]]]:
+        """Latency percentiles per metric and label set (agent, model, capability)."""
+        return self.metrics.snapshot()
+
+    def query(
+        self,
+        event: LogEvent | None = None,
+        task_id: str | None = None,
+        agent_name: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> list[LogRecord]:
+        """Return retained records matching every given filter, oldest first.
+
+        ``since``/``until`` bound ``timestamp`` (inclusive). Candidates come from
+        the smallest matching index, so selective filters never scan ``records``.
+        """
+        candidates = self._candidates(event, task_id, agent_name)
+        return [
+            record
+            for record in candidates
+            if (event is None or record.event == event)
+            and (task_id is None or record.task_id == task_id)
+            and (agent_name is None or record.agent_name == agent_name)
+            and (since is None or record.timestamp >= since)
+            and (until is None or record.timestamp <= until)
+        ]
+
+    def latest(
+        self,
+        event: LogEvent | None = None,
+        task_id: str | None = None,
+        agent_name: str | None = None,
+    ) -> LogRecord | None:
+        """Return the most recent retained record matching the filters."""
+        for record in reversed(self._candidates(event, task_id, agent_name)):
+            if (
+                (event is None or record.event == event)
+                and (task_id is None or record.task_id == task_id)
+                and (agent_name is None or record.agent_name == agent_name)
+            ):
+                return record
+        return None
+
+    def aggregate_durations(
+        self,
+        group_by: str = "agent_name",
+        event: LogEvent = LogEvent.TASK_END,
+        **filters: object,
+    ) -> dict[str | None, dict[str, float]]:
+        """Sum ``duration_ms`` of matching records grouped by a record attribute.
+
+        ``group_by`` is ``"agent_name"``, ``"task_id"`` or ``"event"``; extra
+        keyword filters are passed to ``query``.
+        """
+        if group_by not in {"agent_name", "task_id", "event"}:
+            raise ValueError(f"Cannot group tracker records by {group_by!r}")
+        groups: dict[str | None, dict[str, float]] = {}
+        for record in self.query(event=event, **filters):  # type: ignore[arg-type]
+            if record.duration_ms is None:
+                continue
+            key = getattr(record, group_by)
+            key = key.value if isinstance(key, LogEvent) else key
+            stats = groups.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += record.duration_ms
+            stats["max_ms"] = max(stats["max_ms"], record.duration_ms)
+        for stats in groups.values():
+            stats["mean_ms"] = stats["total_ms"] / stats["count"]
+        return groups
+
     def export_json(self, path: str) -> None:
-        payload = [asdict(record) for record in self.records]
-        _ = Path(path).write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
+        """Write the full history as a JSON array, streaming one record at a time.
+
+        When a sink is attached the history is read back from the JSONL file, so
+        records that have already left the in-memory ring buffer are included.
+        """
+        with Path(path).open("w", encoding="utf-8") as output:
+            output.write("[")
+            for index, line in enumerate(self._iter_history_lines()):
+                output.write(",\n" if index else "\n")
+                output.write(line)
+            output.write("\n]\n")
+
+    def export_jsonl(self, path: str) -> None:
+        with Path(path).open("w", encoding="utf-8") as output:
+            for line in self._iter_history_lines():
+                output.write(line + "\n")
+
+    def lookup(self, digest: str) -> str | None:
+        if self.blob_store is None:
+            return None
+        return self.blob_store.get(digest)
+
+    def expand(self, record: LogRecord) -> dict[str, object]:
+        """Return the record's data with blob digests replaced by their text."""
+        data = dict(record.data)
+        for key, value in record.data.items():
+            if key.endswith("_digest") and isinstance(value, str):
+                field = key.removesuffix("_digest")
+                data[field] = self.lookup(value)
+                data.pop(key)
+                data.pop(f"{field}_length", None)
+        return data
+
+    def export_chrome_trace(self, path: str) -> None:
+        export_chrome_trace(self.tracer.spans, path)
+
+    def flush(self) -> None:
+        if self.sink is not None:
+            self.sink.flush()
+        if self.blob_store is not None:
+            self.blob_store.flush()
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.sink.close()
+        if self.blob_store is not None:
+            self.blob_store.close()
+
+    def _iter_history_lines(self) -> Iterator[str]:
+        if self.sink is None:
+            for record in self.records:
+                yield json.dumps(record.to_dict(), ensure_ascii=False, default=str)
+            return
+
+        if not self.sink.closed:
+            self.sink.flush()
+        with self.sink.path.open(encoding="utf-8") as history:
+            for line in history:
+                line = line.strip()
+                if line and json.loads(line).get("session_id") == self.session_id:
+                    yield line
 
     def _add_record(
         self,
@@ -135,7 +327,81 @@ class ExecutionTracker:
             data=data,
             duration_ms=duration_ms,
         )
+        if self.records.maxlen is not None and len(self.records) == self.records.maxlen:
+            self._unindex(self.records[0])
         self.records.append(record)
+        self._index(record)
+        self._event_counts[event.value] += 1
+        self._total_events += 1
+        if self.sink is not None:
+            self.sink.write(record)
+
+    def _index(self, record: LogRecord) -> None:
+        self._by_event.setdefault(record.event, deque()).append(record)
+        if record.task_id is not None:
+            self._by_task.setdefault(record.task_id, deque()).append(record)
+        if record.agent_name is not None:
+            self._by_agent.setdefault(record.agent_name, deque()).append(record)
+
+    def _unindex(self, record: LogRecord) -> None:
+        # The ring buffer evicts oldest-first, so the record heads each of its buckets.
+        _pop_oldest(self._by_event, record.event)
+        if record.task_id is not None:
+            _pop_oldest(self._by_task, record.task_id)
+        if record.agent_name is not None:
+            _pop_oldest(self._by_agent, record.agent_name)
+
+    def _candidates(
+        self, event: LogEvent | None, task_id: str | None, agent_name: str | None
+    ) -> deque[LogRecord]:
+        buckets: list[deque[LogRecord]] = []
+        if event is not None:
+            buckets.append(self._by_event.get(event, deque()))
+        if task_id is not None:
+            buckets.append(self._by_task.get(task_id, deque()))
+        if agent_name is not None:
+            buckets.append(self._by_agent.get(agent_name, deque()))
+        if not buckets:
+            return self.records
+        return min(buckets, key=len)
+
+    def _observe_span(self, span: Span) -> None:
+        duration_ms = span.duration_ms
+        if duration_ms is None:
+            return
+        attributes = span.attributes
+        if span.name == "task":
+            labels = {
+                "agent": attributes.get("agent"),
+                "capability": attributes.get("capability"),
+            }
+            self.metrics.observe("task_duration_ms", duration_ms, **labels)
+            queue_wait_ms = attributes.get("queue_wait_ms")
+            if isinstance(queue_wait_ms, (int, float)):
+                self.metrics.observe("queue_wait_ms", queue_wait_ms, **labels)
+        elif span.name == "llm.attempt":
+            self.metrics.observe(
+                "llm_latency_ms",
+                duration_ms,
+                agent=attributes.get("agent"),
+                model=attributes.get("model"),
+            )
+        elif span.name.startswith("hook."):
+            self.metrics.observe(
+                "hook_ms", duration_ms, hook=span.name.removeprefix("hook.")
+            )
+        elif span.name == "context.build":
+            self.metrics.observe("context_assembly_ms", duration_ms)
+        elif span.name == "context.compress":
+            self.metrics.observe("compression_ms", duration_ms)
+
+    def _text_field(self, field: str, text: str) -> dict[str, object]:
+        if self.blob_store is None:
+            return {field: text}
+        return {
+            f"{field}_digest": self.blob_store.put(text),
+            f"{field}_length": len(text),
+        }
 
     def _pop_timer_ms(self, key: str) -> float | None:
         start = self._timers.pop(key, None)
@@ -144,7 +410,11 @@ class ExecutionTracker:
         return (time.time() - start) * 1000
 
     def _count_events(self) -> dict[str, int]:
-        counts: dict[str, int] = {}
-        for record in self.records:
-            counts[record.event.value] = counts.get(record.event.value, 0) + 1
-        return counts
+        return dict(self._event_counts)
+
+
+def _pop_oldest(index: dict[K, deque[LogRecord]], key: K) -> None:
+    bucket = index[key]
+    bucket.popleft()
+    if not bucket:
+        del index[key]
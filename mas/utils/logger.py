@@ -1,31 +1,198 @@
 from __future__ import annotations
 
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+ROOT_LOGGER = "mas"
+TEXT_FORMAT = "[%(asctime)s] %(levelname)s %(name)s: %(message)s"
+
+_RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime", "taskName"}
+
+_lock = threading.Lock()
+_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+_attached: list[logging.Logger] = []
+_foreign: set[str] = set()
+_leveled: list[str] = []
+_configured = False
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as one JSON object; ``extra`` fields become keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """``RotatingFileHandler`` that creates its directory on the first write."""
+
+    def __init__(self, filename: str | Path, max_bytes: int, backup_count: int) -> None:
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+
+    def _open(self):  # type: ignore[no-untyped-def]
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Resolves the message on the caller's thread and leaves formatting to the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        prepared = logging.makeLogRecord(vars(record))
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared.exc_info = None
+        return prepared
+
+
+def configure_logging(
+    level: int | str = logging.INFO,
+    module_levels: Mapping[str, int | str] | None = None,
+    log_dir: str | Path | None = "logs",
+    filename: str = "mas.log",
+    stream: bool = True,
+    stream_format: str = "text",
+    max_bytes: int = 1_000_000,
+    backup_count: int = 3,
+    propagate: bool = True,
+) -> QueueListener:
+    """Route ``mas`` logging through a queue so callers never block on I/O.
+
+    Loggers only enqueue records; a ``QueueListener`` thread writes them to
+    stderr (``stream_format`` ``"text"`` or ``"json"``) and, unless ``log_dir``
+    is None, to a rotating JSON-lines file that is created on the first write.
+    ``module_levels`` sets levels per logger name, e.g.
+    ``{"mas.hooks.audit": "WARNING"}``. Records still propagate to the Python
+    root logger (and so to pytest's ``caplog``) unless ``propagate`` is False.
+    Calling it again replaces the previous configuration, including the stderr
+    default that ``get_logger`` installs when nothing was configured.
+    """
+    global _configured
+
+    handlers: list[logging.Handler] = []
+    if stream:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(
+            JsonLinesFormatter() if stream_format == "json" else logging.Formatter(TEXT_FORMAT)
+        )
+        handlers.append(stream_handler)
+    if log_dir is not None:
+        file_handler = LazyRotatingFileHandler(Path(log_dir) / filename, max_bytes, backup_count)
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+
+    with _lock:
+        _configured = True
+        return _install_locked(handlers, level, module_levels, propagate)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    with _lock:
+        _shutdown_locked()
+
 
 def get_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
-    if logger.handlers:
-        return logger
-
-    logger.setLevel(logging.INFO)
-    formatter = logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s")
-
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
-
-    log_path = Path("logs")
-    log_path.mkdir(parents=True, exist_ok=True)
-    file_handler = RotatingFileHandler(
-        log_path / "mas.log",
-        maxBytes=1_000_000,
-        backupCount=3,
-        encoding="utf-8",
-    )
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    """Return a logger.
 
+    The first call installs a queue-backed INFO handler on stderr for ``mas``
+    unless ``configure_logging`` already ran; no log file is written by default.
+    """
+    global _configured
+
+    logger = logging.getLogger(name)
+    with _lock:
+        if not _configured:
+            _configured = True
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            _install_locked([stream_handler], logging.INFO, None, True)
+        if name != ROOT_LOGGER and not name.startswith(f"{ROOT_LOGGER}."):
+            _foreign.add(name)
+            if _queue_handler is not None and _queue_handler not in logger.handlers:
+                logger.addHandler(_queue_handler)
+                _attached.append(logger)
     return logger
+
+
+def _install_locked(
+    handlers: list[logging.Handler],
+    level: int | str,
+    module_levels: Mapping[str, int | str] | None,
+    propagate: bool,
+) -> QueueListener:
+    global _listener, _queue_handler
+
+    _shutdown_locked()
+    queue_handler = _RecordQueueHandler(queue.SimpleQueue())
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.propagate = propagate
+    root.addHandler(queue_handler)
+    _attached.append(root)
+    for name in _foreign:
+        logger = logging.getLogger(name)
+        logger.addHandler(queue_handler)
+        _attached.append(logger)
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+        _leveled.append(name)
+
+    _listener = listener
+    _queue_handler = queue_handler
+    return listener
+
+
+def _shutdown_locked() -> None:
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    if _queue_handler is not None:
+        for logger in _attached:
+            logger.removeHandler(_queue_handler)
+    _attached.clear()
+    for name in _leveled:
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    _leveled.clear()
+    _listener = None
+    _queue_handler = None
+
+
+atexit.register(shutdown_logging)
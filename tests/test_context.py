@@ -1,4 +1,7 @@
+import asyncio
+import json
 import math
+import sys
 import time
 
 import pytest
@@ -12,7 +15,17 @@ from mas.context import (
     ContextStore,
     ContextType,
     ContextWindow,
+    DemotionPolicy,
+    EstimatingTokenizer,
+    LayerLimits,
+    ScoreEvictionPolicy,
+    SQLiteBackend,
+    StaleEntryError,
+    SummaryCache,
+    Tokenizer,
+    TokenizerRegistry,
 )
+from mas.context.dedup import deduplicate, hamming_distance, simhash
 
 
 def make_entry(
@@ -93,6 +106,22 @@ def test_context_entry_increment_access() -> None:
     assert entry.access_count == 1
 
 
+def test_context_entry_compact_representation() -> None:
+    source = "".join(["task", "-shared"])
+    entry = make_entry(
+        "compact",
+        ContextType.DEPENDENCY_OUTPUT,
+        source=source,
+        parent_id="".join(["task", "-parent"]),
+        related_ids=["task-a", "task-b"],
+    )
+
+    assert not hasattr(entry, "__dict__")
+    assert entry.related_ids == ("task-a", "task-b")
+    assert entry.source is sys.intern("task-shared")
+    assert entry.parent_id is sys.intern("task-parent")
+
+
 # ContextStore tests
 def test_store_add_and_get(context_store: ContextStore) -> None:
     entry = make_entry("task-entry", ContextType.DEPENDENCY_OUTPUT)
@@ -197,6 +226,157 @@ def test_store_clear_layer(context_store: ContextStore) -> None:
     assert context_store.get_layer(ContextLayer.TASK)
 
 
+def test_store_ttl_expires_lazily(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1_000.0
+    monkeypatch.setattr("mas.context.types.time.time", lambda: now)
+    monkeypatch.setattr("mas.context.store.time.time", lambda: now)
+    store = ContextStore("session-ttl")
+    store.add(ContextLayer.WORKFLOW, make_entry("short", ttl=10, timestamp=now))
+    store.add(ContextLayer.WORKFLOW, make_entry("forever", timestamp=now))
+
+    now = 1_020.0
+
+    assert store.get("short") is None
+    assert set(store.get_layer(ContextLayer.WORKFLOW)) == {"forever"}
+    assert store.get_eviction_stats()["expired"] == 1
+
+
+def test_store_periodic_sweep(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1_000.0
+    monkeypatch.setattr("mas.context.types.time.time", lambda: now)
+    monkeypatch.setattr("mas.context.store.time.time", lambda: now)
+    store = ContextStore("session-sweep", sweep_interval=30.0)
+    store.add(ContextLayer.TASK, make_entry("stale", ttl=5, timestamp=now))
+
+    now = 1_040.0
+    store.add(ContextLayer.TASK, make_entry("fresh", timestamp=now))
+
+    assert store.get_layer(ContextLayer.TASK).keys() == {"fresh"}
+
+
+def test_store_capacity_evicts_least_recently_used(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = 1_000.0
+    monkeypatch.setattr("mas.context.types.time.time", lambda: now)
+    store = ContextStore(
+        "session-lru", limits={ContextLayer.TASK: LayerLimits(max_entries=2)}
+    )
+    store.add(ContextLayer.TASK, make_entry("old", timestamp=now - 30))
+    store.add(ContextLayer.TASK, make_entry("used", timestamp=now - 20))
+    assert store.get("used") is not None
+
+    store.add(ContextLayer.TASK, make_entry("new", timestamp=now))
+
+    assert set(store.get_layer(ContextLayer.TASK)) == {"used", "new"}
+    assert store.get_eviction_stats()["evicted"] == 1
+
+
+def test_store_byte_limit_with_score_policy() -> None:
+    store = ContextStore(
+        "session-bytes",
+        limits={ContextLayer.WORKFLOW: LayerLimits(max_bytes=25)},
+        eviction_policy=ScoreEvictionPolicy(),
+    )
+    store.add(ContextLayer.WORKFLOW, make_entry("low", content="x" * 10, importance=0.1))
+    store.add(ContextLayer.WORKFLOW, make_entry("high", content="y" * 10, importance=0.9))
+    store.add(ContextLayer.WORKFLOW, make_entry("newest", content="z" * 10))
+
+    assert set(store.get_layer(ContextLayer.WORKFLOW)) == {"high", "newest"}
+    assert store.get_eviction_stats()["layer_bytes"]["workflow"] == 20
+
+
+def test_sqlite_backend_persists_across_reopen(tmp_path) -> None:
+    db_path = tmp_path / "context.db"
+    store = ContextStore("session-db", backend=SQLiteBackend(db_path, "session-db"))
+    store.add(
+        ContextLayer.TASK,
+        make_entry(
+            "dep-out",
+            ContextType.DEPENDENCY_OUTPUT,
+            content={"files": ["app.py"]},
+            source="task-a",
+            related_ids=["task-b"],
+        ),
+    )
+    store.add(ContextLayer.WORKFLOW, make_entry("shared", content="cfg"), key="config")
+    assert store.get("dep-out") is not None
+    store.close()
+
+    reopened = ContextStore("session-db", backend=SQLiteBackend(db_path, "session-db"))
+    restored = reopened.get("dep-out")
+
+    assert restored is not None
+    assert restored.content == {"files": ["app.py"]}
+    assert restored.access_count == 2
+    assert [entry.id for entry in reopened.backend.find_for_task("task-b")] == ["dep-out"]
+    assert reopened.get_by_key(ContextLayer.WORKFLOW, "config").content == "cfg"
+    assert {entry.id for entry in reopened.get_by_type(ContextType.SHARED_STATE)} == {
+        "shared"
+    }
+    reopened.close()
+
+
+def test_sqlite_backend_hot_cache_is_bounded(tmp_path) -> None:
+    backend = SQLiteBackend(tmp_path / "cache.db", "session-cache", cache_size=2)
+    store = ContextStore("session-cache", backend=backend)
+    for index in range(5):
+        store.add(ContextLayer.TASK, make_entry(f"entry-{index}"))
+
+    first = store.get("entry-0")
+
+    assert first is not None and first.access_count == 1
+    assert len(backend._cache) == 2
+    assert backend.layer_count(ContextLayer.TASK) == 5
+    assert store.remove("entry-0") is True
+    assert store.get("entry-0") is None
+    store.close()
+
+
+def test_sqlite_backend_write_back_keeps_other_process_updates(tmp_path) -> None:
+    db_path = tmp_path / "shared.db"
+    first = SQLiteBackend(db_path, "session-shared")
+    second = SQLiteBackend(db_path, "session-shared")
+    first.put(ContextLayer.TASK, "entry", make_entry("entry", content="v1"), 2)
+
+    stale, _, _ = first.resolve("entry")
+    fresh, _, _ = second.resolve("entry")
+    fresh.content = "v2"
+    second.put(ContextLayer.TASK, "entry", fresh, 2)
+    stale.increment_access()
+    first.flush()
+
+    payload = second._conn.execute("SELECT payload FROM context_entries").fetchone()[0]
+    assert json.loads(payload)["content"] == "v2"
+    assert first.get_by_key(ContextLayer.TASK, "entry").content == "v2"
+
+    version = second._conn.execute("SELECT version FROM context_entries").fetchone()[0]
+    second.flush()
+    assert second._conn.execute("SELECT version FROM context_entries").fetchone()[0] == version
+    first.close()
+    second.close()
+
+
+def test_sqlite_backend_reads_and_puts_check_row_versions(tmp_path) -> None:
+    db_path = tmp_path / "shared.db"
+    first = ContextStore("session-shared", backend=SQLiteBackend(db_path, "session-shared"))
+    second = ContextStore("session-shared", backend=SQLiteBackend(db_path, "session-shared"))
+    first.add(ContextLayer.TASK, make_entry("e0", content="v1"))
+    stale, layer, key = first.backend.resolve("e0")
+
+    second.update("e0", content="v2")
+    with pytest.raises(StaleEntryError):
+        first.backend.put(layer, key, stale, 2)
+    assert first.get("e0").content == "v2"
+
+    second.update("e0", content="v3")
+    assert first.update("e0", importance=0.9)
+    refreshed = second.get("e0")
+    assert (refreshed.content, refreshed.importance) == ("v3", 0.9)
+    first.close()
+    second.close()
+
+
 # ContextScorer tests
 def test_scorer_task_importance() -> None:
     scorer = ContextScorer()
@@ -276,6 +456,42 @@ def test_window_count_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
     assert tokens == math.ceil(len(text) / 4)
 
 
+def test_estimating_tokenizer_counts_cjk() -> None:
+    estimator = EstimatingTokenizer(cjk_tokens_per_char=1.0)
+
+    assert estimator.count("abcdefgh") == 2
+    assert estimator.count("前置任务的输出") == 7
+    assert estimator.count_batch(["", "共享状态 ok"]) == [0, 5]
+
+
+class WordTokenizer(Tokenizer):
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+
+def test_window_uses_registry_tokenizer_from_local_cache(tmp_path) -> None:
+    (tmp_path / "words.vocab").write_text("", encoding="utf-8")
+    registry = TokenizerRegistry(cache_dir=tmp_path)
+    registry.register(
+        "demo",
+        "words.vocab",
+        lambda path: WordTokenizer() if path.exists() else None,
+    )
+    registry.register(
+        "missing",
+        "absent.vocab",
+        lambda path: WordTokenizer() if path.exists() else None,
+        EstimatingTokenizer(cjk_tokens_per_char=0.5),
+    )
+
+    exact = ContextWindow(model="demo-large", registry=registry)
+    fallback = ContextWindow(model="missing-model", registry=registry)
+
+    assert exact.count_tokens("one two three") == 3
+    assert exact.count_tokens_batch(["a b", "c"]) == [2, 1]
+    assert fallback.count_tokens("上下文管理") == 3
+
+
 def test_window_select_within_budget(monkeypatch: pytest.MonkeyPatch) -> None:
     now = 5_000.0
     monkeypatch.setattr("mas.context.types.time.time", lambda: now)
@@ -343,6 +559,81 @@ async def test_compressor_summarize_fallback() -> None:
     assert summary == compressor.truncate_smart(text, 80)
 
 
+@pytest.mark.asyncio
+async def test_compressor_extractive_tier_keeps_conclusion() -> None:
+    client = CountingLLMClient()
+    compressor = ContextCompressor(client)  # type: ignore[arg-type]
+    filler = "这里是与主题无关的铺垫内容，用于占据篇幅。" * 30
+    code = "```python\ndef handler():\n    return 'ok'\n```"
+    text = f"{filler}\n{code}\n最终结论：采用 Flask 实现登录 API。"
+
+    summary = await compressor.summarize(text, max_length=120)
+
+    assert len(summary) <= 120
+    assert summary.endswith("最终结论：采用 Flask 实现登录 API。")
+    assert code in summary
+    assert client.calls == 0
+
+
+class CountingLLMClient:
+    model = "test-model"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def acomplete(self, prompt: str, **_kwargs: object) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return f"summary #{self.calls}"
+
+
+@pytest.mark.asyncio
+async def test_compressor_caches_and_coalesces_summaries(tmp_path) -> None:
+    client = CountingLLMClient()
+    compressor = ContextCompressor(
+        client,  # type: ignore[arg-type]
+        cache=SummaryCache(directory=tmp_path),
+    )
+    text = "repeated output " * 100
+
+    concurrent = await asyncio.gather(
+        compressor.summarize(text, max_length=200),
+        compressor.summarize(text, max_length=200),
+    )
+    repeated = await compressor.summarize(text, max_length=200)
+
+    assert concurrent == ["summary #1", "summary #1"]
+    assert repeated == "summary #1"
+    assert client.calls == 1
+    stats = compressor.cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["coalesced"] == 1
+
+    restarted = ContextCompressor(
+        client,  # type: ignore[arg-type]
+        cache=SummaryCache(directory=tmp_path),
+    )
+    assert await restarted.summarize(text, max_length=200) == "summary #1"
+    assert restarted.cache.get_stats()["disk_hits"] == 1
+    assert await restarted.summarize(text, max_length=100) == "summary #2"
+
+
+@pytest.mark.asyncio
+async def test_compressor_coalesced_callers_survive_leader_cancellation() -> None:
+    compressor = ContextCompressor(CountingLLMClient())  # type: ignore[arg-type]
+    text = "repeated output " * 100
+
+    leader = asyncio.create_task(compressor.summarize(text, max_length=200))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(compressor.summarize(text, max_length=200))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == compressor.truncate_smart(text, 200)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
 # ContextManager tests
 @pytest.mark.asyncio
 async def test_manager_add_task_output(context_manager: ContextManager) -> None:
@@ -358,7 +649,7 @@ async def test_manager_add_task_output(context_manager: ContextManager) -> None:
     assert entry_id
     assert len(entries) == 1
     assert "Agent: agent-one" in entries[0].content
-    assert entries[0].related_ids == ["task-beta"]
+    assert entries[0].related_ids == ("task-beta",)
 
 
 @pytest.mark.asyncio
@@ -395,6 +686,457 @@ async def test_manager_get_context_for_task(context_manager: ContextManager) ->
     assert "shared-info" in context_text
 
 
+class GatedLLMClient:
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def acomplete(self, prompt: str, **_kwargs: object) -> str:
+        self.calls += 1
+        await self.release.wait()
+        return "LLM summary"
+
+
+@pytest.mark.asyncio
+async def test_manager_compresses_in_background() -> None:
+    client = GatedLLMClient()
+    manager = ContextManager(
+        session_id="session-bg",
+        llm_client=client,  # type: ignore[arg-type]
+        max_tokens=4_000,
+        compression_deadline=0.01,
+    )
+    long_output = "没有句子边界的超长输出" * 500
+
+    entry_id = await manager.add_task_output("task-one", long_output, "agent-a")
+    stored = manager.store.get(entry_id)
+
+    assert stored is not None and stored.is_compressed is False
+    assert manager.get_stats()["pending_compressions"] == 1
+
+    context_text = await manager.get_context_for_task("task-two", ["task-one"])
+
+    assert "LLM summary" not in context_text
+    assert len(context_text) < len(long_output)
+    assert stored.is_compressed is False
+
+    client.release.set()
+    await manager.wait_for_compressions()
+
+    assert stored.is_compressed is True
+    assert stored.summary == "LLM summary"
+    assert manager.get_stats()["pending_compressions"] == 0
+    assert "LLM summary" in await manager.get_context_for_task("task-two", ["task-one"])
+
+
+@pytest.mark.asyncio
+async def test_manager_rolling_ancestry_summary() -> None:
+    manager = ContextManager(
+        session_id="session-chain", max_tokens=4_000, ancestry_max_chars=400
+    )
+    previous: list[str] = []
+    for stage in range(30):
+        task_id = f"stage-{stage}"
+        await manager.add_task_output(
+            task_id,
+            f"阶段 {stage} 的结论是方案 {stage}。" + "细节说明。" * 40,
+            "agent",
+            dependency_ids=previous,
+        )
+        previous = [task_id]
+
+    context_text = await manager.get_context_for_task("stage-30", ["stage-29"])
+    ancestry = context_text.split("## 祖先任务摘要", 1)[1]
+
+    assert "stage-28" in ancestry
+    assert "stage-29" not in ancestry
+    assert len(ancestry) <= 400
+    shallow = await manager.get_context_for_task("stage-2", ["stage-1"])
+    assert "- stage-0: 阶段 0 的结论是方案 0。" in shallow
+
+
+def test_store_retrieval_index_search(context_store: ContextStore) -> None:
+    store = ContextStore("session-search", retrieval_index=True)
+    store.add(ContextLayer.WORKFLOW, make_entry("db", content="数据库 schema 使用 PostgreSQL"))
+    store.add(ContextLayer.WORKFLOW, make_entry("ui", content="前端使用 React 组件库"))
+    store.add(ContextLayer.TASK, make_entry("auth", content="login API uses JWT tokens"))
+
+    hits = store.search("设计 PostgreSQL 数据库表", top_k=2)
+
+    assert [entry.id for entry, _ in hits][0] == "db"
+    assert [entry.id for entry, _ in store.search("JWT login", top_k=1)] == ["auth"]
+    store.remove("db")
+    assert all(entry.id != "db" for entry, _ in store.search("PostgreSQL"))
+    assert context_store.search("anything") == []
+
+
+@pytest.mark.asyncio
+async def test_manager_retrieval_drops_unrelated_shared_state() -> None:
+    manager = ContextManager(session_id="session-rag", max_tokens=2_000, retrieval_top_k=1)
+    await manager.add_shared_state("db", "数据库使用 PostgreSQL 存储用户表")
+    await manager.add_shared_state("style", "前端配色使用蓝色主题")
+    await manager.add_task_output("task-one", "接口定义完成", "agent-a")
+
+    context_text = await manager.get_context_for_task(
+        "task-two", ["task-one"], objective="为用户表编写 PostgreSQL 迁移脚本"
+    )
+
+    assert "接口定义完成" in context_text
+    assert "PostgreSQL" in context_text
+    assert "蓝色主题" not in context_text
+
+
+@pytest.mark.asyncio
+async def test_manager_lists_retrieved_task_outputs_as_other_context() -> None:
+    manager = ContextManager(session_id="session-rag-tasks", max_tokens=2_000, retrieval_top_k=2)
+    await manager.add_task_output("dep", "接口定义完成", "agent-a")
+    await manager.add_task_output("other", "PostgreSQL 用户表迁移脚本已编写", "agent-b")
+
+    context_text = await manager.get_context_for_task(
+        "task-next", ["dep"], objective="为用户表编写 PostgreSQL 迁移脚本"
+    )
+
+    prerequisites, _, others = context_text.partition("## 其他上下文")
+    assert "接口定义完成" in prerequisites
+    assert "PostgreSQL" not in prerequisites
+    assert "PostgreSQL" in others
+
+
+def test_simhash_near_duplicates_are_close() -> None:
+    base = "数据库迁移完成，新增 users 表和 orders 表，索引已经建立，外键约束检查通过。" * 3
+    variant = base + "补充说明。"
+    unrelated = "前端页面使用 React 实现，登录表单支持记住密码和第三方登录。" * 3
+
+    assert hamming_distance(simhash(base), simhash(variant)) <= 3
+    assert hamming_distance(simhash(base), simhash(unrelated)) > 3
+
+
+def test_deduplicate_keeps_best_ranked_representative(context_store: ContextStore) -> None:
+    text = "数据库迁移完成，新增 users 表和 orders 表，索引已经建立。" * 3
+    context_store.add(ContextLayer.WORKFLOW, make_entry("best", content=text))
+    context_store.add(ContextLayer.WORKFLOW, make_entry("copy", content=text + "。"))
+    context_store.add(ContextLayer.WORKFLOW, make_entry("other", content="前端使用蓝色主题"))
+
+    entries = [context_store.get(entry_id) for entry_id in ("best", "copy", "other")]
+    kept = deduplicate(entries, context_store.fingerprints())
+
+    assert [entry.id for entry in kept] == ["best", "other"]
+    context_store.remove("copy")
+    assert context_store.fingerprint("copy") is None
+
+
+def test_deduplicate_keeps_entries_without_features(context_store: ContextStore) -> None:
+    context_store.add(ContextLayer.WORKFLOW, make_entry("bang", content="!!!"))
+    context_store.add(ContextLayer.WORKFLOW, make_entry("emoji", content="🎉🎉"))
+
+    entries = [context_store.get(entry_id) for entry_id in ("bang", "emoji")]
+
+    assert simhash("……") is None
+    assert [entry.id for entry in deduplicate(entries, context_store.fingerprints())] == [
+        "bang",
+        "emoji",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_manager_drops_near_duplicate_context() -> None:
+    manager = ContextManager(session_id="session-dedup", max_tokens=4_000)
+    report = "接口评审结论：认证模块需要补充刷新令牌逻辑，并增加速率限制。" * 3
+    await manager.add_task_output("review-a", report, "agent-a")
+    await manager.add_task_output("review-b", report, "agent-a")
+
+    context_text = await manager.get_context_for_task("task-next", ["review-a", "review-b"])
+
+    assert context_text.count("接口评审结论") == 3
+
+
+def test_store_fork_is_copy_on_write(context_store: ContextStore) -> None:
+    context_store.add(ContextLayer.WORKFLOW, make_entry("shared", content="父存储内容"))
+    context_store.add(ContextLayer.WORKFLOW, make_entry("doomed", content="待删除"))
+
+    child = context_store.fork()
+    child.update("shared", content="分支修改")
+    child.remove("doomed")
+    child.add(ContextLayer.TASK, make_entry("branch-only", ContextType.DEPENDENCY_OUTPUT))
+
+    assert child.get("shared").content == "分支修改"
+    assert child.get("doomed") is None
+    assert set(child.get_layer(ContextLayer.WORKFLOW)) == {"shared"}
+    assert context_store.get("shared").content == "父存储内容"
+    assert context_store.get("doomed") is not None
+    assert context_store.get("branch-only") is None
+
+    assert context_store.merge(child) == 3
+    assert context_store.get("shared").content == "分支修改"
+    assert context_store.get("doomed") is None
+    assert context_store.get("branch-only") is not None
+    with pytest.raises(ValueError):
+        context_store.fork().merge(child)
+
+
+def test_store_fork_reads_do_not_mutate_parent_entries() -> None:
+    store = ContextStore("session-fork-read", pack_threshold=2_000)
+    store.add(ContextLayer.WORKFLOW, make_entry("big", content="共享大段内容。" * 400))
+    store.add(ContextLayer.WORKFLOW, make_entry("plan", content="旧规划及其详细说明"), key="plan")
+    parent_big = store.backend.resolve("big")[0]
+    assert parent_big.is_packed
+
+    child = store.fork()
+    assert "共享大段内容" in child.get("big").content
+    assert "共享大段内容" in child.get_layer(ContextLayer.WORKFLOW)["big"].content
+    assert parent_big.is_packed
+    assert parent_big.access_count == 0
+
+    before_count = child.backend.layer_count(ContextLayer.WORKFLOW)
+    before_bytes = child.backend.layer_bytes(ContextLayer.WORKFLOW)
+    child.add(ContextLayer.WORKFLOW, make_entry("plan-v2", content="新规划"), key="plan")
+    assert child.backend.layer_count(ContextLayer.WORKFLOW) == before_count
+    assert child.backend.layer_bytes(ContextLayer.WORKFLOW) < before_bytes
+    assert child.get("plan") is None
+    assert child.get_by_key(ContextLayer.WORKFLOW, "plan").id == "plan-v2"
+    assert child.fingerprint("big") == store.fingerprint("big")
+
+
+@pytest.mark.asyncio
+async def test_manager_fork_keeps_lineage_and_counters_per_branch() -> None:
+    manager = ContextManager(session_id="session-fork-state", max_tokens=2_000)
+    manager.track_consumers({"backend": ["plan"], "deploy": ["backend"]})
+    await manager.add_task_output("plan", "整体规划", "agent-a")
+    branch = manager.fork()
+    await branch.add_task_output("backend", "后端接口完成", "agent-b", dependency_ids=["plan"])
+
+    assert manager.rolling_summary.ancestry_for(["backend"]) == {}
+    assert "backend" not in manager._produced_tokens
+    assert "plan" in branch.rolling_summary.ancestry_for(["backend"])
+
+    await manager.merge(branch)
+    assert "plan" in manager.rolling_summary.ancestry_for(["backend"])
+    assert "backend" in manager._produced_tokens
+
+
+@pytest.mark.asyncio
+async def test_manager_fork_isolates_parallel_branches() -> None:
+    manager = ContextManager(session_id="session-fork", max_tokens=2_000)
+    await manager.add_task_output("plan", "整体规划", "agent-a")
+    backend_branch = manager.fork()
+    frontend_branch = manager.fork()
+
+    await backend_branch.add_task_output("backend", "后端接口完成", "agent-b")
+    await frontend_branch.add_task_output("frontend", "前端页面完成", "agent-c")
+
+    frontend_view = await frontend_branch.get_context_for_task("x", ["plan", "backend"])
+    assert "整体规划" in frontend_view
+    assert "后端接口完成" not in frontend_view
+
+    await manager.merge(backend_branch)
+    await manager.merge(frontend_branch)
+    joined = await manager.get_context_for_task("deploy", ["backend", "frontend"])
+    assert "后端接口完成" in joined
+    assert "前端页面完成" in joined
+
+
+@pytest.mark.asyncio
+async def test_manager_deadline_truncates_to_scheduled_length() -> None:
+    client = GatedLLMClient()
+    manager = ContextManager(
+        session_id="session-bg-length",
+        llm_client=client,  # type: ignore[arg-type]
+        background_compression=False,
+        compression_deadline=0.01,
+    )
+    entry_id = manager.store.add(
+        ContextLayer.TASK, make_entry("out", ContextType.DEPENDENCY_OUTPUT, content="长" * 3_000)
+    )
+    manager._schedule_compression(manager.store.get(entry_id), 200)
+
+    context_text = await manager.get_context_for_task("next", ["out"])
+
+    assert 0 < context_text.count("长") <= 200
+    client.release.set()
+    await manager.wait_for_compressions()
+
+
+@pytest.mark.asyncio
+async def test_manager_merge_does_not_wait_for_branch_compressions() -> None:
+    client = GatedLLMClient()
+    manager = ContextManager(
+        session_id="session-fork-bg",
+        llm_client=client,  # type: ignore[arg-type]
+        max_tokens=4_000,
+    )
+    branch = manager.fork()
+    entry_id = await branch.add_task_output("task-one", "没有句子边界的超长输出" * 500, "agent-a")
+
+    await asyncio.wait_for(manager.merge(branch), timeout=1)
+    assert manager.get_stats()["pending_compressions"] == 1
+
+    client.release.set()
+    await manager.wait_for_compressions()
+    assert manager.store.get(entry_id).summary == "LLM summary"
+
+
+@pytest.mark.asyncio
+async def test_manager_gc_drops_outputs_after_last_consumer() -> None:
+    manager = ContextManager(session_id="session-gc", gc_policy=DemotionPolicy.DROP)
+    manager.track_consumers({"root": [], "left": ["root"], "right": ["root"]})
+    await manager.add_task_output("root", "根任务输出", "agent-a")
+
+    assert await manager.release_consumer("left") == 0
+    assert "根任务输出" in await manager.get_context_for_task("right", ["root"])
+    assert await manager.release_consumer("right") == 1
+    assert manager.store.get_layer(ContextLayer.TASK) == {}
+    assert manager.get_stats()["gc"]["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_manager_gc_leaves_unrelated_entries_packed() -> None:
+    manager = ContextManager(
+        session_id="session-gc-packed", gc_policy=DemotionPolicy.DROP, pack_threshold=1_000
+    )
+    manager.track_consumers({"child": ["root"], "sink": ["other"]})
+    await manager.add_task_output("root", "根任务输出", "agent-a")
+    await manager.add_task_output("other", "无关的长输出。" * 300, "agent-b")
+    await manager.wait_for_compressions()
+    other = next(
+        entry for _, entry in manager.store.backend.layer_items(ContextLayer.TASK)
+        if entry.source == "other"
+    )
+    assert other.is_packed
+
+    assert await manager.release_consumer("child") == 1
+    assert other.is_packed
+
+
+@pytest.mark.asyncio
+async def test_manager_gc_spills_and_recalls(tmp_path) -> None:
+    spill = SQLiteBackend(tmp_path / "spill.db", "session-spill")
+    manager = ContextManager(
+        session_id="session-spill", gc_policy=DemotionPolicy.SPILL, spill_backend=spill
+    )
+    manager.track_consumers({"child": ["root"]})
+    await manager.add_task_output("root", "溢出到磁盘的输出", "agent-a")
+
+    await manager.release_consumer("child")
+    assert manager.store.get_layer(ContextLayer.TASK) == {}
+
+    context_text = await manager.get_context_for_task("late", ["root"])
+    assert "溢出到磁盘的输出" in context_text
+    assert manager.get_stats()["gc"]["recalled"] == 1
+    spill.close()
+
+
+@pytest.mark.asyncio
+async def test_manager_gc_compresses_in_background() -> None:
+    manager = ContextManager(session_id="session-gc-compress", gc_policy=DemotionPolicy.COMPRESS)
+    manager.track_consumers({"child": ["root"]})
+    await manager.add_task_output("root", "根任务的详细输出。" * 200, "agent-a")
+    await manager.wait_for_compressions()
+
+    assert await manager.release_consumer("child") == 1
+    assert manager._pending_compressions
+    await manager.wait_for_compressions()
+    assert all(entry.is_compressed for entry in manager.store.get_layer(ContextLayer.TASK).values())
+    assert manager.get_stats()["gc"]["compressed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_manager_close_removes_temporary_spill_file(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    manager = ContextManager(session_id="session-spill-tmp", gc_policy=DemotionPolicy.SPILL)
+    manager.track_consumers({"child": ["root"]})
+    await manager.add_task_output("root", "临时溢出", "agent-a")
+    await manager.release_consumer("child")
+    assert list((tmp_path / "mas").glob("spill-*"))
+
+    manager.close()
+    assert not list((tmp_path / "mas").glob("spill-*"))
+
+
+@pytest.mark.asyncio
+async def test_manager_compresses_only_when_consumer_window_is_oversubscribed() -> None:
+    roomy = ContextManager(session_id="session-roomy", background_compression=False)
+    roomy.track_consumers({"consumer": ["big"]})
+    await roomy.add_task_output("big", "detail " * 1_000, "agent-a")
+    assert not any(entry.is_compressed for entry in roomy.store.get_layer(ContextLayer.TASK).values())
+
+    wide = ContextManager(
+        session_id="session-wide", max_tokens=1_000, background_compression=False
+    )
+    producers = [f"part-{index}" for index in range(4)]
+    wide.track_consumers({"join": producers})
+    for producer in producers:
+        await wide.add_task_output(producer, "detail " * 300, "agent-a")
+
+    entries = wide.store.get_layer(ContextLayer.TASK).values()
+    assert all(entry.is_compressed for entry in entries)
+    assert all(len(entry.summary) <= 1_100 for entry in entries)
+
+
+def test_entry_pack_content_round_trip() -> None:
+    text = "def handler():\n    return 42\n" * 200
+    entry = make_entry("code", content=text)
+    structured = make_entry("config", content={"rows": ["value"] * 200})
+
+    assert entry.pack_content() > 0
+    assert entry.is_packed and entry.content == ""
+    assert entry.content_text() == text
+    assert ContextEntry.from_dict(entry.to_dict()).content == text
+    assert entry.unpack_content() and entry.content == text
+    assert structured.pack_content() > 0
+    structured.unpack_content()
+    assert structured.content == {"rows": ["value"] * 200}
+
+
+def test_store_packs_large_and_cold_entries() -> None:
+    store = ContextStore("session-pack", pack_threshold=2_000, cold_after=60.0)
+    big = "print('hello world')\n" * 400
+    store.add(ContextLayer.TASK, make_entry("big", ContextType.DEPENDENCY_OUTPUT, big))
+    cold = make_entry("cold", content="shared configuration " * 50, timestamp=time.time() - 120)
+    store.add(ContextLayer.WORKFLOW, cold)
+    store.add(ContextLayer.WORKFLOW, make_entry("warm", content="recent note " * 60))
+
+    stats = store.get_packing_stats()
+    assert stats["packed_entries"] == 2
+    assert stats["bytes_saved"] > len(big) // 2
+    assert store.backend.resolve("big")[0].is_packed
+
+    assert store.get("big").content == big
+    assert store.get_packing_stats()["unpacks"] == 1
+    store.sweep()
+    assert store.backend.resolve("big")[0].is_packed
+    assert not store.backend.resolve("warm")[0].is_packed
+
+
+@pytest.mark.asyncio
+async def test_manager_memoizes_context_until_store_changes() -> None:
+    manager = ContextManager(session_id="session-memo", max_tokens=2_000)
+    await manager.add_task_output("task-one", "第一步完成", "agent-a")
+
+    first = await manager.get_context_for_task("task-two", ["task-one"])
+    again = await manager.get_context_for_task("task-two", ["task-one"])
+    cache_stats = manager.get_stats()["context_cache"]
+    assert again is first
+    assert (cache_stats["hits"], cache_stats["misses"]) == (1, 1)
+
+    await manager.add_shared_state("note", "新的共享状态")
+    updated = await manager.get_context_for_task("task-two", ["task-one"])
+    assert "新的共享状态" in updated
+    assert manager.get_stats()["context_cache"]["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_manager_context_cache_respects_ttl() -> None:
+    manager = ContextManager(session_id="session-memo-ttl", max_tokens=2_000)
+    manager.store.add(
+        ContextLayer.WORKFLOW,
+        make_entry("short-lived", content="临时状态", ttl=1, timestamp=time.time() - 0.95),
+    )
+
+    assert "临时状态" in await manager.get_context_for_task("task", [])
+    await asyncio.sleep(0.1)
+    assert "临时状态" not in await manager.get_context_for_task("task", [])
+
+
 def test_manager_get_stats(context_manager: ContextManager) -> None:
     context_manager.store.add(ContextLayer.SYSTEM, make_entry("sys", ContextType.CONFIGURATION))
     context_manager.store.add(
@@ -409,3 +1151,33 @@ def test_manager_get_stats(context_manager: ContextManager) -> None:
     assert stats["layer_counts"]["task"] == 1
     assert stats["total_entries"] == 2
     assert stats["token_estimate"] >= 0
+
+
+def test_manager_get_metrics_reads_backend_counts_without_thawing() -> None:
+    manager = ContextManager(session_id="session-metrics", pack_threshold=1_000)
+    manager.store.add(ContextLayer.WORKFLOW, make_entry("big", content="冷数据。" * 500))
+    manager.store.add(ContextLayer.TASK, make_entry("task-entry", ContextType.DEPENDENCY_OUTPUT))
+
+    metrics = manager.get_metrics()
+
+    assert metrics["layer_counts"] == {"system": 0, "workflow": 1, "task": 1, "agent": 0}
+    assert metrics["total_entries"] == 2
+    assert "token_estimate" not in metrics
+    assert metrics["packing"]["packed_entries"] == 1
+    assert manager.store.backend.resolve("big")[0].is_packed
+
+
+@pytest.mark.asyncio
+async def test_manager_reads_leave_packed_entries_packed() -> None:
+    manager = ContextManager(session_id="session-packed-reads", pack_threshold=1_000)
+    for index in range(3):
+        await manager.add_shared_state(f"doc-{index}", f"共享文档 {index}。" * 300)
+    packed = manager.store.get_packing_stats()
+    assert packed["packed_entries"] == 3
+
+    manager.get_stats()
+    context_text = await manager.get_context_for_task("task", [])
+
+    assert "共享文档 0" in context_text
+    assert manager.store.get_packing_stats()["packed_entries"] == 3
+    assert manager.store.get_packing_stats()["bytes_saved"] == packed["bytes_saved"]
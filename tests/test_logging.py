@@ -0,0 +1,463 @@
+import asyncio
+import json
+import logging
+import threading
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from mas.cli import main
+from mas.context import ContextManager
+from mas.core.schemas import AgentCapability, HookContext, TaskResult
+from mas.core.task import Task
+from mas.core.workflow import Workflow
+from mas.execution.engine import ExecutionEngine
+from mas.execution.timing import aggregate_timings
+from mas.hooks.builtin.audit_log import audit_log_hook
+from mas.logging import (
+    BlobStore,
+    ExecutionTracker,
+    LatencyHistogram,
+    LogEvent,
+    SpanTracer,
+    build_chrome_trace,
+)
+from mas.utils import logger as logger_module
+from mas.utils.logger import configure_logging, get_logger, shutdown_logging
+
+
+class StubLLMClient:
+    model = "stub-model"
+
+    async def acomplete(
+        self,
+        prompt: str,
+        model: str | None = None,
+        temperature: float = 0.7,
+        response_format: dict[str, object] | None = None,
+    ) -> str:
+        await asyncio.sleep(0.01)
+        return "stub answer"
+
+
+def make_parallel_workflow() -> Workflow:
+    workflow = Workflow(description="tracing workflow")
+    workflow.add_task(Task("root", "根任务", AgentCapability.PLANNING, []))
+    workflow.add_task(Task("left", "分支1", AgentCapability.BACKEND, ["root"]))
+    workflow.add_task(Task("right", "分支2", AgentCapability.FRONTEND, ["root"]))
+    return workflow
+
+
+def log_task(tracker: ExecutionTracker, task_id: str) -> None:
+    tracker.log_task_start(task_id, "agent-a")
+    tracker.log_llm_request(task_id, "agent-a", f"prompt for {task_id}")
+    tracker.log_task_end(task_id, TaskResult(task_id=task_id, success=True, agent_name="agent-a"))
+
+
+def test_tracker_ring_buffer_keeps_running_counters() -> None:
+    tracker = ExecutionTracker("session-ring", max_records=4)
+    for index in range(10):
+        log_task(tracker, f"task-{index}")
+
+    summary = tracker.get_summary()
+
+    assert len(tracker.records) == 4
+    assert tracker.records[-1].event == LogEvent.TASK_END
+    assert summary["total_events"] == 30
+    assert summary["retained_events"] == 4
+    assert summary["event_counts"]["task_start"] == 10
+
+
+def test_tracker_streams_full_history_to_jsonl(tmp_path) -> None:
+    sink_path = tmp_path / "tracking" / "events.jsonl"
+    tracker = ExecutionTracker("session-sink", sink_path=sink_path, max_records=2)
+    for index in range(5):
+        log_task(tracker, f"task-{index}")
+    tracker.flush()
+
+    lines = sink_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 15
+    assert json.loads(lines[0])["event"] == "task_start"
+
+    export_path = tmp_path / "export.json"
+    tracker.export_json(str(export_path))
+    exported = json.loads(export_path.read_text(encoding="utf-8"))
+    assert [record["task_id"] for record in exported[::3]] == [f"task-{i}" for i in range(5)]
+
+    tracker.close()
+    assert sink_path.read_text(encoding="utf-8").count("\n") == 15
+
+
+def test_blob_store_deduplicates_and_survives_memory_eviction(tmp_path) -> None:
+    store = BlobStore(tmp_path / "blobs", max_entries=1)
+    context = "## 前置任务的输出\n" + "shared context line\n" * 500
+
+    first = store.put(context)
+    assert store.put(context) == first
+    store.put("another prompt")
+
+    stats = store.get_stats()
+    assert stats["unique_blobs"] == 2
+    assert stats["duplicates"] == 1
+    assert stats["stored_bytes"] < stats["raw_bytes"] // 10
+    assert store.get(first) == context
+    store.flush()
+    assert BlobStore(tmp_path / "blobs").get(first) == context
+    assert store.get("0" * 64) is None
+    store.close()
+
+
+def test_blob_store_writes_on_background_thread(tmp_path, monkeypatch) -> None:
+    writers = []
+    write_bytes = Path.write_bytes
+
+    def record_writer(path: Path, data: bytes) -> int:
+        writers.append(threading.current_thread())
+        return write_bytes(path, data)
+
+    monkeypatch.setattr(Path, "write_bytes", record_writer)
+    store = BlobStore(tmp_path / "blobs", max_entries=1)
+    first = store.put("first prompt")
+    store.put("second prompt")
+    assert store.get(first) == "first prompt"
+
+    store.close()
+    assert len(writers) == 2
+    assert threading.current_thread() not in writers
+
+    reopened = BlobStore(tmp_path / "blobs")
+    reopened.put("first prompt")
+    reopened.close()
+    assert reopened.get_stats()["duplicates"] == 1
+
+
+def test_engine_close_closes_tracking_output(tmp_path) -> None:
+    engine = ExecutionEngine(
+        tracking_path=str(tmp_path / "events.jsonl"),
+        tracking_blob_dir=str(tmp_path / "blobs"),
+    )
+    engine.tracker.log_llm_request("task-a", "agent-a", "prompt")
+    engine.close()
+
+    assert engine.tracker.sink is not None and engine.tracker.sink.closed
+    assert (tmp_path / "events.jsonl").read_text(encoding="utf-8").count("\n") == 1
+    assert list((tmp_path / "blobs").glob("*/*.z"))
+
+
+def test_tracker_records_hold_digests_only() -> None:
+    tracker = ExecutionTracker("session-blobs", blob_store=BlobStore())
+    prompt = "large prompt " * 1_000
+    tracker.log_llm_request("task-a", "agent-a", prompt)
+    tracker.log_llm_response("task-a", "agent-a", prompt)
+
+    request, response = tracker.records
+    assert "prompt" not in request.data
+    assert request.data["prompt_length"] == len(prompt)
+    assert request.data["prompt_digest"] == response.data["response_digest"]
+    assert tracker.lookup(request.data["prompt_digest"]) == prompt
+    assert tracker.expand(response) == {"response": prompt}
+    assert tracker.blob_store.get_stats()["unique_blobs"] == 1
+
+
+@pytest.mark.asyncio
+async def test_span_tracer_parents_spans_across_tasks() -> None:
+    tracer = SpanTracer()
+
+    async def child(name: str) -> None:
+        with tracer.span(name):
+            await asyncio.sleep(0)
+
+    with tracer.span("root") as root:
+        await asyncio.gather(child("a"), child("b"))
+    with pytest.raises(RuntimeError), tracer.span("failing"):
+        raise RuntimeError("boom")
+
+    spans = {span.name: span for span in tracer.spans}
+    assert spans["a"].parent_span_id == root.span_id
+    assert spans["b"].trace_id == root.trace_id
+    assert spans["failing"].trace_id != root.trace_id
+    assert spans["failing"].status_message == "boom"
+    assert root.duration_ms >= spans["a"].duration_ms
+
+
+@pytest.mark.asyncio
+async def test_engine_exports_span_hierarchy(tmp_path) -> None:
+    trace_path = tmp_path / "trace.json"
+    engine = ExecutionEngine(llm_client=StubLLMClient(), tracing_path=str(trace_path))
+
+    await engine.run(make_parallel_workflow())
+
+    spans = list(engine.tracker.tracer.spans)
+    by_id = {span.span_id: span for span in spans}
+    workflow_span = next(span for span in spans if span.name == "workflow")
+    task_spans = [span for span in spans if span.name == "task"]
+    assert len(task_spans) == 3
+    assert all(span.parent_span_id == workflow_span.span_id for span in task_spans)
+    for name in ("agent.select", "hook.pre_tool_use", "context.build", "llm.attempt"):
+        children = [span for span in spans if span.name == name]
+        assert len(children) == 3
+        assert all(by_id[span.parent_span_id].name == "task" for span in children)
+
+    exported = json.loads(trace_path.read_text(encoding="utf-8"))
+    otlp_spans = exported["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(otlp_spans) == len(spans)
+    llm_span = next(span for span in otlp_spans if span["name"] == "llm.attempt")
+    assert "model" in {attribute["key"] for attribute in llm_span["attributes"]}
+    assert llm_span["parentSpanId"] in {span.span_id for span in task_spans}
+
+
+@pytest.mark.asyncio
+async def test_chrome_trace_has_task_lanes_and_concurrency(tmp_path) -> None:
+    engine = ExecutionEngine(llm_client=StubLLMClient())
+    await engine.run(make_parallel_workflow())
+
+    trace = build_chrome_trace(engine.tracker.tracer.spans)
+    events = trace["traceEvents"]
+    lane_names = {
+        event["args"]["name"]
+        for event in events
+        if event["ph"] == "M" and event["name"] == "thread_name"
+    }
+    task_events = [event for event in events if event["ph"] == "X" and event["name"] == "task"]
+    running = [event["args"]["running_tasks"] for event in events if event["name"] == "running_tasks"]
+
+    assert {"task root", "task left", "task right"} <= lane_names
+    assert len({event["tid"] for event in task_events}) == 3
+    assert max(running) == 2 and running[-1] == 0
+    llm_events = [event for event in events if event["ph"] == "X" and event["name"] == "llm.attempt"]
+    assert {event["tid"] for event in llm_events} == {event["tid"] for event in task_events}
+
+    engine.tracker.export_chrome_trace(str(tmp_path / "trace.json"))
+    assert json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))["traceEvents"]
+
+
+def test_latency_histogram_percentiles_within_bucket_error() -> None:
+    histogram = LatencyHistogram()
+    for value in range(1, 1_001):
+        histogram.record(float(value))
+
+    assert histogram.count == 1_000
+    for quantile, expected in ((50, 500.0), (90, 900.0), (99, 990.0)):
+        assert abs(histogram.percentile(quantile) - expected) / expected < 0.04
+    assert histogram.snapshot()["max"] == 1_000.0
+    assert LatencyHistogram().percentile(50) is None
+
+
+@pytest.mark.asyncio
+async def test_tracker_metrics_cover_engine_phases() -> None:
+    engine = ExecutionEngine(llm_client=StubLLMClient())
+    await engine.run(make_parallel_workflow())
+
+    metrics = engine.tracker.get_metrics()
+    assert {
+        "task_duration_ms",
+        "llm_latency_ms",
+        "queue_wait_ms",
+        "hook_ms",
+        "context_assembly_ms",
+    } <= set(metrics)
+    assert sum(series["count"] for series in metrics["task_duration_ms"]) == 3
+    assert sum(series["count"] for series in metrics["queue_wait_ms"]) == 2
+    assert all("model" in series["labels"] for series in metrics["llm_latency_ms"])
+    assert engine.tracker.metrics.percentile("llm_latency_ms", 50) >= 10.0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text() -> None:
+    engine = ExecutionEngine(llm_client=StubLLMClient())
+    await engine.run(make_parallel_workflow())
+
+    server = engine.serve_metrics(port=0)
+    try:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            content_type = response.headers["Content-Type"]
+            body = response.read().decode("utf-8")
+    finally:
+        server.stop()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert '# TYPE mas_events_total counter' in body
+    assert 'mas_events_total{event="task_end"} 3' in body
+    assert "mas_inflight_tasks 0" in body
+    assert 'mas_context_entries{layer="task"}' in body
+    assert '# TYPE mas_task_duration_ms histogram' in body
+    infinite_buckets = [
+        int(line.rsplit(" ", 1)[1])
+        for line in body.splitlines()
+        if line.startswith("mas_task_duration_ms_bucket") and 'le="+Inf"' in line
+    ]
+    assert sum(infinite_buckets) == 3
+
+
+@pytest.mark.asyncio
+async def test_analyze_cli_reports_critical_path_and_parallelism(
+    tmp_path, capsys
+) -> None:
+    trace_path = tmp_path / "trace.json"
+    spans_path = tmp_path / "spans.json"
+    engine = ExecutionEngine(llm_client=StubLLMClient(), tracing_path=str(spans_path))
+    await engine.run(make_parallel_workflow())
+    engine.tracker.export_json(str(trace_path))
+
+    assert main(["analyze", str(trace_path), "--spans", str(spans_path), "--json"]) == 0
+    report = json.loads(capsys.readouterr().out)
+
+    assert report["critical_path"][0] == "root"
+    assert len(report["critical_path"]) == 2
+    assert report["parallelism"]["dag_width"] == 2
+    assert report["parallelism"]["peak"] == 2
+    assert report["critical_path_ms"] <= report["makespan_ms"]
+    assert {task["task_id"] for task in report["tasks"]} == {"root", "left", "right"}
+    assert sum(usage["calls"] for usage in report["llm"].values()) == 3
+    assert all(usage["prompt_tokens"] > 0 for usage in report["llm"].values())
+    assert report["compression"]["count"] == 0
+
+    assert main(["analyze", str(trace_path)]) == 0
+    assert "critical path" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_analyze_cli_reports_each_run_of_a_reused_session(tmp_path, capsys) -> None:
+    trace_path = tmp_path / "trace.json"
+    engine = ExecutionEngine(llm_client=StubLLMClient())
+    await engine.run(make_parallel_workflow())
+    await engine.run(make_parallel_workflow())
+    engine.tracker.export_json(str(trace_path))
+
+    assert main(["analyze", str(trace_path), "--json"]) == 0
+    reports = json.loads(capsys.readouterr().out)
+
+    assert [report["run"] for report in reports] == [1, 2]
+    assert all(len(report["tasks"]) == 3 for report in reports)
+    assert all(report["critical_path"][0] == "root" for report in reports)
+    assert reports[1]["makespan_ms"] < 5_000
+
+    assert main(["analyze", str(trace_path), "--run", "2"]) == 0
+    assert "run 2" in capsys.readouterr().out
+
+
+def test_configure_logging_writes_json_lines_off_thread(tmp_path) -> None:
+    configure_logging(
+        log_dir=tmp_path / "logs",
+        stream=False,
+        module_levels={"mas.hooks.audit": "WARNING"},
+    )
+    try:
+        get_logger("mas.execution").info("Runner error", extra={"task_id": "t1"})
+        get_logger("mas.hooks.audit").info("suppressed")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            get_logger("mas.execution").exception("failed %s", "t2")
+    finally:
+        shutdown_logging()
+
+    lines = (tmp_path / "logs" / "mas.log").read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["message"] for record in records] == ["Runner error", "failed t2"]
+    assert records[0]["task_id"] == "t1"
+    assert records[0]["logger"] == "mas.execution"
+    assert "RuntimeError: boom" in records[1]["exc"]
+
+
+async def test_get_logger_logs_to_stderr_by_default(tmp_path, monkeypatch, capsys, caplog) -> None:
+    monkeypatch.chdir(tmp_path)
+    shutdown_logging()
+    monkeypatch.setattr(logger_module, "_configured", False)
+    context = HookContext(
+        agent_name="agent-a",
+        tool_name="read_file",
+        params={"path": "notes.md"},
+        session_id="session-audit",
+        timestamp=0.0,
+    )
+    await audit_log_hook(context)
+    shutdown_logging()
+
+    err = capsys.readouterr().err
+    assert "INFO mas.hooks.audit: agent=agent-a tool=read_file" in err
+    assert not (tmp_path / "logs").exists()
+
+    configure_logging(log_dir=None, stream=False)
+    try:
+        with caplog.at_level(logging.INFO, logger="mas"):
+            get_logger("mas.execution").info("still captured")
+    finally:
+        shutdown_logging()
+    assert "still captured" in caplog.messages
+    assert "still captured" not in capsys.readouterr().err
+
+
+def test_tracker_indexes_follow_ring_buffer_eviction() -> None:
+    tracker = ExecutionTracker("session-index", max_records=6)
+    for index in range(5):
+        log_task(tracker, f"task-{index}")
+
+    assert tracker.query(task_id="task-0") == []
+    assert [record.event for record in tracker.query(task_id="task-4")] == [
+        LogEvent.TASK_START,
+        LogEvent.LLM_REQUEST,
+        LogEvent.TASK_END,
+    ]
+    assert len(tracker.query(event=LogEvent.TASK_END, agent_name="agent-a")) == 2
+    assert tracker.latest(LogEvent.TASK_END).task_id == "task-4"
+
+    cutoff = tracker.query(task_id="task-4")[0].timestamp
+    assert tracker.query(since=cutoff)[-3:] == tracker.query(task_id="task-4")
+    assert all(record.timestamp <= cutoff for record in tracker.query(until=cutoff))
+
+    durations = tracker.aggregate_durations(group_by="task_id")
+    assert set(durations) == {"task-3", "task-4"}
+    assert durations["task-4"]["count"] == 1
+    assert tracker.aggregate_durations()["agent-a"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_engine_reports_framework_versus_llm_time() -> None:
+    engine = ExecutionEngine(llm_client=StubLLMClient())
+    result = await engine.run(make_parallel_workflow())
+
+    for task_result in result.task_results.values():
+        timing = task_result.timing
+        assert {"agent_selection_ms", "hooks_ms", "context_ms", "tracker_ms"} <= set(timing)
+        assert timing["llm_ms"] >= 10.0
+        assert timing["framework_ms"] + timing["llm_ms"] == pytest.approx(timing["total_ms"])
+
+    assert result.llm_ms == pytest.approx(
+        sum(task_result.timing["llm_ms"] for task_result in result.task_results.values())
+    )
+    assert result.framework_ms is not None and result.framework_ms >= result.timing["scheduling_ms"]
+    assert 0.0 < result.timing["framework_share"] < 1.0
+    assert result.to_dict()["timing"] == result.timing
+
+
+def test_aggregate_timings_counts_background_compression_once() -> None:
+    timing = aggregate_timings(
+        [{"framework_ms": 50.0, "llm_ms": 100.0, "total_ms": 150.0}],
+        wall_ms=200.0,
+        scheduling_ms=10.0,
+        compression_ms=40.0,
+        compression_wait_ms=30.0,
+        summarize_ms=25.0,
+    )
+
+    assert timing["framework_ms"] == pytest.approx(50.0 + 10.0 + (40.0 - 30.0) - 25.0)
+    assert timing["llm_ms"] == pytest.approx(125.0)
+
+
+@pytest.mark.asyncio
+async def test_context_spans_separate_summarizer_and_wait_time() -> None:
+    tracer = SpanTracer()
+    manager = ContextManager(
+        session_id="session-compress-spans",
+        llm_client=StubLLMClient(),  # type: ignore[arg-type]
+        max_tokens=4_000,
+        tracer=tracer,
+    )
+    await manager.add_task_output("task-one", "没有句子边界的超长输出" * 500, "agent-a")
+    await manager.get_context_for_task("task-two", ["task-one"])
+
+    spans = {span.name: span for span in tracer.spans}
+    assert {"context.compress", "context.summarize", "context.compress_wait"} <= set(spans)
+    assert spans["context.summarize"].parent_span_id == spans["context.compress"].span_id